@@ -6,6 +6,12 @@ export $(grep -v '^#' /backend/.env | xargs)
 python manage.py collectstatic --noinput
 python manage.py migrate --noinput
 
+# Workers write their metrics to files of a shared directory,
+# /metrics/ aggregates them, stale files of previous runs are removed
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Define the number of workers and threads
 # Based on the number of CPU cores
 # Formula: 2 * (number of CPU cores) + 1
@@ -13,4 +19,11 @@ python manage.py migrate --noinput
 WORKERS=${GUNICORN_WORKERS:-3}
 THREADS=${GUNICORN_THREADS:-2}
 
-gunicorn backend.wsgi:application --bind 0.0.0.0:8000 --workers "$WORKERS" --threads "$THREADS"
+# SERVER_MODE=asgi serves the app with uvicorn workers and async views,
+# waiting on the weather API then doesn't hold a worker thread
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    export DJANGO_ASYNC_VIEWS=True
+    gunicorn backend.asgi:application --bind 0.0.0.0:8000 --workers "$WORKERS" --worker-class uvicorn_worker.UvicornWorker
+else
+    gunicorn backend.wsgi:application --bind 0.0.0.0:8000 --workers "$WORKERS" --threads "$THREADS"
+fi
@@ -1,7 +1,9 @@
+# mypy: disable-error-code="import-untyped"
 """
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served by uvicorn workers when entrypoint.sh runs with SERVER_MODE=asgi.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
@@ -9,9 +11,10 @@ https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from configurations.asgi import get_asgi_application
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Dev")
 
 application = get_asgi_application()
@@ -0,0 +1,86 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+
+from utils.metrics import (
+    Histogram,
+    QueryStats,
+    install_query_recorders,
+    track_queries,
+)
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Duration of requests per view",
+    ("view", "method", "status"),
+)
+request_queries = Histogram(
+    "http_request_db_queries",
+    "DB queries per request",
+    ("view",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+request_query_duration = Histogram(
+    "http_request_db_query_duration_seconds",
+    "Total duration of the DB queries per request",
+    ("view",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, DB query count and DB time of every request,
+    labeled with the resolved view.
+    Supports both sync and async requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        install_query_recorders()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.async_mode:
+            return self.__acall__(request)
+        start_time = time.perf_counter()
+        with track_queries() as stats:
+            response: HttpResponse = self.get_response(request)
+        self.record(request, response, start_time, stats)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        start_time = time.perf_counter()
+        with track_queries() as stats:
+            response: HttpResponse = await self.get_response(request)
+        self.record(request, response, start_time, stats)
+        return response
+
+    @staticmethod
+    def record(
+        request: HttpRequest,
+        response: HttpResponse,
+        start_time: float,
+        stats: QueryStats,
+    ) -> None:
+        run_time = time.perf_counter() - start_time
+        match = request.resolver_match
+        view = match.view_name if match is not None else "unresolved"
+        request_duration.observe(
+            run_time,
+            view=view,
+            method=request.method or "",
+            status=str(response.status_code),
+        )
+        request_queries.observe(stats.count, view=view)
+        request_query_duration.observe(stats.duration, view=view)
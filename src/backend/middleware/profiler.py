@@ -0,0 +1,124 @@
+import hmac
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from utils.metrics import QueryStats, install_query_recorders, track_queries
+from utils.profiler import Profile, profile_request
+
+
+slow_request_logger = logging.getLogger("slow_requests")
+
+PROFILE_HEADER = "X-Profile"
+TIMING_DESCRIPTIONS = {
+    "db": "SQL queries",
+    "cache": "cache calls",
+    "http": "HTTP calls",
+}
+
+
+class ProfilerMiddleware:
+    """
+    Profiler of opted-in requests: a share of them is sampled with
+    PROFILER_SAMPLE_RATE, others ask for it with the X-Profile header
+    holding PROFILER_TOKEN.
+
+    The SQL queries, shared cache and outbound HTTP calls of profiled
+    requests are returned in the Server-Timing header, the slow ones
+    are written to the "slow_requests" log.
+    Supports both sync and async requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    logger = slow_request_logger
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.sample_rate: float = settings.PROFILER_SAMPLE_RATE
+        self.token: str = settings.PROFILER_TOKEN
+        self.slow_request_threshold: float = (
+            settings.PROFILER_SLOW_REQUEST_THRESHOLD
+        )
+        install_query_recorders()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.is_profiled(request):
+            return self.get_response(request)
+        start_time = time.perf_counter()
+        with profile_request() as profile, track_queries() as queries:
+            response: HttpResponse = self.get_response(request)
+        self.report(request, response, start_time, profile, queries)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not self.is_profiled(request):
+            return await self.get_response(request)
+        start_time = time.perf_counter()
+        with profile_request() as profile, track_queries() as queries:
+            response: HttpResponse = await self.get_response(request)
+        self.report(request, response, start_time, profile, queries)
+        return response
+
+    def is_profiled(self, request: HttpRequest) -> bool:
+        if self.token:
+            header = request.headers.get(PROFILE_HEADER)
+            if header is not None and hmac.compare_digest(
+                header.encode(), self.token.encode()
+            ):
+                return True
+        if self.sample_rate <= 0:
+            return False
+        return random.random() < self.sample_rate  # nosec
+
+    def report(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        start_time: float,
+        profile: Profile,
+        queries: QueryStats,
+    ) -> None:
+        run_time = time.perf_counter() - start_time
+        profile.add("db", queries.count, queries.duration)
+        response["Server-Timing"] = get_server_timing(profile, run_time)
+        if run_time < self.slow_request_threshold:
+            return
+        log_data = {
+            "request_method": request.method,
+            "request_path": request.get_full_path(),
+            "status_code": response.status_code,
+            "run_time": run_time,
+            "timings": {
+                kind: {"count": timing.count, "duration": timing.duration}
+                for kind, timing in profile.timings.items()
+            },
+        }
+        self.logger.warning(msg=log_data)
+
+
+def get_server_timing(profile: Profile, run_time: float) -> str:
+    """
+    Server-Timing header value, durations in milliseconds
+    """
+    metrics = [
+        f"{kind};dur={timing.duration * 1000:.3f};"
+        f'desc="{timing.count} {TIMING_DESCRIPTIONS.get(kind, kind)}"'
+        for kind, timing in profile.timings.items()
+    ]
+    metrics.append(f"total;dur={run_time * 1000:.3f}")
+    return ", ".join(metrics)
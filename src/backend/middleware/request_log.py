@@ -1,9 +1,13 @@
-import json
 import logging
+import random
 import socket
 import time
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
+from functools import cached_property
+from typing import Any
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
 
 
@@ -12,41 +16,69 @@ error_logger = logging.getLogger("error")
 
 
 class RequestLogMiddleware:
-    """Request Logging Middleware."""
+    """
+    Request Logging Middleware.
 
-    def __init__(
-        self, get_response: Callable[[HttpRequest], HttpResponse]
-    ) -> None:
+    Logs one structured record per request, successful ones are sampled
+    with REQUEST_LOG_SAMPLE_RATE. The "main" logger only enqueues it,
+    see QueueListenerHandler.
+    Supports both sync and async requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    logger = request_logger
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
         self.get_response = get_response
+        self.sample_rate: float = settings.REQUEST_LOG_SAMPLE_RATE
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @cached_property
+    def server_hostname(self) -> str:
+        return socket.gethostname()
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.async_mode:
+            return self.__acall__(request)
+        start_time = time.monotonic()
+        # request passes on to controller
+        response: HttpResponse = self.get_response(request)
+        self.log_request(request, response, start_time)
+        return response
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
         start_time = time.monotonic()
+        response: HttpResponse = await self.get_response(request)
+        self.log_request(request, response, start_time)
+        return response
+
+    def log_request(
+        self, request: HttpRequest, response: HttpResponse, start_time: float
+    ) -> None:
+        run_time = time.monotonic() - start_time
+        if not self.is_sampled(response):
+            return
         log_data = {
             "request_method": request.method,
             "request_path": request.get_full_path(),
-            "remote_address": request.META["REMOTE_ADDR"],
-            "server_hostname": socket.gethostname(),
+            "remote_address": request.META.get("REMOTE_ADDR"),
+            "server_hostname": self.server_hostname,
+            "status_code": response.status_code,
+            "run_time": run_time,
         }
+        self.logger.info(msg=log_data)
 
-        # Only logging "*/api/*" patterns
-        if "/api/" in str(request.get_full_path()):
-            try:
-                if request.body:
-                    json.loads(request.body.decode("utf-8"))
-            except json.JSONDecodeError:
-                pass
-            except UnicodeDecodeError as e:
-                error_logger.warning("UnicodeDecodeError: %s", str(e))
-
-        # request passes on to controller
-        response = self.get_response(request)
-
-        # add runtime
-        log_data["run_time"] = time.monotonic() - start_time
-
-        request_logger.info(msg=log_data)
-
-        return response
+    def is_sampled(self, response: HttpResponse) -> bool:
+        # failed requests are always logged
+        if response.status_code >= 400 or self.sample_rate >= 1:
+            return True
+        return random.random() < self.sample_rate  # nosec
 
     # Log unhandled exceptions as well
     def process_exception(
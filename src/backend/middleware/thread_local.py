@@ -1,11 +1,14 @@
-import threading
-from collections.abc import Callable
-from typing import Optional
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
 
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpRequest, HttpResponse
 
 
-_thread_local = threading.local()
+# Local to the thread, or to the task under ASGI,
+# sync code run by an async request sees the request as well
+_thread_local = Local()
 
 
 def get_current_request() -> Optional[HttpRequest]:
@@ -29,7 +32,8 @@ def clear_threading_locals() -> None:
     This function is typically used in tests to clear the thread-local storage
     between test runs.
     """
-    _thread_local.__dict__.clear()
+    if hasattr(_thread_local, "request"):
+        del _thread_local.request
 
 
 def add_request_to_thread_local(request: HttpRequest) -> None:
@@ -50,12 +54,28 @@ class ThreadLocalMiddleware:
     in a thread-local variable, making it accessible throughout the lifecycle
     of the request. It is useful for accessing the request object in places
     where it is not directly passed, like signal handlers or model methods.
+    Supports both sync and async requests.
     """
 
-    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.async_mode:
+            return self.__acall__(request)
+        _thread_local.request = request
+        response: HttpResponse = self.get_response(request)
+        return response
 
-    def __call__(self, request: HttpRequest) -> HttpResponse:
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
         _thread_local.request = request
-        response = self.get_response(request)
+        response: HttpResponse = await self.get_response(request)
         return response
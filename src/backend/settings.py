@@ -44,6 +44,9 @@ class Base(Configuration):
 
     ROOT_URLCONF = "backend.urls"
     WSGI_APPLICATION = "backend.wsgi.application"
+    # Serves the weather and shipment list endpoints with async views,
+    # for the ASGI deployment mode (SERVER_MODE=asgi in entrypoint.sh)
+    ASYNC_VIEWS = values.BooleanValue(False)
     CSRF_COOKIE_SECURE = True
     LANGUAGE_COOKIE_SECURE = True
     SESSION_COOKIE_SECURE = True
@@ -113,8 +116,22 @@ class Base(Configuration):
     REQUEST_LOG_MIDDLEWARE = [
         "backend.middleware.request_log.RequestLogMiddleware"
     ]
+    # Share of successful requests logged, failed ones are always logged
+    REQUEST_LOG_SAMPLE_RATE = values.FloatValue(1.0)
+    # Share of requests profiled, others can ask for it with
+    # the X-Profile header holding the token, disabled while empty
+    PROFILER_SAMPLE_RATE = values.FloatValue(0.0)
+    PROFILER_TOKEN = values.Value("")
+    # Profiled requests slower than this are logged to slow_requests.log
+    PROFILER_SLOW_REQUEST_THRESHOLD = values.FloatValue(1.0)  # seconds
+    # /metrics/ answers these networks, and requests with the token as
+    # a bearer token, disabled while empty
+    METRICS_ALLOWED_CIDRS = values.ListValue(["127.0.0.0/8", "::1/128"])
+    METRICS_TOKEN = values.Value("")
 
     BASE_MIDDLEWARE = [
+        "backend.middleware.metrics.MetricsMiddleware",
+        "backend.middleware.profiler.ProfilerMiddleware",
         "allow_cidr.middleware.AllowCIDRMiddleware",
         "django.middleware.security.SecurityMiddleware",
         "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -139,7 +156,7 @@ class Base(Configuration):
 
     REST_FRAMEWORK = {
         "DEFAULT_AUTHENTICATION_CLASSES": (
-            "rest_framework.authentication.TokenAuthentication",
+            "utils.authentication.CachedTokenAuthentication",
         ),
         "DEFAULT_PERMISSION_CLASSES": [
             "rest_framework.permissions.DjangoModelPermissions",
@@ -152,6 +169,15 @@ class Base(Configuration):
             "django_filters.rest_framework.DjangoFilterBackend"
         ],
         "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+        "DEFAULT_RENDERER_CLASSES": (
+            "utils.renderers.ORJSONRenderer",
+            "rest_framework.renderers.BrowsableAPIRenderer",
+        ),
+        "DEFAULT_PARSER_CLASSES": (
+            "utils.parsers.ORJSONParser",
+            "rest_framework.parsers.FormParser",
+            "rest_framework.parsers.MultiPartParser",
+        ),
     }
 
     SPECTACULAR_SETTINGS = {
@@ -163,7 +189,7 @@ class Base(Configuration):
 
     if not DEBUG:
         REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
-            "rest_framework.renderers.JSONRenderer",
+            "utils.renderers.ORJSONRenderer",
         )
 
     TEMPLATES = [
@@ -230,9 +256,37 @@ class Base(Configuration):
     }
 
     CACHE_CONN_STRING = "redis://"
+    # In-process cache kept in front of the shared one for hot keys
+    LOCAL_CACHE_MAX_SIZE = values.IntegerValue(1024)
+    LOCAL_CACHE_TTL = values.FloatValue(60.0)
+    CACHE_INVALIDATION_CHANNEL = values.Value("cache-invalidation")
 
     WEATHER_API_URL = values.URLValue("https://api.weatherbit.io/v2.0/current")
     WEATHER_API_KEY = values.Value("your-api-key")
+    WEATHER_API_TIMEOUT = values.FloatValue(5.0)
+    # Pooled keep-alive connections per process to the weather API
+    WEATHER_API_MAX_CONNECTIONS = values.IntegerValue(20)
+    WEATHER_API_KEEPALIVE_EXPIRY = values.FloatValue(30.0)
+    # Max concurrent API calls when resolving weather for a list of shipments
+    WEATHER_API_MAX_WORKERS = values.IntegerValue(8)
+    # Background threads refreshing stale cached weather
+    WEATHER_REFRESH_MAX_WORKERS = values.IntegerValue(2)
+    # Consecutive failures opening the weather API circuit and seconds
+    # before a probe request is let through again
+    WEATHER_CIRCUIT_FAILURE_THRESHOLD = values.IntegerValue(5)
+    WEATHER_CIRCUIT_RECOVERY_TIMEOUT = values.FloatValue(30.0)
+
+
+class Benchmark(Base):
+    """
+    Production-like settings for src/benchmarks,
+    the database and cache stay configurable through the environment
+    """
+
+    DEBUG = values.BooleanValue(False)
+    LOGGING = get_logger_settings(Base.LOGS_DIR, False)
+    # removing the development middlewares
+    MIDDLEWARE = Base.BASE_MIDDLEWARE
 
 
 class Dev(Base):
@@ -6,7 +6,7 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
-from .views import ping
+from .views import metrics, ping
 
 
 base_prefix = "api/v1"
@@ -17,6 +17,7 @@ urlpatterns = [
     path("auth/", include("djoser.urls.authtoken")),
     # Base endpoints
     path("ping/", ping, name="ping"),
+    path("metrics/", metrics, name="metrics"),
     path("admin/", admin.site.urls),
     # Schemas
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
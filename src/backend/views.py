@@ -1,7 +1,47 @@
-from django.http import JsonResponse
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from rest_framework.request import Request
 
+from utils.metrics import generate_metrics
+
 
 def ping(request: Request) -> JsonResponse:
     data = {"ping": "pong!"}
     return JsonResponse(data)
+
+
+def is_metrics_scraper(request: Request) -> bool:
+    """
+    Requests from the allowed networks, or with the metrics token
+    sent as a bearer token, disabled while the token is empty
+    """
+    token: str = settings.METRICS_TOKEN
+    header = request.headers.get("Authorization")
+    if (
+        token
+        and header is not None
+        and hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
+    ):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_CIDRS
+    )
+
+
+def metrics(request: Request) -> HttpResponse:
+    """
+    Prometheus metrics of the process, or of all the workers
+    in multiprocess mode
+    """
+    if not is_metrics_scraper(request):
+        return HttpResponseForbidden()
+    body, content_type = generate_metrics()
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,124 @@
+# mypy: disable-error-code="import-untyped"
+"""
+Benchmarks of the API hot paths, run from the src directory:
+
+    python -m benchmarks --shipments 1000 --output bench.json
+    python -m benchmarks --baseline bench.json
+
+Every run seeds a fresh test database, WeatherBit is mocked
+with a configurable latency.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess  # nosec
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(  # nosec
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict[str, Any], report: dict[str, Any]) -> None:
+    previous = {result["name"]: result for result in baseline["results"]}
+    print(f"Compared to {baseline['meta'].get('commit') or 'baseline'}:")
+    for result in report["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        p50_change = (
+            result["latency_ms"]["p50"] / old["latency_ms"]["p50"] - 1
+        ) * 100
+        print(
+            f"  {result['name']:<32} p50 {p50_change:+7.1f}%  "
+            f"queries {old['queries']} -> {result['queries']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shipments", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--weather-latency",
+        type=float,
+        default=0.05,
+        help="Seconds every mocked WeatherBit call takes",
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        help="Scenario name or glob pattern, can be repeated",
+    )
+    parser.add_argument("--output", help="Write the JSON report to a file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    os.environ.setdefault("DJANGO_CONFIGURATION", "Benchmark")
+    # pylint: disable=import-outside-toplevel
+    import configurations
+
+    configurations.setup()
+
+    import django
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    from benchmarks.runner import run_benchmarks
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        results = run_benchmarks(
+            shipments=args.shipments,
+            iterations=args.iterations,
+            warmup=args.warmup,
+            weather_latency=args.weather_latency,
+            only=args.only,
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    report = {
+        "meta": {
+            "commit": get_commit(),
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "shipments": args.shipments,
+            "weather_latency": args.weather_latency,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
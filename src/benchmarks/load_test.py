@@ -0,0 +1,172 @@
+"""
+Load test of a running server under upstream latency, run from the src
+directory. Start a fake WeatherBit answering after a delay:
+
+    python -m benchmarks.load_test upstream --port 8100 --latency 0.2
+
+Point the server at it (DJANGO_WEATHER_API_URL=http://127.0.0.1:8100/)
+and send concurrent requests, {n} in the URL is replaced with the request
+number so every request misses the weather cache:
+
+    URL=http://127.0.0.1:8000/api/v1/weather/get-weather/
+    python -m benchmarks.load_test run --concurrency 64 --requests 1000 \\
+        --url "$URL?postal_code={n}&country=DE"
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+import httpx
+
+
+WEATHER_RESPONSE = json.dumps(
+    {"data": [{"temp": 21, "weather": {"code": 800}}]}
+).encode()
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def serve_upstream(port: int, latency: float) -> None:
+    """
+    Serves canned WeatherBit responses after the given latency in seconds,
+    one thread per connection so slow responses overlap
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(WEATHER_RESPONSE)))
+            self.end_headers()
+            self.wfile.write(WEATHER_RESPONSE)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    print(f"Fake WeatherBit on http://127.0.0.1:{port}/, {latency}s latency")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+async def load(
+    url: str,
+    requests: int,
+    concurrency: int,
+    timeout: float,
+    headers: Optional[dict[str, str]] = None,
+) -> dict[str, Any]:
+    """
+    Sends the requests from a fixed number of concurrent clients,
+    returns the throughput and latency percentiles
+    """
+    counter = iter(range(requests))
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+
+    async def client(session: httpx.AsyncClient) -> None:
+        for n in counter:
+            start = time.perf_counter()
+            try:
+                response = await session.get(
+                    url.replace("{n}", str(n)), headers=headers
+                )
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            else:
+                if response.status_code < 400:
+                    latencies.append(time.perf_counter() - start)
+                    continue
+                error = str(response.status_code)
+            errors[error] = errors.get(error, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        limits=limits, timeout=httpx.Timeout(timeout)
+    ) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result: dict[str, Any] = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_sec": round(elapsed, 3),
+        "req_per_sec": round(len(latencies) / elapsed, 2),
+        "errors": errors,
+    }
+    if latencies:
+        result["latency_ms"] = {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upstream = commands.add_parser("upstream", help="Run a fake WeatherBit")
+    upstream.add_argument("--port", type=int, default=8100)
+    upstream.add_argument(
+        "--latency",
+        type=float,
+        default=0.2,
+        help="Seconds every weather call takes",
+    )
+
+    run = commands.add_parser("run", help="Load a running server")
+    run.add_argument("--url", required=True)
+    run.add_argument("--requests", type=int, default=1000)
+    run.add_argument("--concurrency", type=int, default=64)
+    run.add_argument("--timeout", type=float, default=30.0)
+    run.add_argument(
+        "--header",
+        action="append",
+        default=[],
+        help='Request header as "Name: value", can be repeated',
+    )
+    args = parser.parse_args()
+
+    if args.command == "upstream":
+        serve_upstream(args.port, args.latency)
+        return
+
+    headers = dict(
+        (name.strip(), value.strip())
+        for name, value in (header.split(":", 1) for header in args.header)
+    )
+    result = asyncio.run(
+        load(
+            args.url,
+            args.requests,
+            args.concurrency,
+            args.timeout,
+            headers,
+        )
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+import logging
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from itertools import cycle
+from typing import Any, NamedTuple, Optional, cast
+from unittest.mock import patch
+
+import httpx
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+
+from backend.middleware.request_log import RequestLogMiddleware
+from parcel.models import Address, Article, UserShipment
+from parcel.serializers import UserShipmentSerializer
+from utils.authentication import CachedTokenAuthentication
+from utils.cache_utils import local_cache
+from utils.helpers import CustomPagination
+from utils.renderers import ORJSONRenderer
+
+
+UserModel = get_user_model()
+
+API_PREFIX = "/api/v1"
+# Iterations profiled for query counts and allocations,
+# kept apart from the timed ones as tracing slows requests down
+PROFILE_ITERATIONS = 20
+
+
+@dataclass
+class BenchmarkContext:
+    client: Client
+    user: AbstractBaseUser
+    shipment: UserShipment
+    authorization: str = ""
+
+    def get(self, path: str, **params: str) -> Any:
+        response = self.client.get(
+            f"{API_PREFIX}{path}",
+            params,
+            HTTP_ACCEPT="application/json",
+            HTTP_AUTHORIZATION=self.authorization,
+        )
+        if response.status_code >= 400:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+        return response
+
+
+class Scenario(NamedTuple):
+    run: Callable[[], Any]
+    # runs before every iteration, excluded from the measurements
+    setup: Optional[Callable[[], None]] = None
+
+
+ScenarioFactory = Callable[[BenchmarkContext], Scenario]
+
+SCENARIOS: dict[str, ScenarioFactory] = {}
+
+
+def scenario(name: str) -> Callable[[ScenarioFactory], ScenarioFactory]:
+    """
+    Registers a benchmark scenario factory under the given name
+    """
+
+    def decorator(factory: ScenarioFactory) -> ScenarioFactory:
+        SCENARIOS[name] = factory
+        return factory
+
+    return decorator
+
+
+def clear_cache() -> None:
+    cache.clear()
+    local_cache.clear()
+
+
+@scenario("user_shipments_list")
+def user_shipments_list(context: BenchmarkContext) -> Scenario:
+    return Scenario(lambda: context.get("/parcel/user-shipments/"))
+
+
+@scenario("user_shipments_list_expand")
+def user_shipments_list_expand(context: BenchmarkContext) -> Scenario:
+    return Scenario(
+        lambda: context.get(
+            "/parcel/user-shipments/",
+            expand="article,sender_address,receiver_address",
+        )
+    )
+
+
+@scenario("user_shipments_list_keyset")
+def user_shipments_list_keyset(context: BenchmarkContext) -> Scenario:
+    return Scenario(lambda: context.get("/parcel/user-shipments/", cursor=""))
+
+
+SERIALIZED_FIELDS = {
+    "expand": ["article", "sender_address", "receiver_address"],
+    "omit": ["receiver_weather"],
+}
+
+
+def get_serialized_shipments(context: BenchmarkContext) -> list[UserShipment]:
+    queryset = cast(
+        QuerySet[UserShipment],
+        UserShipment.objects.filter(user=context.user)
+        .select_related(*SERIALIZED_FIELDS["expand"])
+        .order_by("-timestamp", "-id"),
+    )
+    return list(queryset[: CustomPagination.max_page_size])
+
+
+@scenario("serialize_shipments")
+def serialize_shipments(context: BenchmarkContext) -> Scenario:
+    """
+    Serializes a full page of expanded shipments through
+    the planned list serializer, without the request overhead
+    """
+    shipments = get_serialized_shipments(context)
+    return Scenario(
+        lambda: UserShipmentSerializer(
+            shipments, many=True, **SERIALIZED_FIELDS
+        ).data
+    )
+
+
+@scenario("serialize_shipments_drf")
+def serialize_shipments_drf(context: BenchmarkContext) -> Scenario:
+    """
+    Baseline of serialize_shipments, rendering every row through
+    the DRF field machinery
+    """
+    shipments = get_serialized_shipments(context)
+    return Scenario(
+        lambda: ListSerializer(
+            shipments, child=UserShipmentSerializer(**SERIALIZED_FIELDS)
+        ).data
+    )
+
+
+@scenario("render_shipments")
+def render_shipments(context: BenchmarkContext) -> Scenario:
+    """
+    serialize_shipments plus rendering with the configured JSON renderer
+    """
+    serialize = serialize_shipments(context).run
+    return Scenario(lambda: ORJSONRenderer().render(serialize()))
+
+
+@scenario("render_shipments_drf")
+def render_shipments_drf(context: BenchmarkContext) -> Scenario:
+    """
+    Baseline of render_shipments, DRF serialization and JSONRenderer
+    """
+    serialize = serialize_shipments_drf(context).run
+    return Scenario(lambda: JSONRenderer().render(serialize()))
+
+
+@scenario("user_shipments_detail")
+def user_shipments_detail(context: BenchmarkContext) -> Scenario:
+    path = f"/parcel/user-shipments/{context.shipment.pk}/"
+    return Scenario(lambda: context.get(path))
+
+
+@scenario("addresses_list")
+def addresses_list(context: BenchmarkContext) -> Scenario:
+    return Scenario(lambda: context.get("/parcel/addresses/"))
+
+
+@scenario("articles_list")
+def articles_list(context: BenchmarkContext) -> Scenario:
+    return Scenario(lambda: context.get("/parcel/articles/"))
+
+
+@scenario("get_weather")
+def get_weather(context: BenchmarkContext) -> Scenario:
+    return Scenario(
+        lambda: context.get(
+            "/weather/get-weather/", postal_code="10115", country="DE"
+        )
+    )
+
+
+@scenario("get_weather_uncached")
+def get_weather_uncached(context: BenchmarkContext) -> Scenario:
+    return Scenario(get_weather(context).run, setup=clear_cache)
+
+
+@scenario("authenticate_token")
+def authenticate_token(context: BenchmarkContext) -> Scenario:
+    """
+    Auth overhead of a request with the configured cached
+    token authentication, without the rest of the request
+    """
+    request = RequestFactory().get(
+        "/", HTTP_AUTHORIZATION=context.authorization
+    )
+    return Scenario(lambda: CachedTokenAuthentication().authenticate(request))
+
+
+@scenario("authenticate_token_drf")
+def authenticate_token_drf(context: BenchmarkContext) -> Scenario:
+    """
+    Baseline of authenticate_token, querying the token on every request
+    """
+    request = RequestFactory().get(
+        "/", HTTP_AUTHORIZATION=context.authorization
+    )
+    return Scenario(lambda: TokenAuthentication().authenticate(request))
+
+
+def get_request_log_scenario(
+    logger: Optional[logging.Logger] = None,
+) -> Scenario:
+    middleware = RequestLogMiddleware(lambda request: HttpResponse())
+    if logger is not None:
+        middleware.logger = logger
+    request = RequestFactory().get(f"{API_PREFIX}/parcel/user-shipments/")
+    return Scenario(lambda: middleware(request))
+
+
+@scenario("request_log_middleware")
+def request_log_middleware(_context: BenchmarkContext) -> Scenario:
+    """
+    Overhead of RequestLogMiddleware per request, the records
+    are shipped by the queue listener of the "main" logger
+    """
+    return get_request_log_scenario()
+
+
+@scenario("request_log_middleware_direct")
+def request_log_middleware_direct(_context: BenchmarkContext) -> Scenario:
+    """
+    Baseline of request_log_middleware, the records are written
+    to the file and console handlers by the request thread
+    """
+    logger = logging.getLogger("benchmarks.request_log")
+    if not logger.handlers:
+        for handler in RequestLogMiddleware.logger.handlers:
+            for target in getattr(handler, "handlers", [handler]):
+                logger.addHandler(target)
+        logger.setLevel(RequestLogMiddleware.logger.getEffectiveLevel())
+        logger.propagate = False
+    return get_request_log_scenario(logger)
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def measure(current: Scenario, iterations: int, warmup: int) -> dict[str, Any]:
+    """
+    Times the scenario, then profiles a few more iterations
+    for database queries and memory allocations
+    """
+    for _ in range(warmup):
+        if current.setup:
+            current.setup()
+        current.run()
+
+    latencies = []
+    for _ in range(iterations):
+        if current.setup:
+            current.setup()
+        start = time.perf_counter()
+        current.run()
+        latencies.append(time.perf_counter() - start)
+
+    queries = []
+    peak_allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(min(iterations, PROFILE_ITERATIONS)):
+            if current.setup:
+                current.setup()
+            tracemalloc.reset_peak()
+            start_size, _ = tracemalloc.get_traced_memory()
+            with CaptureQueriesContext(connection) as captured:
+                current.run()
+            _, peak_size = tracemalloc.get_traced_memory()
+            queries.append(len(captured))
+            peak_allocations.append(peak_size - start_size)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "req_per_sec": round(len(latencies) / sum(latencies), 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        },
+        "queries": max(queries),
+        "peak_alloc_kib": round(statistics.median(peak_allocations) / 1024, 1),
+    }
+
+
+@contextmanager
+def mock_weatherbit(latency: float) -> Iterator[None]:
+    """
+    Replaces WeatherBit calls with a canned response
+    delivered after the given latency in seconds
+    """
+
+    def fake_get(_client: httpx.Client, url: str, **_: Any) -> httpx.Response:
+        time.sleep(latency)
+        return httpx.Response(
+            200,
+            json={"data": [{"temp": 21, "weather": {"code": 800}}]},
+            request=httpx.Request("GET", url),
+        )
+
+    with patch("httpx.Client.get", autospec=True, side_effect=fake_get):
+        yield
+
+
+def seed(shipments: int) -> BenchmarkContext:
+    """
+    Seeds a user owning the given number of shipments,
+    which share a pool of addresses and articles
+    """
+    now = timezone.now()
+    user = baker.make(UserModel)
+    addresses: list[Address] = baker.make(
+        Address,
+        timestamp=now,
+        _quantity=max(shipments // 10, 1),
+        _bulk_create=True,
+    )
+    articles: list[Article] = baker.make(
+        Article,
+        timestamp=now,
+        _quantity=max(shipments // 10, 1),
+        _bulk_create=True,
+    )
+    user_shipments: list[UserShipment] = baker.make(
+        UserShipment,
+        timestamp=now,
+        user=user,
+        article=cycle(articles),
+        sender_address=cycle(addresses),
+        receiver_address=cycle(reversed(addresses)),
+        _quantity=shipments,
+        _bulk_create=True,
+    )
+    token, _ = Token.objects.get_or_create(user=user)
+    return BenchmarkContext(
+        client=Client(),
+        user=user,
+        shipment=user_shipments[0],
+        authorization=f"Token {token.key}",
+    )
+
+
+def run_benchmarks(
+    shipments: int = 500,
+    iterations: int = 200,
+    warmup: int = 10,
+    weather_latency: float = 0.05,
+    only: Optional[list[str]] = None,
+) -> list[dict[str, Any]]:
+    """
+    Seeds the current database and runs the selected scenarios
+    """
+    context = seed(shipments)
+    results = []
+    with mock_weatherbit(weather_latency):
+        try:
+            for name, factory in SCENARIOS.items():
+                if only and not any(fnmatch(name, p) for p in only):
+                    continue
+                clear_cache()
+                results.append(
+                    {"name": name}
+                    | measure(factory(context), iterations, warmup)
+                )
+        finally:
+            clear_cache()
+    return results
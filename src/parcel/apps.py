@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GeneralConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "parcel"
+
+    def ready(self) -> None:
+        # pylint: disable=import-outside-toplevel,unused-import
+        from parcel import signals  # noqa: F401
@@ -1,20 +1,60 @@
 import csv
-from decimal import Decimal
+import time
+from collections.abc import Iterator
 from typing import Any
 
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.management.base import BaseCommand, CommandParser
 
-from parcel.models import Address, Article, UserShipment
+from parcel.services.shipment_import import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_RANGE_SIZE,
+    ParallelShipmentImport,
+    ShipmentImporter,
+)
 
 
 # Create a custom management command to encapsulate the population logic
 class Command(BaseCommand):
     help = "Populate the database with shipment data from CSV."
 
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "filepath",
+            nargs="?",
+            default="src/resources/shipment_data.csv",
+            help="Path to the shipment CSV file",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Rows imported per transaction",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Import byte ranges of the file in parallel processes",
+        )
+        parser.add_argument(
+            "--range-size",
+            type=int,
+            default=DEFAULT_RANGE_SIZE,
+            help="Bytes of the file imported by a single worker",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file path, defaults to <filepath>.checkpoint",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the ranges imported by an interrupted parallel run",
+        )
+
     def handle(self, *args: Any, **options: Any) -> None:
-        filepath = "src/resources/shipment_data.csv"
         user_model = get_user_model()
 
         # Assuming all shipments are for the same user for simplicity
@@ -25,58 +65,43 @@ class Command(BaseCommand):
             )
             return
 
-        with open(filepath, encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            with transaction.atomic():
-                for row in reader:
-                    tracking_number = row["tracking_number"]
-                    carrier = row["carrier"]
-                    sender_address = self.get_or_create_address(
-                        row["sender_address"]
-                    )
-                    receiver_address = self.get_or_create_address(
-                        row["receiver_address"]
-                    )
-                    article = self.get_or_create_article(
-                        row["article_name"],
-                        row["article_price"],
-                        row["SKU"],
-                    )
-                    status = row["status"]
-
-                    shipment = UserShipment(
-                        user=user,
-                        article=article,
-                        article_quantity=row["article_quantity"],
-                        tracking_number=tracking_number,
-                        carrier=carrier,
-                        status=status,
-                        sender_address=sender_address,
-                        receiver_address=receiver_address,
-                    )
-                    shipment.save()
-                self.stdout.write(
-                    self.style.SUCCESS("Database populated successfully.")
-                )
+        imported = 0
+        start_time = time.monotonic()
+        for rows in self.import_rows(user, options):
+            imported += rows
+            self.stdout.write(
+                f"{imported} rows imported "
+                f"({self.rate(imported, start_time):.0f} rows/sec)"
+            )
 
-    def get_or_create_address(self, address_str: str) -> Address:
-        street, postal_code, city, country = map(
-            str.strip, address_str.split(",")
-        )
-        address, _ = Address.objects.get_or_create(
-            street=street,
-            city=city,
-            country=country,
-            postal_code=postal_code,
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Database populated successfully: {imported} rows in "
+                f"{time.monotonic() - start_time:.2f}s "
+                f"({self.rate(imported, start_time):.0f} rows/sec)."
+            )
         )
-        return address
 
-    def get_or_create_article(
-        self, name: str, price: str, sku: str
-    ) -> Article:
-        article, _ = Article.objects.get_or_create(
-            name=name,
-            price=Decimal(price),
-            sku=sku,
-        )
-        return article
+    @staticmethod
+    def import_rows(
+        user: AbstractBaseUser, options: dict[str, Any]
+    ) -> Iterator[int]:
+        if options["workers"] > 1 or options["resume"]:
+            yield from ParallelShipmentImport(
+                options["filepath"],
+                user,
+                workers=options["workers"],
+                range_size=options["range_size"],
+                chunk_size=options["chunk_size"],
+                checkpoint_path=options["checkpoint"],
+            ).run(resume=options["resume"])
+            return
+
+        importer = ShipmentImporter(user, chunk_size=options["chunk_size"])
+        with open(options["filepath"], encoding="utf-8", newline="") as f:
+            yield from importer.import_rows(csv.DictReader(f))
+
+    @staticmethod
+    def rate(rows: int, start_time: float) -> float:
+        elapsed = time.monotonic() - start_time
+        return rows / elapsed if elapsed else 0.0
@@ -0,0 +1,63 @@
+# Generated by Django 5.1 on 2026-10-18 08:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parcel", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="address",
+            index=models.Index(
+                condition=models.Q(("trashed", False)),
+                fields=["-timestamp", "-id"],
+                name="address_live_ts_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="article",
+            index=models.Index(
+                condition=models.Q(("trashed", False)),
+                fields=["-timestamp", "-id"],
+                name="article_live_ts_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usershipment",
+            index=models.Index(
+                condition=models.Q(("trashed", False)),
+                fields=["user", "-timestamp", "-id"],
+                name="shipment_live_user_ts_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usershipment",
+            index=models.Index(
+                condition=models.Q(("trashed", False)),
+                fields=["user", "status"],
+                name="shipment_live_user_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usershipment",
+            index=models.Index(
+                condition=models.Q(("trashed", False)),
+                fields=["tracking_number", "user"],
+                name="shipment_live_tracking_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usershipment",
+            index=models.Index(
+                condition=models.Q(("trashed", False)),
+                fields=["-timestamp", "-id"],
+                name="shipment_live_ts_idx",
+            ),
+        ),
+    ]
@@ -1,3 +1,6 @@
+from typing import Any, Optional
+from uuid import UUID
+
 from django.contrib.auth import get_user_model
 from django.db.models import (
     CASCADE,
@@ -5,7 +8,9 @@ from django.db.models import (
     CharField,
     DecimalField,
     ForeignKey,
+    Index,
     PositiveSmallIntegerField,
+    Q,
     TextChoices,
 )
 
@@ -21,8 +26,17 @@ class Address(BaseHistory):
     country = CharField(max_length=100)
     postal_code = CharField(max_length=100)
 
+    cache_generation = True
+
     class Meta:
         verbose_name_plural = "Addresses"
+        indexes = [
+            Index(
+                fields=["-timestamp", "-id"],
+                name="address_live_ts_idx",
+                condition=Q(trashed=False),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.street} {self.postal_code}, {self.city}, {self.country}"
@@ -33,11 +47,20 @@ class Article(BaseHistory):
     price = DecimalField(max_digits=10, decimal_places=2)
     sku = CharField(max_length=30)
 
+    cache_generation = True
+
     def __str__(self) -> str:
         return self.name
 
     class Meta:
         verbose_name_plural = "Articles"
+        indexes = [
+            Index(
+                fields=["-timestamp", "-id"],
+                name="article_live_ts_idx",
+                condition=Q(trashed=False),
+            ),
+        ]
 
 
 class UserShipment(BaseHistory):
@@ -56,6 +79,10 @@ class UserShipment(BaseHistory):
         TRANSIT = "transit", "In Transit"
         SCANNED = "scanned", "Scanned"
 
+    loaded_tracking_number: Optional[str] = None
+    # set by Django, declared for the type checker
+    article_id: UUID
+
     user = ForeignKey(UserModel, on_delete=CASCADE)
     article = ForeignKey(Article, on_delete=PROTECT)
     article_quantity = PositiveSmallIntegerField(default=1)
@@ -75,6 +102,41 @@ class UserShipment(BaseHistory):
 
     class Meta:
         verbose_name_plural = "User Shipments"
+        # partial indexes matching the trashed=False filter of BaseManager,
+        # tracking numbers are looked up with and without the owner
+        indexes = [
+            Index(
+                fields=["user", "-timestamp", "-id"],
+                name="shipment_live_user_ts_idx",
+                condition=Q(trashed=False),
+            ),
+            Index(
+                fields=["user", "status"],
+                name="shipment_live_user_status_idx",
+                condition=Q(trashed=False),
+            ),
+            Index(
+                fields=["tracking_number", "user"],
+                name="shipment_live_tracking_idx",
+                condition=Q(trashed=False),
+            ),
+            Index(
+                fields=["-timestamp", "-id"],
+                name="shipment_live_ts_idx",
+                condition=Q(trashed=False),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user}: {self.tracking_number} - {self.status}"
+
+    @classmethod
+    def from_db(
+        cls, db: Optional[str], field_names: Any, values: Any
+    ) -> "UserShipment":
+        instance = super().from_db(db, field_names, values)
+        # remembered to invalidate the old number's cache when it changes
+        instance.loaded_tracking_number = instance.__dict__.get(
+            "tracking_number"
+        )
+        return instance
@@ -1,9 +1,19 @@
+from collections.abc import Iterable
+from typing import Any, Optional
+
+from django.db.models import Manager
 from rest_flex_fields import FlexFieldsModelSerializer
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from parcel.models import Address, Article, UserShipment
-from weather.services.weather_api import get_weather
+from utils.serializers import PlannedListSerializer, get_readable_fields
+from weather.services.weather_api import (
+    WeatherLocation,
+    aget_weather_bulk,
+    get_weather,
+    get_weather_bulk,
+)
 
 
 class AddressSerializer(FlexFieldsModelSerializer):
@@ -17,6 +27,7 @@ class AddressSerializer(FlexFieldsModelSerializer):
             "country",
             "postal_code",
         ]
+        list_serializer_class = PlannedListSerializer
 
 
 class ArticleSerializer(FlexFieldsModelSerializer):
@@ -29,6 +40,63 @@ class ArticleSerializer(FlexFieldsModelSerializer):
             "price",
             "sku",
         ]
+        list_serializer_class = PlannedListSerializer
+
+
+WEATHER_ERROR = {"error": "Error in getting weather data"}
+
+
+class UserShipmentListSerializer(  # pylint: disable=W0223
+    PlannedListSerializer
+):
+    """
+    List serializer resolving the receiver weather of the whole list
+    at once instead of once per row
+    """
+
+    receiver_weather: Optional[
+        dict[WeatherLocation, Optional[dict[str, Any]]]
+    ] = None
+
+    def to_representation(self, data: Any) -> list[Any]:
+        shipments = list(data.all() if isinstance(data, Manager) else data)
+        if self.receiver_weather is None and self._renders_receiver_weather():
+            self.receiver_weather = get_weather_bulk(
+                self._get_receiver_locations(shipments)
+            )
+        return super().to_representation(shipments)
+
+    async def aresolve_receiver_weather(self) -> None:
+        """
+        Resolves the receiver weather with the async weather client,
+        so async views can await it before rendering the data.
+        The instance has to be an already evaluated list of shipments.
+        """
+        if self._renders_receiver_weather():
+            self.receiver_weather = await aget_weather_bulk(
+                self._get_receiver_locations(self.instance or [])
+            )
+
+    @staticmethod
+    def _get_receiver_locations(
+        shipments: Iterable[UserShipment],
+    ) -> list[WeatherLocation]:
+        return [
+            (
+                shipment.receiver_address.postal_code,
+                shipment.receiver_address.country,
+            )
+            for shipment in shipments
+        ]
+
+    def _renders_receiver_weather(self) -> bool:
+        # fields/omit query params are applied lazily by flex fields on the
+        # first row, apply them upfront to know if the weather is requested
+        child: Any = self.child
+        return any(
+            field.field_name == "receiver_weather"
+            for field in get_readable_fields(child)
+        )
 
 
 class UserShipmentSerializer(FlexFieldsModelSerializer):
@@ -55,11 +123,22 @@ class UserShipmentSerializer(FlexFieldsModelSerializer):
             "sender_address": AddressSerializer,
             "receiver_address": AddressSerializer,
         }
+        list_serializer_class = UserShipmentListSerializer
 
     def get_receiver_weather(self, obj: UserShipment) -> dict[str, str]:
-        try:
-            return get_weather(
-                obj.receiver_address.postal_code, obj.receiver_address.country
-            ).get("data")
-        except ValidationError:
-            return {"error": "Error in getting weather data"}
+        location = (
+            obj.receiver_address.postal_code,
+            obj.receiver_address.country,
+        )
+        resolved = getattr(self.parent, "receiver_weather", None)
+        if resolved is not None:
+            weather_data = resolved.get(location)
+        else:
+            try:
+                weather_data = get_weather(*location)
+            except ValidationError:
+                weather_data = None
+
+        if weather_data is None:
+            return dict(WEATHER_ERROR)
+        return weather_data.get("data")
@@ -0,0 +1,106 @@
+import csv
+import json
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from itertools import islice
+from typing import Any
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+from parcel.models import UserShipment
+
+
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+# Same fields as the list endpoint, relations as ids
+EXPORT_FIELDS = [
+    "id",
+    "timestamp",
+    "user",
+    "article",
+    "article_quantity",
+    "tracking_number",
+    "carrier",
+    "status",
+    "sender_address",
+    "receiver_address",
+]
+
+
+class Echo:
+    """
+    File-like object returning what is written,
+    lets csv.writer produce lines for a streamed response
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_export_rows(
+    queryset: QuerySet[UserShipment],
+    chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yields the shipments as plain dicts, fetched chunk by chunk
+    through a server-side cursor where the database supports it
+    """
+    return (
+        queryset.order_by("-timestamp", "-id")
+        .values(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def format_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def stream_ndjson(rows: Iterator[dict[str, Any]]) -> Iterator[bytes]:
+    for row in rows:
+        line = json.dumps(row, default=format_value, separators=(",", ":"))
+        yield f"{line}\n".encode()
+
+
+def stream_csv(rows: Iterator[dict[str, Any]]) -> Iterator[bytes]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS).encode()
+    for row in rows:
+        yield writer.writerow(
+            [format_value(row[field]) for field in EXPORT_FIELDS]
+        ).encode()
+
+
+EXPORT_STREAMS = {"ndjson": stream_ndjson, "csv": stream_csv}
+
+
+def stream_export(
+    queryset: QuerySet[UserShipment],
+    export_format: str,
+    chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    return EXPORT_STREAMS[export_format](
+        iter_export_rows(queryset, chunk_size)
+    )
+
+
+async def astream_export(
+    queryset: QuerySet[UserShipment],
+    export_format: str,
+    chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Async version of stream_export for the ASGI deployment mode,
+    every chunk of lines is read in a thread and sent joined, so
+    the export is never held in memory as a whole
+    """
+    lines = stream_export(queryset, export_format, chunk_size)
+    # always the same thread, the cursor lives on its connection
+    read_chunk = sync_to_async(lambda: list(islice(lines, chunk_size)))
+    while chunk := await read_chunk():
+        yield b"".join(chunk)
@@ -0,0 +1,543 @@
+# mypy: disable-error-code="import-untyped"
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from decimal import Decimal
+from itertools import islice
+from typing import Any, BinaryIO, Generic, NamedTuple, Optional, TypeVar, cast
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from simple_history.utils import (
+    bulk_create_with_history,
+    bulk_update_with_history,
+)
+
+from parcel.models import Address, Article, UserShipment
+from utils.cache_utils import delete_cached_tracking
+
+
+logger = logging.getLogger("main")
+
+DEFAULT_CHUNK_SIZE = 1000
+# Max addresses and articles remembered between chunks
+DEFAULT_LOOKUP_CACHE_SIZE = 100_000
+# Bytes of CSV handed to a single worker of a parallel import
+DEFAULT_RANGE_SIZE = 64 * 1024 * 1024
+
+# Fields refreshed when an imported row matches an existing shipment
+UPSERT_FIELDS = [
+    "timestamp",
+    "article_quantity",
+    "carrier",
+    "status",
+    "sender_address",
+    "receiver_address",
+]
+
+# Advisory lock classes of the keys imported by concurrent workers,
+# a chunk locks them in this order
+ADDRESS_LOCK = 1
+ARTICLE_LOCK = 2
+SHIPMENT_LOCK = 3
+
+# (street, postal_code, city, country)
+AddressKey = tuple[str, str, str, str]
+# (name, price, sku)
+ArticleKey = tuple[str, Decimal, str]
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class BoundedLookup(Generic[K, V]):
+    """
+    LRU mapping with a fixed size, keeps memory flat on large imports
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._items: OrderedDict[K, V] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+
+def parse_address(address_str: str) -> AddressKey:
+    street, postal_code, city, country = map(str.strip, address_str.split(","))
+    return street, postal_code, city, country
+
+
+def parse_article(row: dict[str, str]) -> ArticleKey:
+    return row["article_name"], Decimal(row["article_price"]), row["SKU"]
+
+
+def lock_keys(lock_class: int, keys: Iterable[tuple[Any, ...]]) -> None:
+    """
+    Holds the keys until the end of the transaction, so concurrent
+    imports looking up and creating the same rows run one after another.
+
+    PostgreSQL takes advisory locks, sorted to keep workers from
+    deadlocking. SQLite only has a lock of the whole database for
+    writing, taken with a write changing nothing: a transaction reading
+    before it writes fails with "database is locked" once another one
+    wrote meanwhile, instead of waiting for it.
+    """
+    connection = transaction.get_connection()
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {Address._meta.db_table} WHERE 0")
+        return
+    if connection.vendor != "postgresql":
+        return
+    lock_ids = sorted(
+        {zlib.crc32("|".join(map(str, key)).encode()) - 2**31 for key in keys}
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, lock_id) "
+            "FROM (SELECT unnest(%s::int[]) AS lock_id ORDER BY 1) AS ids",
+            [lock_class, lock_ids],
+        )
+
+
+class ShipmentImporter:
+    """
+    Streams shipment CSV rows into the database in chunks.
+
+    Every chunk runs in its own transaction: addresses and articles are
+    deduplicated in memory, the missing ones are created with a single
+    bulk insert per model, followed by one bulk insert of the shipments.
+    History records are bulk created along with them.
+
+    With upsert enabled, rows matching an existing shipment of the user
+    on (tracking_number, article) update it instead of adding a new one,
+    which makes importing the same rows again idempotent.
+
+    The looked up keys are locked for the transaction of the chunk,
+    workers of a parallel import never create the same row twice.
+    """
+
+    def __init__(
+        self,
+        user: AbstractBaseUser,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        lookup_cache_size: int = DEFAULT_LOOKUP_CACHE_SIZE,
+        upsert: bool = False,
+    ) -> None:
+        self.user = user
+        self.chunk_size = chunk_size
+        self.upsert = upsert
+        self._addresses: BoundedLookup[AddressKey, Address] = BoundedLookup(
+            lookup_cache_size
+        )
+        self._articles: BoundedLookup[ArticleKey, Article] = BoundedLookup(
+            lookup_cache_size
+        )
+
+    def import_rows(self, rows: Iterable[dict[str, str]]) -> Iterator[int]:
+        """
+        Imports the rows chunk by chunk,
+        yields the number of rows imported with every chunk
+        """
+        iterator = iter(rows)
+        while chunk := list(islice(iterator, self.chunk_size)):
+            yield self.import_chunk(chunk)
+
+    def import_chunk(self, chunk: list[dict[str, str]]) -> int:
+        with transaction.atomic():
+            addresses = self.resolve_addresses(
+                [parse_address(row["sender_address"]) for row in chunk]
+                + [parse_address(row["receiver_address"]) for row in chunk]
+            )
+            articles = self.resolve_articles(
+                [parse_article(row) for row in chunk]
+            )
+            now = timezone.now()
+            shipments = [
+                UserShipment(
+                    timestamp=now,
+                    user=self.user,
+                    article=articles[parse_article(row)],
+                    article_quantity=int(row["article_quantity"]),
+                    tracking_number=row["tracking_number"],
+                    carrier=row["carrier"],
+                    status=row["status"],
+                    sender_address=addresses[
+                        parse_address(row["sender_address"])
+                    ],
+                    receiver_address=addresses[
+                        parse_address(row["receiver_address"])
+                    ],
+                )
+                for row in chunk
+            ]
+            if self.upsert:
+                shipments = self.update_existing(shipments)
+            bulk_create_with_history(shipments, UserShipment)
+        # bulk queries skip the signals dropping the cached tracking data
+        delete_cached_tracking(*{row["tracking_number"] for row in chunk})
+        return len(chunk)
+
+    def update_existing(
+        self, shipments: list[UserShipment]
+    ) -> list[UserShipment]:
+        """
+        Updates the shipments already stored for the user,
+        returns the ones which still have to be created
+        """
+        # The last row wins when a chunk holds the same shipment twice
+        pending = {
+            (shipment.tracking_number, shipment.article_id): shipment
+            for shipment in shipments
+        }
+        lock_keys(
+            SHIPMENT_LOCK,
+            [(self.user.pk, *key) for key in pending],
+        )
+        existing = cast(
+            QuerySet[UserShipment],
+            UserShipment.objects.filter(
+                user=self.user,
+                tracking_number__in={key[0] for key in pending},
+                article__in={key[1] for key in pending},
+            ).order_by("pk"),
+        )
+        updated = []
+        for shipment in existing:
+            row = pending.pop(
+                (shipment.tracking_number, shipment.article_id), None
+            )
+            if row is None:
+                continue
+            for field in UPSERT_FIELDS:
+                setattr(shipment, field, getattr(row, field))
+            updated.append(shipment)
+
+        if updated:
+            bulk_update_with_history(updated, UserShipment, UPSERT_FIELDS)
+        return list(pending.values())
+
+    def resolve_addresses(
+        self, keys: list[AddressKey]
+    ) -> dict[AddressKey, Address]:
+        resolved: dict[AddressKey, Address] = {}
+        for key in dict.fromkeys(keys):
+            cached = self._addresses.get(key)
+            if cached is not None:
+                resolved[key] = cached
+        missing = {key for key in keys if key not in resolved}
+        if not missing:
+            return resolved
+
+        lock_keys(ADDRESS_LOCK, missing)
+        # the same one of duplicates wins on every import
+        existing = cast(
+            QuerySet[Address],
+            Address.objects.filter(
+                street__in={key[0] for key in missing},
+                postal_code__in={key[1] for key in missing},
+            ).order_by("pk"),
+        )
+        for address in existing:
+            key = (
+                address.street,
+                address.postal_code,
+                address.city,
+                address.country,
+            )
+            if key in missing:
+                resolved.setdefault(key, address)
+
+        now = timezone.now()
+        created: list[Address] = bulk_create_with_history(
+            [
+                Address(
+                    timestamp=now,
+                    street=street,
+                    postal_code=postal_code,
+                    city=city,
+                    country=country,
+                )
+                for street, postal_code, city, country in missing
+                if (street, postal_code, city, country) not in resolved
+            ],
+            Address,
+        )
+        if created:
+            # bulk queries skip save(), which outdates the cached responses
+            Address.bump_generation()
+        for address in created:
+            resolved[
+                (
+                    address.street,
+                    address.postal_code,
+                    address.city,
+                    address.country,
+                )
+            ] = address
+
+        for key in missing:
+            self._addresses.set(key, resolved[key])
+        return resolved
+
+    def resolve_articles(
+        self, keys: list[ArticleKey]
+    ) -> dict[ArticleKey, Article]:
+        resolved: dict[ArticleKey, Article] = {}
+        for key in dict.fromkeys(keys):
+            cached = self._articles.get(key)
+            if cached is not None:
+                resolved[key] = cached
+        missing = {key for key in keys if key not in resolved}
+        if not missing:
+            return resolved
+
+        lock_keys(ARTICLE_LOCK, missing)
+        existing = cast(
+            QuerySet[Article],
+            Article.objects.filter(
+                name__in={key[0] for key in missing},
+                sku__in={key[2] for key in missing},
+            ).order_by("pk"),
+        )
+        for article in existing:
+            key = (article.name, article.price, article.sku)
+            if key in missing:
+                resolved.setdefault(key, article)
+
+        now = timezone.now()
+        created: list[Article] = bulk_create_with_history(
+            [
+                Article(timestamp=now, name=name, price=price, sku=sku)
+                for name, price, sku in missing
+                if (name, price, sku) not in resolved
+            ],
+            Article,
+        )
+        if created:
+            Article.bump_generation()
+        for article in created:
+            resolved[(article.name, article.price, article.sku)] = article
+
+        for key in missing:
+            self._articles.set(key, resolved[key])
+        return resolved
+
+
+class ByteRange(NamedTuple):
+    start: int
+    end: int
+
+
+def split_byte_ranges(
+    filepath: str, range_size: int = DEFAULT_RANGE_SIZE
+) -> tuple[list[str], list[ByteRange]]:
+    """
+    Reads the CSV header and splits the rest of the file
+    into byte ranges aligned to line boundaries.
+
+    Rows must not contain line breaks inside quoted values.
+    """
+    with open(filepath, "rb") as f:
+        fieldnames = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        size = os.fstat(f.fileno()).st_size
+        ranges = []
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + range_size, size))
+            f.readline()
+            ranges.append(ByteRange(start, f.tell()))
+            start = f.tell()
+    return fieldnames, ranges
+
+
+def _read_lines(f: BinaryIO, end: int) -> Iterator[str]:
+    while f.tell() < end and (line := f.readline()):
+        yield line.decode("utf-8")
+
+
+def read_byte_range(
+    filepath: str, fieldnames: list[str], byte_range: ByteRange
+) -> Iterator[dict[str, str]]:
+    with open(filepath, "rb") as f:
+        f.seek(byte_range.start)
+        yield from csv.DictReader(
+            _read_lines(f, byte_range.end), fieldnames=fieldnames
+        )
+
+
+def import_byte_range(
+    filepath: str,
+    fieldnames: list[str],
+    byte_range: ByteRange,
+    user_pk: Any,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Imports a single byte range of the CSV, entry point of import workers
+    """
+    user = get_user_model().objects.get(pk=user_pk)
+    importer = ShipmentImporter(user, chunk_size=chunk_size, upsert=True)
+    return sum(
+        importer.import_rows(read_byte_range(filepath, fieldnames, byte_range))
+    )
+
+
+class ImportCheckpoint:
+    """
+    Remembers which byte ranges of a source file are imported.
+
+    The file is only written by the parent process, and replaced
+    atomically so a crash never leaves a half written checkpoint.
+    """
+
+    def __init__(self, path: str, source: str, range_size: int) -> None:
+        self.path = path
+        self.source = source
+        self.range_size = range_size
+        self.done: set[int] = set()
+
+    def fingerprint(self) -> dict[str, Any]:
+        stat = os.stat(self.source)
+        return {
+            "source": os.path.abspath(self.source),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "range_size": self.range_size,
+        }
+
+    def load(self) -> set[int]:
+        """
+        Loads the imported ranges, the checkpoint is ignored
+        if the source file or the range size changed since
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self.done
+
+        if data.get("fingerprint") != self.fingerprint():
+            logger.warning(
+                "Checkpoint %s does not match %s, starting over",
+                self.path,
+                self.source,
+            )
+            return self.done
+
+        self.done = set(data["done"])
+        return self.done
+
+    def mark_done(self, byte_range: ByteRange) -> None:
+        self.done.add(byte_range.start)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"fingerprint": self.fingerprint(), "done": sorted(self.done)},
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ParallelShipmentImport:
+    """
+    Imports a large CSV in a pool of worker processes.
+
+    The file is split into byte ranges, each imported by a worker
+    with its own database connection and upserted chunk by chunk.
+    Finished ranges are checkpointed, so a resumed import skips them
+    and a range cut short by a crash is safely imported again.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        user: AbstractBaseUser,
+        workers: int,
+        range_size: int = DEFAULT_RANGE_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checkpoint_path: Optional[str] = None,
+    ) -> None:
+        self.filepath = filepath
+        self.user = user
+        self.workers = workers
+        self.range_size = range_size
+        self.chunk_size = chunk_size
+        self.checkpoint = ImportCheckpoint(
+            checkpoint_path or f"{filepath}.checkpoint", filepath, range_size
+        )
+
+    def create_executor(self) -> Executor:
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+
+    def run(
+        self, resume: bool = False, executor: Optional[Executor] = None
+    ) -> Iterator[int]:
+        """
+        Imports the pending ranges,
+        yields the number of rows imported with every finished range
+        """
+        fieldnames, ranges = split_byte_ranges(self.filepath, self.range_size)
+        done = self.checkpoint.load() if resume else set()
+        pending = [r for r in ranges if r.start not in done]
+        if done:
+            logger.info(
+                "Resuming import of %s, %s of %s ranges already imported",
+                self.filepath,
+                len(ranges) - len(pending),
+                len(ranges),
+            )
+
+        with executor or self.create_executor() as pool:
+            futures = {
+                pool.submit(
+                    import_byte_range,
+                    self.filepath,
+                    fieldnames,
+                    byte_range,
+                    self.user.pk,
+                    self.chunk_size,
+                ): byte_range
+                for byte_range in pending
+            }
+            try:
+                for future in as_completed(futures):
+                    rows = future.result()
+                    self.checkpoint.mark_done(futures[future])
+                    yield rows
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        self.checkpoint.remove()
@@ -0,0 +1,33 @@
+from typing import Any
+
+from parcel.models import UserShipment
+from parcel.serializers import UserShipmentSerializer
+from utils.cache_utils import get_cached_tracking, set_cached_tracking
+
+
+def get_tracked_shipments(tracking_number: str) -> list[dict[str, Any]]:
+    """
+    Returns every shipment row (one per article) of the tracking number.
+    Rows of all owners are cached together, the cache is dropped
+    whenever one of them is saved or deleted, and outdated by changes
+    of any address or article.
+    """
+    cached = get_cached_tracking(tracking_number)
+    if cached is not None:
+        return cached
+
+    shipments = (
+        UserShipment.objects.filter(tracking_number=tracking_number)
+        .select_related("article", "sender_address", "receiver_address")
+        .order_by("timestamp", "id")
+    )
+    serializer = UserShipmentSerializer(
+        shipments,
+        many=True,
+        expand=["article", "sender_address", "receiver_address"],
+        # weather has its own cache and would go stale here
+        omit=["receiver_weather"],
+    )
+    data = [dict(row) for row in serializer.data]
+    set_cached_tracking(tracking_number, data)
+    return data
@@ -0,0 +1,66 @@
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractBaseUser, Group, Permission
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from parcel.models import UserShipment
+from utils.cache_utils import (
+    delete_cached_auth_tokens,
+    delete_cached_tracking,
+    invalidate_cached_permissions,
+)
+
+
+UserModel = get_user_model()
+
+
+@receiver(post_save, sender=UserShipment)
+@receiver(post_delete, sender=UserShipment)
+def invalidate_tracking_cache(instance: UserShipment, **kwargs: Any) -> None:
+    tracking_numbers = {instance.tracking_number}
+    if instance.loaded_tracking_number:
+        tracking_numbers.add(instance.loaded_tracking_number)
+    # after commit, so readers can't cache the rows being replaced
+    transaction.on_commit(lambda: delete_cached_tracking(*tracking_numbers))
+
+
+@receiver(
+    m2m_changed, sender=UserModel.groups.through  # type: ignore[attr-defined]
+)
+@receiver(
+    m2m_changed,
+    sender=UserModel.user_permissions.through,  # type: ignore[attr-defined]
+)
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions_cache(action: str = "", **kwargs: Any) -> None:
+    if action.startswith("pre_"):
+        return
+    # cached permission sets are per user, changes are rare enough
+    # to drop all of them instead of tracking the affected users
+    transaction.on_commit(invalidate_cached_permissions)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_auth_token_cache(instance: Token, **kwargs: Any) -> None:
+    # e.g. deleted by the djoser token logout endpoint
+    token_key = instance.key
+    transaction.on_commit(lambda: delete_cached_auth_tokens(token_key))
+
+
+@receiver(post_save, sender=UserModel)
+def invalidate_user_auth_tokens_cache(
+    instance: AbstractBaseUser, created: bool = False, **kwargs: Any
+) -> None:
+    if created:
+        return
+    # cached tokens carry their user, e.g. a deactivated one
+    token_keys = list(
+        Token.objects.filter(user=instance).values_list("key", flat=True)
+    )
+    transaction.on_commit(lambda: delete_cached_auth_tokens(*token_keys))
@@ -1,12 +1,30 @@
+from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from parcel.views import AddressViewSet, ArticleViewSet, UserShipmentViewSet
+from parcel.views import (
+    AddressViewSet,
+    ArticleViewSet,
+    AsyncUserShipmentViewSet,
+    TrackShipmentView,
+    UserShipmentViewSet,
+)
 
 
 router = DefaultRouter()
 
 router.register("addresses", AddressViewSet)
 router.register("articles", ArticleViewSet)
-router.register("user-shipments", UserShipmentViewSet)
+router.register(
+    "user-shipments",
+    AsyncUserShipmentViewSet if settings.ASYNC_VIEWS else UserShipmentViewSet,
+)
 
-urlpatterns = router.urls
+urlpatterns = [
+    path(
+        "track/<str:tracking_number>/",
+        TrackShipmentView.as_view(),
+        name="track-shipment",
+    ),
+    *router.urls,
+]
@@ -1,27 +1,67 @@
-from rest_framework.permissions import AllowAny
+# mypy: disable-error-code="import-untyped"
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, Optional, Union, cast
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from rest_flex_fields import is_expanded, is_included
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from parcel.models import Address, Article, UserShipment
 from parcel.serializers import (
+    WEATHER_ERROR,
     AddressSerializer,
     ArticleSerializer,
     UserShipmentSerializer,
 )
-from utils.base_views import BaseUserOwnedViewSet
-from utils.permissions import AllowObjOwnerReadOnly
+from parcel.services.shipment_export import astream_export, stream_export
+from parcel.services.tracking import get_tracked_shipments
+from utils.base_views import (
+    AsyncConditionalGetMixin,
+    AsyncDispatchMixin,
+    BaseUserOwnedViewSet,
+    CachedResponseMixin,
+)
+from utils.cache_utils import WEATHER_SOFT_TTL
+from utils.helpers import KeysetPagination
+from utils.permissions import (
+    AllowObjOwnerReadOnly,
+    get_required_permissions,
+    has_perms,
+)
+from utils.renderers import CSVRenderer, NDJSONRenderer
+
+
+export_action = action(
+    detail=False,
+    renderer_classes=[NDJSONRenderer, CSVRenderer],
+    pagination_class=None,
+)
 
 
-class AddressViewSet(ReadOnlyModelViewSet):
+class AddressViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     queryset = Address.objects.all()
     serializer_class = AddressSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
     filterset_fields = ["street", "city", "country", "postal_code"]
 
 
-class ArticleViewSet(ReadOnlyModelViewSet):
+class ArticleViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     queryset = Article.objects.all()
     serializer_class = ArticleSerializer
     permission_classes = [AllowAny]
+    pagination_class = KeysetPagination
     filterset_fields = ["name", "price", "sku"]
 
 
@@ -29,6 +69,7 @@ class UserShipmentViewSet(BaseUserOwnedViewSet):
     queryset = UserShipment.objects.all()
     serializer_class = UserShipmentSerializer
     permission_classes = [AllowObjOwnerReadOnly]
+    pagination_class = KeysetPagination
     filterset_fields = [
         "user",
         "article",
@@ -36,3 +77,137 @@ class UserShipmentViewSet(BaseUserOwnedViewSet):
         "status",
         "tracking_number",
     ]
+
+    def get_queryset(self) -> QuerySet[UserShipment]:
+        # like GenericAPIView.get_queryset, a fresh copy of the queryset
+        queryset = cast(QuerySet[UserShipment], self.queryset.all())
+        return queryset.select_related(*self.get_related_fields())
+
+    def get_related_fields(self) -> list[str]:
+        """
+        Returns relations rendered by the requested expand/fields/omit
+        query params, so they are joined upfront instead of queried per row
+        """
+        related_fields = self.get_expanded_fields()
+        # receiver weather is resolved from the receiver address
+        if "receiver_address" not in related_fields and self.renders_weather():
+            related_fields.append("receiver_address")
+        return related_fields
+
+    def get_expanded_fields(self) -> list[str]:
+        return [
+            field
+            for field in UserShipmentSerializer.Meta.expandable_fields
+            if is_expanded(self.request, field)
+            and is_included(self.request, field)
+        ]
+
+    def renders_weather(self) -> bool:
+        return bool(is_included(self.request, "receiver_weather"))
+
+    def get_conditional_relations(self) -> list[str]:
+        return self.get_expanded_fields()
+
+    def get_freshness_window(self) -> Optional[int]:
+        # the weather is only refreshed once the cached one goes stale
+        return WEATHER_SOFT_TTL if self.renders_weather() else None
+
+    def has_validators(self, response: HttpResponseBase) -> bool:
+        # the window must not keep failed weather lookups for clients
+        if not self.renders_weather():
+            return True
+        data = getattr(response, "data", None)
+        rows = data.get("results", [data]) if isinstance(data, dict) else data
+        return not any(
+            row.get("receiver_weather") == WEATHER_ERROR for row in rows or []
+        )
+
+    @export_action
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """
+        Streams all the filtered shipments as NDJSON or CSV,
+        chosen with the Accept header or the format query param
+        """
+        queryset = self.filter_queryset(self.get_list_queryset())
+        renderer: BaseRenderer = (
+            request.accepted_renderer  # type: ignore[attr-defined]
+        )
+        return self.export_response(
+            stream_export(queryset, renderer.format), renderer
+        )
+
+    def export_response(
+        self,
+        streaming_content: Union[Iterator[bytes], AsyncIterator[bytes]],
+        renderer: BaseRenderer,
+    ) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(
+            streaming_content, content_type=renderer.media_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="shipments.{renderer.format}"'
+        )
+        return response
+
+
+class AsyncUserShipmentViewSet(
+    AsyncDispatchMixin, AsyncConditionalGetMixin, UserShipmentViewSet
+):
+    """
+    UserShipmentViewSet for the ASGI deployment mode.
+    The list awaits the receiver weather from the async weather client,
+    the other actions stay sync.
+    """
+
+    @export_action  # type: ignore[type-var]
+    # pylint: disable-next=invalid-overridden-method
+    async def export(  # type: ignore[override]
+        self, request: Request
+    ) -> StreamingHttpResponse:
+        """
+        Streams the export from an async iterator, Django would read
+        a sync one into memory as a whole before sending it
+        """
+        queryset = await sync_to_async(
+            lambda: self.filter_queryset(self.get_list_queryset())
+        )()
+        renderer: BaseRenderer = (
+            request.accepted_renderer  # type: ignore[attr-defined]
+        )
+        return self.export_response(
+            astream_export(queryset, renderer.format), renderer
+        )
+
+    async def aserialize(self, serializer: BaseSerializer) -> Any:
+        resolve_receiver_weather = getattr(
+            serializer, "aresolve_receiver_weather", None
+        )
+        if resolve_receiver_weather is not None:
+            await resolve_receiver_weather()
+        return await super().aserialize(serializer)
+
+
+class TrackShipmentView(APIView):
+    """
+    Returns all articles shipped under the tracking number,
+    owners only see their own shipments
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request, tracking_number: str) -> Response:
+        shipments = get_tracked_shipments(tracking_number)
+        if not has_perms(
+            request.user, get_required_permissions("GET", UserShipment)
+        ):
+            shipments = [
+                shipment
+                for shipment in shipments
+                if shipment["user"] == request.user.pk
+            ]
+        if not shipments:
+            raise NotFound("Shipment not found")
+
+        return Response(
+            {"tracking_number": tracking_number, "shipments": shipments}
+        )
@@ -1,13 +1,17 @@
 from collections.abc import Generator
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractBaseUser
+from django.core.cache import cache
 from django.http import HttpRequest
 from model_bakery import baker
 from rest_framework.test import APIClient
 
+from utils.cache_utils import local_cache
+from weather.services.weather_api import weather_circuit_breaker
+
 
 UserModel = get_user_model()
 
@@ -57,6 +61,32 @@ def http_request() -> HttpRequest:
 
 
 @pytest.fixture
-def mock_requests_get() -> Generator[MagicMock, None, None]:
-    with patch("requests.get") as mock_get:
+def mock_http_get() -> Generator[MagicMock, None, None]:
+    with patch("httpx.Client.get") as mock_get:
         yield mock_get
+
+
+@pytest.fixture
+def mock_http_aget() -> Generator[AsyncMock, None, None]:
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        yield mock_get
+
+
+@pytest.fixture(autouse=True)
+def reset_weather_circuit_breaker() -> Generator[None, None, None]:
+    """
+    Keeps failures of one test from opening the circuit for the others
+    """
+    weather_circuit_breaker.reset()
+    yield
+    weather_circuit_breaker.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> Generator[None, None, None]:
+    """
+    Cached responses and generations must not outlive the test data
+    """
+    yield
+    cache.clear()
+    local_cache.clear()
@@ -1,4 +1,5 @@
 from typing import Any
+from unittest.mock import MagicMock
 
 import pytest
 from django.contrib.auth.models import AbstractBaseUser
@@ -50,3 +51,25 @@ def prepared_user_shipment(
         "sender_address": address.id,
         "receiver_address": address.id,
     }
+
+
+@pytest.fixture
+def shared_address_shipments(user: AbstractBaseUser) -> list[UserShipment]:
+    receiver_address: Address = baker.make(
+        Address, postal_code="80331", country="DE"
+    )
+    return baker.make(
+        UserShipment,
+        user=user,
+        receiver_address=receiver_address,
+        _quantity=5,
+    )
+
+
+@pytest.fixture
+def mock_weather_response(mock_http_get: MagicMock) -> MagicMock:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"data": [{"temp": 21}]}
+    mock_response.raise_for_status.return_value = None
+    mock_http_get.return_value = mock_response
+    return mock_http_get
@@ -1,10 +1,18 @@
+from datetime import timedelta
 from typing import Any
+from unittest.mock import MagicMock
 
 import pytest
+from django.contrib.auth.models import AbstractBaseUser
 from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from pytest_django import DjangoAssertNumQueries
 from rest_framework.test import APIClient
 
 from parcel.models import Address, Article, UserShipment
+from utils.helpers import KeysetPagination
+from weather.services.weather_api import weather_circuit_breaker
 
 
 @pytest.mark.django_db
@@ -149,6 +157,182 @@ def test_user_shipment_list(
     assert fixture_ids == response_ids
 
 
+@pytest.mark.django_db
+def test_user_shipment_list_weather_resolved_once_per_address(
+    auth_api_client: APIClient,
+    shared_address_shipments: list[UserShipment],
+    mock_weather_response: MagicMock,
+) -> None:
+    url = reverse("usershipment-list")
+    response = auth_api_client.get(url)
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    results = response.data.get("results", [])
+    assert len(results) == len(shared_address_shipments)
+    assert all(
+        result["receiver_weather"] == [{"temp": 21}] for result in results
+    )
+    assert mock_weather_response.call_count == 1
+
+
+@pytest.mark.django_db
+def test_user_shipment_list_omit_weather(
+    auth_api_client: APIClient,
+    shared_address_shipments: list[UserShipment],
+    mock_http_get: MagicMock,
+) -> None:
+    url = reverse("usershipment-list")
+    response = auth_api_client.get(url, {"omit": "receiver_weather"})
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    results = response.data.get("results", [])
+    assert len(results) == len(shared_address_shipments)
+    assert all("receiver_weather" not in result for result in results)
+    mock_http_get.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_user_shipment_list_weather_circuit_open(
+    auth_api_client: APIClient,
+    user_shipments: list[UserShipment],
+    mock_http_get: MagicMock,
+) -> None:
+    for _ in range(weather_circuit_breaker.failure_threshold):
+        weather_circuit_breaker.record_failure()
+
+    url = reverse("usershipment-list")
+    response = auth_api_client.get(url)
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    results = response.data.get("results", [])
+    assert len(results) == len(user_shipments)
+    assert all(
+        result["receiver_weather"]
+        == {"error": "Error in getting weather data"}
+        for result in results
+    )
+    mock_http_get.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("quantity", [1, 20])
+@pytest.mark.parametrize(
+    "query_params",
+    [
+        {},
+        {"omit": "receiver_weather"},
+        {"expand": "article,sender_address,receiver_address"},
+    ],
+)
+def test_user_shipment_list_query_count(
+    auth_api_client: APIClient,
+    user: AbstractBaseUser,
+    mock_weather_response: MagicMock,  # pylint: disable=unused-argument
+    django_assert_num_queries: DjangoAssertNumQueries,
+    quantity: int,
+    query_params: dict[str, str],
+) -> None:
+    """
+    Test that the number of queries does not depend on the page size.
+    """
+    baker.make(UserShipment, user=user, _quantity=quantity)
+
+    url = reverse("usershipment-list")
+    # permissions (user + group), count, page
+    with django_assert_num_queries(4):
+        response = auth_api_client.get(url, query_params)
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    assert len(response.data.get("results", [])) == quantity
+
+
+@pytest.mark.django_db
+def test_user_shipment_list_keyset_query_count(
+    auth_api_client: APIClient,
+    user: AbstractBaseUser,
+    mock_weather_response: MagicMock,  # pylint: disable=unused-argument
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    baker.make(UserShipment, user=user, _quantity=20)
+
+    url = reverse("usershipment-list")
+    # permissions (user + group), page without count
+    with django_assert_num_queries(3):
+        response = auth_api_client.get(url, {"cursor": ""})
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    assert response.data["count"] is None
+    assert len(response.data["results"]) == 20
+
+
+@pytest.mark.django_db
+def test_address_list_keyset_pages(
+    api_client: APIClient, mocker: MagicMock
+) -> None:
+    mocker.patch.object(KeysetPagination, "page_size", 2)
+    timestamp = timezone.now()
+    # rows sharing a timestamp are ordered by id
+    addresses: list[Address] = baker.make(
+        Address, timestamp=timestamp, _quantity=3
+    )
+    addresses += baker.make(
+        Address, timestamp=timestamp - timedelta(days=1), _quantity=2
+    )
+    expected_ids = [
+        str(address.id)
+        for address in sorted(
+            addresses, key=lambda a: (a.timestamp, a.id), reverse=True
+        )
+    ]
+
+    pages = []
+    url: str = reverse("address-list") + "?cursor=&count=exact"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert isinstance(response.data, dict)
+        assert response.data["count"] == 5
+        pages.append([result["id"] for result in response.data["results"]])
+        url = response.data["next"]
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [item for page in pages for item in page] == expected_ids
+
+    assert isinstance(response.data, dict)
+    response = api_client.get(response.data["previous"])
+    assert isinstance(response.data, dict)
+    assert [result["id"] for result in response.data["results"]] == pages[1]
+
+
+@pytest.mark.django_db
+def test_address_list_invalid_cursor(api_client: APIClient) -> None:
+    response = api_client.get(reverse("address-list"), {"cursor": "invalid"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_user_shipment_detail_query_count(
+    auth_api_client: APIClient,
+    user_shipments: list[UserShipment],
+    mock_weather_response: MagicMock,  # pylint: disable=unused-argument
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    url = reverse("usershipment-detail", args=[user_shipments[0].id])
+    # object, permissions (user + group), owner check
+    with django_assert_num_queries(4):
+        response = auth_api_client.get(url, {"expand": "~all"})
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    assert response.data["article"]["id"] == str(user_shipments[0].article_id)
+
+
 @pytest.mark.django_db
 def test_user_shipment_detail(
     auth_api_client: APIClient, user_shipments: list[UserShipment]
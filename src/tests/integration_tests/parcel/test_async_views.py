@@ -0,0 +1,115 @@
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import AbstractBaseUser
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from parcel.models import UserShipment
+from parcel.views import AsyncUserShipmentViewSet, UserShipmentViewSet
+
+
+@pytest.fixture
+def mock_async_weather_response(mock_http_aget: AsyncMock) -> AsyncMock:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"data": [{"temp": 21}]}
+    mock_response.raise_for_status.return_value = None
+    mock_http_aget.return_value = mock_response
+    return mock_http_aget
+
+
+def get_list(viewset: Any, user: AbstractBaseUser, **headers: Any) -> Any:
+    request = APIRequestFactory().get(
+        "/api/v1/parcel/user-shipments/", {"page_size": 2}, **headers
+    )
+    force_authenticate(request, user=user)
+    view = viewset.as_view({"get": "list"})
+    if iscoroutinefunction(view):
+        return async_to_sync(view)(request)
+    return view(request)
+
+
+def get_export(viewset: Any, user: AbstractBaseUser) -> Any:
+    request = APIRequestFactory().get("/api/v1/parcel/user-shipments/export/")
+    force_authenticate(request, user=user)
+    view = viewset.as_view({"get": "export"}, **viewset.export.kwargs)
+    if iscoroutinefunction(view):
+        return async_to_sync(view)(request)
+    return view(request)
+
+
+async def read_async_content(response: Any) -> bytes:
+    return b"".join([part async for part in response.streaming_content])
+
+
+def test_async_viewset_is_async() -> None:
+    assert iscoroutinefunction(
+        AsyncUserShipmentViewSet.as_view({"get": "list"})
+    )
+    assert not iscoroutinefunction(
+        UserShipmentViewSet.as_view({"get": "list"})
+    )
+
+
+@pytest.mark.django_db
+def test_async_list_matches_sync_list(
+    user: AbstractBaseUser,
+    shared_address_shipments: list[UserShipment],  # pylint: disable=W0613
+    mock_weather_response: MagicMock,
+    mock_async_weather_response: AsyncMock,
+) -> None:
+    response = get_list(AsyncUserShipmentViewSet, user)
+    expected = get_list(UserShipmentViewSet, user)
+
+    assert response.status_code == 200
+    assert response.data == expected.data
+    assert response["ETag"] == expected["ETag"]
+    # the weather was fetched with the async client and cached
+    assert mock_async_weather_response.call_count == 1
+    assert not mock_weather_response.called
+
+
+@pytest.mark.django_db
+def test_async_list_not_modified(
+    user: AbstractBaseUser,
+    user_shipments: list[UserShipment],  # pylint: disable=unused-argument
+    mock_async_weather_response: AsyncMock,
+) -> None:
+    etag = get_list(AsyncUserShipmentViewSet, user)["ETag"]
+    mock_async_weather_response.reset_mock()
+
+    response = get_list(
+        AsyncUserShipmentViewSet, user, HTTP_IF_NONE_MATCH=etag
+    )
+
+    assert response.status_code == 304
+    assert not mock_async_weather_response.called
+
+
+@pytest.mark.django_db
+def test_async_list_requires_authentication(
+    user_shipments: list[UserShipment],  # pylint: disable=unused-argument
+) -> None:
+    request = APIRequestFactory().get("/api/v1/parcel/user-shipments/")
+    view = AsyncUserShipmentViewSet.as_view({"get": "list"})
+
+    response = async_to_sync(view)(request)
+
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_async_export_streams_async_iterator(
+    user: AbstractBaseUser,
+    user_shipments: list[UserShipment],  # pylint: disable=W0613
+) -> None:
+    response = get_export(AsyncUserShipmentViewSet, user)
+    expected = get_export(UserShipmentViewSet, user)
+
+    assert response.status_code == 200
+    assert response.is_async
+    assert not expected.is_async
+    assert async_to_sync(read_async_content)(response) == b"".join(
+        expected.streaming_content
+    )
@@ -0,0 +1,170 @@
+import time
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from django.urls import reverse
+from django.utils.http import http_date
+from pytest_django import (
+    DjangoAssertNumQueries,
+    DjangoCaptureOnCommitCallbacks,
+)
+from rest_framework.test import APIClient
+
+from parcel.models import Address, Article, UserShipment
+
+
+@pytest.mark.django_db
+def test_list_sets_validators(
+    auth_api_client: APIClient,
+    user_shipments: list[UserShipment],  # pylint: disable=unused-argument
+) -> None:
+    url = reverse("usershipment-list")
+    response = auth_api_client.get(url, {"omit": "receiver_weather"})
+
+    assert response.status_code == 200
+    assert response["ETag"]
+    # rows leaving the list don't move its last modification
+    assert "Last-Modified" not in response
+    assert "Authorization" in response["Vary"]
+
+
+@pytest.mark.django_db
+def test_list_not_modified(
+    auth_api_client: APIClient,
+    user_shipments: list[UserShipment],  # pylint: disable=unused-argument
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    url = reverse("usershipment-list")
+    params = {"omit": "receiver_weather"}
+    etag = auth_api_client.get(url, params)["ETag"]
+
+    # only the aggregate, the page is never fetched
+    with django_assert_num_queries(1):
+        response = auth_api_client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert not response.content
+    assert response["ETag"] == etag
+
+
+@pytest.mark.django_db
+def test_list_modified_after_delete(
+    auth_api_client: APIClient, user_shipments: list[UserShipment]
+) -> None:
+    url = reverse("usershipment-list")
+    params = {"omit": "receiver_weather"}
+    etag = auth_api_client.get(url, params)["ETag"]
+
+    user_shipments[0].delete()
+    response = auth_api_client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_list_modified_since_soft_delete(
+    auth_api_client: APIClient,
+    user_shipments: list[UserShipment],
+) -> None:
+    url = reverse("usershipment-list")
+    params = {"omit": "receiver_weather"}
+    # e.g. a client validating with the time of its last request only
+    last_modified = http_date(time.time() + 1)
+
+    user_shipments[0].delete()
+    response = auth_api_client.get(
+        url, params, HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+
+    assert response.status_code == 200
+    ids = {row["id"] for row in response.json()["results"]}
+    assert str(user_shipments[0].id) not in ids
+
+
+@pytest.mark.django_db
+def test_detail_modified_after_update(
+    auth_api_client_superuser: APIClient, user_shipments: list[UserShipment]
+) -> None:
+    url = reverse("usershipment-detail", args=[user_shipments[0].id])
+    params = {"omit": "receiver_weather"}
+    etag = auth_api_client_superuser.get(url, params)["ETag"]
+
+    response = auth_api_client_superuser.get(
+        url, params, HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 304
+
+    auth_api_client_superuser.patch(url, {"tracking_number": "QWER1234"})
+    response = auth_api_client_superuser.get(
+        url, params, HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_keyset_page_not_modified(
+    api_client: APIClient,
+    addresses: list[Address],  # pylint: disable=unused-argument
+) -> None:
+    url = reverse("address-list")
+    first = api_client.get(url, {"cursor": ""})
+
+    response = api_client.get(
+        url, {"cursor": ""}, HTTP_IF_NONE_MATCH=first["ETag"]
+    )
+
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_validators_differ_per_query(
+    api_client: APIClient,
+    addresses: list[Address],  # pylint: disable=unused-argument
+) -> None:
+    url = reverse("address-list")
+    etag = api_client.get(url)["ETag"]
+
+    response = api_client.get(url, {"page_size": 2}, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_detail_modified_after_save_outside_api(
+    api_client: APIClient,
+    article: Article,
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("article-detail", args=[article.id])
+    etag = api_client.get(url)["ETag"]
+
+    # e.g. an edit in the admin or an import
+    article.price = Decimal("9.99")
+    with django_capture_on_commit_callbacks(execute=True):
+        article.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert response.json()["price"] == "9.99"
+
+
+@pytest.mark.django_db
+def test_list_without_validators_on_weather_error(
+    auth_api_client: APIClient,
+    user_shipments: list[UserShipment],  # pylint: disable=unused-argument
+    mock_http_get: MagicMock,
+) -> None:
+    mock_http_get.side_effect = httpx.ConnectError("Error")
+    url = reverse("usershipment-list")
+
+    response = auth_api_client.get(url)
+
+    assert response.status_code == 200
+    assert "error" in response.json()["results"][0]["receiver_weather"]
+    assert "ETag" not in response
+    assert "Last-Modified" not in response
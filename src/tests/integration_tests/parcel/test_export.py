@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+from typing import Any, cast
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from parcel.models import UserShipment
+from parcel.services.shipment_export import EXPORT_FIELDS, astream_export
+
+
+def read_content(response: Any) -> str:
+    assert isinstance(response, StreamingHttpResponse)
+    content: Any = response.streaming_content
+    return b"".join(content).decode()
+
+
+@pytest.mark.django_db
+def test_export_ndjson_own_shipments(
+    auth_api_client: APIClient,
+    user_shipments: list[UserShipment],
+    admin_user_shipments: list[  # pylint: disable=unused-argument
+        UserShipment
+    ],
+) -> None:
+    url = reverse("usershipment-export")
+    response = auth_api_client.get(url)
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in read_content(response).splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(
+        str(shipment.id) for shipment in user_shipments
+    )
+    assert list(rows[0]) == EXPORT_FIELDS
+
+
+@pytest.mark.django_db
+def test_export_csv_all_shipments_with_permissions(
+    auth_api_client_superuser: APIClient,
+    user_shipments: list[UserShipment],
+    admin_user_shipments: list[UserShipment],
+) -> None:
+    url = reverse("usershipment-export")
+    response = auth_api_client_superuser.get(url, {"format": "csv"})
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/csv"
+    assert "shipments.csv" in response["Content-Disposition"]
+    rows = list(csv.DictReader(io.StringIO(read_content(response))))
+    assert sorted(row["id"] for row in rows) == sorted(
+        str(shipment.id) for shipment in user_shipments + admin_user_shipments
+    )
+
+
+@pytest.mark.django_db
+def test_export_applies_filters(
+    auth_api_client: APIClient, user_shipments: list[UserShipment]
+) -> None:
+    shipment = user_shipments[0]
+    url = reverse("usershipment-export")
+    response = auth_api_client.get(
+        url,
+        {"tracking_number": shipment.tracking_number},
+        HTTP_ACCEPT="text/csv",
+    )
+
+    rows = list(csv.DictReader(io.StringIO(read_content(response))))
+    assert [row["id"] for row in rows] == [str(shipment.id)]
+    assert rows[0]["user"] == str(shipment.user.pk)
+
+
+@pytest.mark.django_db
+def test_export_unauthenticated(api_client: APIClient) -> None:
+    response = api_client.get(reverse("usershipment-export"))
+
+    assert response.status_code == 401
+
+
+async def read_async_stream(stream: Any) -> list[bytes]:
+    return [part async for part in stream]
+
+
+@pytest.mark.django_db
+def test_astream_export_sends_chunks(
+    user_shipments: list[UserShipment],
+) -> None:
+    queryset = cast(QuerySet[UserShipment], UserShipment.objects.all())
+    parts = async_to_sync(read_async_stream)(
+        astream_export(queryset, "ndjson", chunk_size=2)
+    )
+
+    assert [part.count(b"\n") for part in parts] == [2, 2, 1]
+    rows = [json.loads(line) for line in b"".join(parts).splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(
+        str(shipment.id) for shipment in user_shipments
+    )
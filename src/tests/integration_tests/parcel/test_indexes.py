@@ -0,0 +1,90 @@
+from collections.abc import Sequence
+from typing import Any, Optional
+
+import pytest
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIClient
+
+from parcel.models import UserShipment
+
+
+def explain(sql: str, params: Optional[Sequence[Any]] = None) -> str:
+    """
+    Returns the query plan on PostgreSQL, or SQLite as a local stand-in
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # tables in tests are too small for the planner to pick an index
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+        else:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return "\n".join(str(row) for row in cursor.fetchall())
+
+
+def get_list_plans(client: APIClient, params: dict[str, str]) -> list[str]:
+    """
+    Requests the shipments list and explains its queries on shipments
+    """
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(reverse("usershipment-list"), params)
+    assert response.status_code == 200
+    table = UserShipment._meta.db_table
+    return [
+        explain(query["sql"])
+        for query in captured.captured_queries
+        if f'FROM "{table}"' in query["sql"]
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("params", "index"),
+    [
+        ({"cursor": ""}, "shipment_live_user_ts_idx"),
+        ({"status": "scanned"}, "shipment_live_user_status_idx"),
+        ({"tracking_number": "TN1"}, "shipment_live_tracking_idx"),
+    ],
+)
+def test_owner_list_queries_use_partial_indexes(
+    auth_api_client: APIClient,
+    user: AbstractBaseUser,
+    params: dict[str, Any],
+    index: str,
+) -> None:
+    baker.make(UserShipment, user=user, _quantity=5)
+
+    params = {**params, "omit": "receiver_weather"}
+    plans = get_list_plans(auth_api_client, params)
+
+    assert plans
+    for plan in plans:
+        assert index in plan, plan
+
+
+@pytest.mark.django_db
+def test_tracking_number_lookup_uses_partial_index() -> None:
+    queryset = UserShipment.objects.filter(tracking_number="TN1")
+
+    plan = explain(*queryset.query.sql_with_params())
+
+    assert "shipment_live_tracking_idx" in plan
+
+
+@pytest.mark.django_db
+def test_list_queries_use_partial_indexes(
+    auth_api_client_superuser: APIClient,
+    user_shipments: list[UserShipment],  # pylint: disable=unused-argument
+) -> None:
+    plans = get_list_plans(
+        auth_api_client_superuser,
+        {"cursor": "", "omit": "receiver_weather"},
+    )
+
+    assert plans
+    for plan in plans:
+        assert "shipment_live_ts_idx" in plan, plan
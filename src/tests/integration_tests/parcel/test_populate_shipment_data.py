@@ -0,0 +1,186 @@
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, Future
+from io import StringIO
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.management import call_command
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from model_bakery import baker
+from pytest_django import DjangoDbBlocker
+
+from parcel.models import Address, Article, UserShipment
+from parcel.services.shipment_import import (
+    ImportCheckpoint,
+    ParallelShipmentImport,
+    split_byte_ranges,
+)
+
+
+UserModel = get_user_model()
+SHIPMENT_DATA_PATH = settings.BASE_DIR / "resources/shipment_data.csv"
+
+
+@pytest.mark.django_db
+def test_populate_shipment_data(user: AbstractBaseUser) -> None:
+    out = StringIO()
+    call_command(
+        "populate_shipment_data",
+        SHIPMENT_DATA_PATH,
+        chunk_size=3,
+        stdout=out,
+    )
+
+    assert UserShipment.objects.filter(user=user).count() == 9
+    assert Address.objects.count() == 10
+    assert Article.objects.count() == 8
+    history = apps.get_model("parcel", "HistoricalUserShipment")
+    assert history.objects.count() == 9
+    assert "9 rows" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_populate_shipment_data_reuses_existing_rows(
+    user: AbstractBaseUser,
+) -> None:
+    call_command("populate_shipment_data", SHIPMENT_DATA_PATH, stdout=None)
+    call_command("populate_shipment_data", SHIPMENT_DATA_PATH, stdout=None)
+
+    assert UserShipment.objects.filter(user=user).count() == 18
+    assert Address.objects.count() == 10
+    assert Article.objects.count() == 8
+
+
+@pytest.mark.django_db
+def test_populate_shipment_data_no_user() -> None:
+    out = StringIO()
+    call_command("populate_shipment_data", SHIPMENT_DATA_PATH, stdout=out)
+
+    assert "No user found" in out.getvalue()
+    assert not UserShipment.objects.exists()
+
+
+class InlineExecutor(Executor):
+    """
+    Runs the import workers in the test process and database transaction
+    """
+
+    def submit(
+        self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any
+    ) -> Future[Any]:
+        future: Future[Any] = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            future.set_exception(error)
+        return future
+
+
+@pytest.mark.django_db
+def test_populate_shipment_data_parallel_is_idempotent(
+    user: AbstractBaseUser, tmp_path: Path, mocker: MagicMock
+) -> None:
+    mocker.patch.object(
+        ParallelShipmentImport,
+        "create_executor",
+        side_effect=InlineExecutor,
+    )
+    options = {
+        "workers": 2,
+        "range_size": 200,
+        "checkpoint": str(tmp_path / "import.checkpoint"),
+        "stdout": None,
+    }
+
+    call_command("populate_shipment_data", SHIPMENT_DATA_PATH, **options)
+    UserShipment.objects.update(carrier="outdated")
+    call_command("populate_shipment_data", SHIPMENT_DATA_PATH, **options)
+
+    assert UserShipment.objects.filter(user=user).count() == 9
+    assert not UserShipment.objects.filter(carrier="outdated").exists()
+    assert not (tmp_path / "import.checkpoint").exists()
+
+
+@pytest.fixture
+def file_database(
+    tmp_path: Path, django_db_blocker: DjangoDbBlocker
+) -> Iterator[None]:
+    """
+    Migrates a SQLite file as the default database, forked import
+    workers can't connect to the in-memory test database
+    """
+    original = connections["default"]
+    settings_dict: dict[str, Any] = {
+        **original.settings_dict,
+        "NAME": str(tmp_path / "db.sqlite3"),
+    }
+    connection = DatabaseWrapper(settings_dict, alias="default")
+    connections["default"] = connection
+    try:
+        with django_db_blocker.unblock():
+            call_command("migrate", verbosity=0)
+            yield
+    finally:
+        connection.close()
+        connections["default"] = original
+
+
+@pytest.mark.usefixtures("file_database")
+def test_populate_shipment_data_parallel_workers_share_rows(
+    tmp_path: Path,
+) -> None:
+    user = baker.make(UserModel)
+    header, *rows = SHIPMENT_DATA_PATH.read_text(encoding="utf-8").splitlines(
+        keepends=True
+    )
+    filepath = tmp_path / "shipments.csv"
+    # every row is imported again by a worker of another range
+    filepath.write_text("".join([header, *rows, *rows]), encoding="utf-8")
+    options = {
+        "workers": 4,
+        "range_size": 100,
+        "checkpoint": str(tmp_path / "import.checkpoint"),
+        "stdout": None,
+    }
+
+    call_command("populate_shipment_data", filepath, **options)
+
+    assert UserShipment.objects.filter(user=user).count() == 9
+    assert Address.objects.count() == 10
+    assert Article.objects.count() == 8
+
+
+@pytest.mark.django_db
+def test_populate_shipment_data_resumes_from_checkpoint(
+    user: AbstractBaseUser, tmp_path: Path, mocker: MagicMock
+) -> None:
+    mocker.patch.object(
+        ParallelShipmentImport,
+        "create_executor",
+        side_effect=InlineExecutor,
+    )
+    checkpoint_path = str(tmp_path / "import.checkpoint")
+    _, ranges = split_byte_ranges(str(SHIPMENT_DATA_PATH), range_size=200)
+    checkpoint = ImportCheckpoint(
+        checkpoint_path, str(SHIPMENT_DATA_PATH), range_size=200
+    )
+    checkpoint.mark_done(ranges[0])
+
+    call_command(
+        "populate_shipment_data",
+        SHIPMENT_DATA_PATH,
+        range_size=200,
+        checkpoint=checkpoint_path,
+        resume=True,
+        stdout=None,
+    )
+
+    imported = UserShipment.objects.filter(user=user).count()
+    assert 0 < imported < 9
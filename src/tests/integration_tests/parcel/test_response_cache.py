@@ -0,0 +1,96 @@
+import pytest
+from django.urls import reverse
+from pytest_django import (
+    DjangoAssertNumQueries,
+    DjangoCaptureOnCommitCallbacks,
+)
+from rest_framework.test import APIClient
+
+from parcel.models import Address, Article
+
+
+@pytest.mark.django_db
+def test_address_list_cached(
+    api_client: APIClient,
+    addresses: list[Address],  # pylint: disable=unused-argument
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    url = reverse("address-list")
+    first = api_client.get(url)
+
+    with django_assert_num_queries(0):
+        response = api_client.get(url)
+
+    assert response.status_code == 200
+    assert response.data == first.data
+    assert response["ETag"] == first["ETag"]
+
+
+@pytest.mark.django_db
+def test_cached_response_not_modified(
+    api_client: APIClient,
+    article: Article,
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    url = reverse("article-detail", args=[article.id])
+    etag = api_client.get(url)["ETag"]
+
+    with django_assert_num_queries(0):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_query_params_cached_separately(
+    api_client: APIClient, addresses: list[Address]
+) -> None:
+    url = reverse("address-list")
+    api_client.get(url)
+
+    response = api_client.get(url, {"city": addresses[0].city})
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    assert all(
+        result["city"] == addresses[0].city
+        for result in response.data["results"]
+    )
+
+
+@pytest.mark.django_db
+def test_save_outdates_cached_responses(
+    api_client: APIClient,
+    addresses: list[Address],
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("address-list")
+    api_client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        addresses[0].delete()
+    response = api_client.get(url)
+
+    assert isinstance(response.data, dict)
+    assert response.data["count"] == len(addresses) - 1
+
+
+@pytest.mark.django_db
+def test_not_modified_responses_not_cached(
+    api_client: APIClient,
+    addresses: list[Address],
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("address-list")
+    etag = api_client.get(url)["ETag"]
+    # outdates the cached response, the data stays the same
+    with django_capture_on_commit_callbacks(execute=True):
+        Address.bump_generation()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    response = api_client.get(url)
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    assert response.data["count"] == len(addresses)
@@ -0,0 +1,60 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from rest_framework.serializers import ListSerializer
+
+from parcel.models import Address, Article, UserShipment
+from parcel.serializers import (
+    AddressSerializer,
+    ArticleSerializer,
+    UserShipmentSerializer,
+)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {
+            "expand": ["article", "sender_address", "receiver_address"],
+            "omit": ["receiver_weather"],
+        },
+        {"fields": ["id", "status", "article"], "expand": ["article"]},
+        {"fields": ["id", "article.name", "article"], "expand": ["article"]},
+        {"omit": ["user", "receiver_weather"]},
+    ],
+)
+def test_planned_shipments_match_drf_output(
+    options: dict[str, Any],
+    shared_address_shipments: list[UserShipment],
+    mock_weather_response: MagicMock,  # pylint: disable=unused-argument
+) -> None:
+    shipments = list(
+        UserShipment.objects.filter(
+            id__in=[shipment.id for shipment in shared_address_shipments]
+        ).select_related("article", "sender_address", "receiver_address")
+    )
+    expected = ListSerializer(
+        shipments, child=UserShipmentSerializer(**options)
+    ).data
+
+    planned = UserShipmentSerializer(shipments, many=True, **options).data
+
+    assert planned == expected
+
+
+@pytest.mark.django_db
+def test_planned_addresses_and_articles_match_drf_output(
+    addresses: list[Address], articles: list[Article]
+) -> None:
+    for serializer_class, instances in (
+        (AddressSerializer, addresses),
+        (ArticleSerializer, articles),
+    ):
+        expected = ListSerializer(instances, child=serializer_class()).data
+
+        planned = serializer_class(instances, many=True).data
+
+        assert planned == expected
@@ -0,0 +1,170 @@
+from typing import cast
+
+import pytest
+from django.contrib.auth.models import AbstractBaseUser
+from django.urls import reverse
+from model_bakery import baker
+from pytest_django import (
+    DjangoAssertNumQueries,
+    DjangoCaptureOnCommitCallbacks,
+)
+from rest_framework.test import APIClient
+
+from parcel.models import Article, UserShipment
+
+
+TRACKING_NUMBER = "TN12345678"
+
+
+@pytest.fixture
+def tracked_shipments(user: AbstractBaseUser) -> list[UserShipment]:
+    return baker.make(
+        UserShipment,
+        user=user,
+        tracking_number=TRACKING_NUMBER,
+        _quantity=2,
+    )
+
+
+@pytest.mark.django_db
+def test_track_shipment(
+    auth_api_client: APIClient,
+    user: AbstractBaseUser,
+    tracked_shipments: list[UserShipment],
+) -> None:
+    baker.make(UserShipment, user=user, tracking_number="TN00000000")
+
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    response = auth_api_client.get(url)
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    assert response.data["tracking_number"] == TRACKING_NUMBER
+    assert sorted(
+        row["article"]["id"] for row in response.data["shipments"]
+    ) == (sorted(str(shipment.article_id) for shipment in tracked_shipments))
+    assert "receiver_weather" not in response.data["shipments"][0]
+
+
+@pytest.mark.django_db
+def test_track_shipment_not_owned(
+    auth_api_client: APIClient, superuser: AbstractBaseUser
+) -> None:
+    baker.make(UserShipment, user=superuser, tracking_number=TRACKING_NUMBER)
+
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    response = auth_api_client.get(url)
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_track_shipment_with_permissions(
+    auth_api_client_superuser: APIClient,
+    tracked_shipments: list[UserShipment],
+) -> None:
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    response = auth_api_client_superuser.get(url)
+
+    assert response.status_code == 200
+    assert isinstance(response.data, dict)
+    assert len(response.data["shipments"]) == len(tracked_shipments)
+
+
+@pytest.mark.django_db
+def test_track_shipment_unauthenticated(api_client: APIClient) -> None:
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    response = api_client.get(url)
+
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_track_shipment_is_cached(
+    auth_api_client_superuser: APIClient,
+    tracked_shipments: list[UserShipment],  # pylint: disable=unused-argument
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    auth_api_client_superuser.get(url)
+
+    with django_assert_num_queries(0):
+        response = auth_api_client_superuser.get(url)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_track_shipment_cache_invalidated_on_save(
+    auth_api_client_superuser: APIClient,
+    tracked_shipments: list[UserShipment],
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    auth_api_client_superuser.get(url)
+
+    shipment = cast(
+        UserShipment, UserShipment.objects.get(pk=tracked_shipments[0].pk)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        shipment.status = UserShipment.Status.DELIVERY
+        shipment.save()
+        baker.make(
+            UserShipment,
+            tracking_number=TRACKING_NUMBER,
+            article=baker.make(Article),
+        )
+
+    response = auth_api_client_superuser.get(url)
+
+    assert isinstance(response.data, dict)
+    assert len(response.data["shipments"]) == 3
+    assert UserShipment.Status.DELIVERY in {
+        row["status"] for row in response.data["shipments"]
+    }
+
+
+@pytest.mark.django_db
+def test_track_shipment_cache_invalidated_on_number_change(
+    auth_api_client_superuser: APIClient,
+    tracked_shipments: list[UserShipment],
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    auth_api_client_superuser.get(url)
+
+    shipment = cast(
+        UserShipment, UserShipment.objects.get(pk=tracked_shipments[0].pk)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        shipment.tracking_number = "TN99999999"
+        shipment.save()
+
+    response = auth_api_client_superuser.get(url)
+
+    assert isinstance(response.data, dict)
+    assert len(response.data["shipments"]) == 1
+
+
+@pytest.mark.django_db
+def test_track_shipment_cache_invalidated_on_article_save(
+    auth_api_client_superuser: APIClient,
+    tracked_shipments: list[UserShipment],
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("track-shipment", args=[TRACKING_NUMBER])
+    auth_api_client_superuser.get(url)
+
+    article = cast(
+        Article, Article.objects.get(pk=tracked_shipments[0].article_id)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        article.name = "Renamed article"
+        article.save()
+
+    response = auth_api_client_superuser.get(url)
+
+    assert isinstance(response.data, dict)
+    assert "Renamed article" in {
+        row["article"]["name"] for row in response.data["shipments"]
+    }
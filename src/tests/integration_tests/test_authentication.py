@@ -0,0 +1,101 @@
+import pytest
+from django.contrib.auth.models import AbstractBaseUser
+from django.test import RequestFactory
+from django.urls import reverse
+from pytest_django import (
+    DjangoAssertNumQueries,
+    DjangoCaptureOnCommitCallbacks,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from utils.authentication import CachedTokenAuthentication
+from utils.cache_utils import get_cached_auth_token
+
+
+@pytest.fixture
+def token(user: AbstractBaseUser) -> Token:
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def token_client(token: Token) -> APIClient:  # pylint: disable=W0621
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return client
+
+
+def authenticate(key: str) -> tuple[AbstractBaseUser, Token]:
+    request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {key}")
+    result = CachedTokenAuthentication().authenticate(request)
+    assert result is not None
+    return result
+
+
+@pytest.mark.django_db
+def test_token_cached(
+    token: Token,  # pylint: disable=redefined-outer-name
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    first_user, _ = authenticate(token.key)
+
+    with django_assert_num_queries(0):
+        user, cached_token = authenticate(token.key)
+
+    assert user == token.user
+    assert cached_token.key == token.key
+    # every request gets its own user object
+    assert user is not first_user
+
+
+@pytest.mark.django_db
+def test_cached_token_without_password(
+    token: Token,  # pylint: disable=redefined-outer-name
+) -> None:
+    authenticate(token.key)
+
+    cached_token = get_cached_auth_token(token.key)
+    assert "password" not in vars(cached_token.user)
+
+    user, _ = authenticate(token.key)
+    # loaded from the database when needed, e.g. to change it
+    assert user.check_password("wrong") is False
+    assert user.password == token.user.password
+
+
+@pytest.mark.django_db
+def test_invalid_token() -> None:
+    with pytest.raises(AuthenticationFailed):
+        authenticate("invalid")
+
+
+@pytest.mark.django_db
+def test_logout_invalidates_cached_token(
+    token_client: APIClient,  # pylint: disable=redefined-outer-name
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("track-shipment", args=["123"])
+    assert token_client.get(url).status_code == 404
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = token_client.post(reverse("logout"))
+    assert response.status_code == 204
+
+    assert token_client.get(url).status_code == 401
+
+
+@pytest.mark.django_db
+def test_deactivated_user_invalidates_cached_token(
+    user: AbstractBaseUser,
+    token_client: APIClient,  # pylint: disable=redefined-outer-name
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    url = reverse("track-shipment", args=["123"])
+    assert token_client.get(url).status_code == 404
+
+    user.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save()
+
+    assert token_client.get(url).status_code == 401
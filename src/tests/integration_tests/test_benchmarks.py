@@ -0,0 +1,49 @@
+import pytest
+
+from benchmarks.runner import SCENARIOS, run_benchmarks
+
+
+# served from data loaded upfront or from the cache
+QUERYLESS_SCENARIOS = {
+    "addresses_list",
+    "articles_list",
+    "authenticate_token",
+    "get_weather",
+}
+
+
+@pytest.mark.django_db
+def test_run_benchmarks() -> None:
+    results = run_benchmarks(
+        shipments=5, iterations=2, warmup=0, weather_latency=0
+    )
+
+    assert [result["name"] for result in results] == list(SCENARIOS)
+    for result in results:
+        assert result["req_per_sec"] > 0
+        assert result["latency_ms"]["p99"] >= result["latency_ms"]["p50"]
+        if (
+            result["name"].startswith(
+                ("serialize_", "render_", "request_log_")
+            )
+            or result["name"] in QUERYLESS_SCENARIOS
+        ):
+            assert result["queries"] == 0
+        else:
+            assert result["queries"] >= 1
+
+
+@pytest.mark.django_db
+def test_run_benchmarks_only() -> None:
+    results = run_benchmarks(
+        shipments=5,
+        iterations=2,
+        warmup=0,
+        weather_latency=0,
+        only=["get_weather*"],
+    )
+
+    assert [result["name"] for result in results] == [
+        "get_weather",
+        "get_weather_uncached",
+    ]
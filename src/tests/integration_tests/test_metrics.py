@@ -0,0 +1,86 @@
+from typing import Optional
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+
+def get_sample(name: str, **labels: str) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+@pytest.mark.django_db
+def test_metrics(api_client: APIClient) -> None:
+    api_client.get(reverse("ping"))
+
+    response = api_client.get(reverse("metrics"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    content = response.content.decode()
+    assert "http_request_duration_seconds_bucket" in content
+    assert 'view="ping"' in content
+    assert "weather_api_request_duration_seconds" in content
+    assert "local_cache_hits_total" in content
+
+
+@pytest.mark.django_db
+def test_metrics_forbidden_outside_allowed_networks(
+    api_client: APIClient,
+) -> None:
+    response = api_client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.7")
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+@override_settings(METRICS_TOKEN="scrape-token")
+def test_metrics_bearer_token(api_client: APIClient) -> None:
+    url = reverse("metrics")
+
+    response = api_client.get(
+        url,
+        REMOTE_ADDR="203.0.113.7",
+        HTTP_AUTHORIZATION="Bearer scrape-token",
+    )
+    assert response.status_code == 200
+
+    response = api_client.get(
+        url, REMOTE_ADDR="203.0.113.7", HTTP_AUTHORIZATION="Bearer wrong"
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_metrics_request_latency(api_client: APIClient) -> None:
+    labels = {"view": "ping", "method": "GET", "status": "200"}
+    count = get_sample("http_request_duration_seconds_count", **labels)
+
+    api_client.get(reverse("ping"))
+
+    assert get_sample("http_request_duration_seconds_count", **labels) == (
+        count + 1
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_db_queries(auth_api_client_superuser: APIClient) -> None:
+    view = "address-list"
+    queries = get_sample("http_request_db_queries_sum", view=view)
+    count = get_sample("http_request_db_queries_count", view=view)
+    duration = get_sample(
+        "http_request_db_query_duration_seconds_sum", view=view
+    )
+
+    response = auth_api_client_superuser.get(reverse(view))
+
+    assert response.status_code == 200
+    assert get_sample("http_request_db_queries_count", view=view) == count + 1
+    assert get_sample("http_request_db_queries_sum", view=view) > queries
+    assert (
+        get_sample("http_request_db_query_duration_seconds_sum", view=view)
+        > duration
+    )
@@ -0,0 +1,85 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AbstractBaseUser, Group, Permission
+from django.urls import reverse
+from model_bakery import baker
+from pytest_django import (
+    DjangoAssertNumQueries,
+    DjangoCaptureOnCommitCallbacks,
+)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from parcel.models import UserShipment
+from utils.permissions import get_required_permissions, has_perms
+
+
+UserModel = get_user_model()
+VIEW_PERMISSION = "parcel.view_usershipment"
+
+
+def reload_user(user: AbstractBaseUser) -> AbstractBaseUser:
+    # a new user object, like the one of the next request
+    return UserModel.objects.get(pk=user.pk)
+
+
+def test_required_permissions_are_memoized() -> None:
+    permissions = get_required_permissions("GET", UserShipment)
+
+    assert permissions == (VIEW_PERMISSION,)
+    assert get_required_permissions("GET", UserShipment) is permissions
+
+
+@pytest.mark.django_db
+def test_permissions_cached_across_requests(
+    user: AbstractBaseUser,
+    django_assert_num_queries: DjangoAssertNumQueries,
+) -> None:
+    baker.make(UserShipment, user=user, _quantity=3)
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    url = reverse("usershipment-list")
+    params = {"omit": "receiver_weather"}
+    client.get(url, params)
+
+    # count and page, the token and the permissions are cached
+    with django_assert_num_queries(2):
+        response = client.get(url, params)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_user_permission_change_invalidates_cache(
+    user: AbstractBaseUser,
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    assert not has_perms(user, [VIEW_PERMISSION])
+
+    permission = Permission.objects.get(codename="view_usershipment")
+    with django_capture_on_commit_callbacks(execute=True):
+        user.user_permissions.add(permission)  # type: ignore[attr-defined]
+
+    assert has_perms(reload_user(user), [VIEW_PERMISSION])
+
+
+@pytest.mark.django_db
+def test_group_permission_change_invalidates_cache(
+    user: AbstractBaseUser,
+    django_capture_on_commit_callbacks: DjangoCaptureOnCommitCallbacks,
+) -> None:
+    group = baker.make(Group)
+    user.groups.add(group)  # type: ignore[attr-defined]
+    assert not has_perms(reload_user(user), [VIEW_PERMISSION])
+
+    permission = Permission.objects.get(codename="view_usershipment")
+    with django_capture_on_commit_callbacks(execute=True):
+        group.permissions.add(permission)
+
+    assert has_perms(reload_user(user), [VIEW_PERMISSION])
+
+
+@pytest.mark.django_db
+def test_superuser_has_all_permissions(superuser: AbstractBaseUser) -> None:
+    assert has_perms(superuser, [VIEW_PERMISSION, "parcel.add_usershipment"])
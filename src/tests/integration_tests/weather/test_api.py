@@ -1,17 +1,21 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
+import httpx
+from asgiref.sync import async_to_sync
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
+
+from weather.views import AsyncWeatherView
 
 
 def test_weather_view_success(
-    api_client: APIClient, mock_requests_get: MagicMock
+    api_client: APIClient, mock_http_get: MagicMock
 ) -> None:
     mock_response = MagicMock()
     mock_response.json.return_value = {"weather": "sunny"}
     mock_response.raise_for_status.return_value = None
-    mock_requests_get.return_value = mock_response
+    mock_http_get.return_value = mock_response
 
     url = reverse("get-weather")
     response = api_client.get(url, {"postal_code": "90766", "country": "DE"})
@@ -19,6 +23,18 @@ def test_weather_view_success(
     assert response.data == {"weather": "sunny"}
 
 
+def test_weather_view_empty_upstream_response(
+    api_client: APIClient, mock_http_get: MagicMock
+) -> None:
+    mock_http_get.return_value = httpx.Response(
+        204, request=httpx.Request("GET", "https://api")
+    )
+
+    url = reverse("get-weather")
+    response = api_client.get(url, {"postal_code": "90766", "country": "DE"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_weather_view_missing_query_params(api_client: APIClient) -> None:
     url = reverse("get-weather")
     response = api_client.get(url)
@@ -26,3 +42,26 @@ def test_weather_view_missing_query_params(api_client: APIClient) -> None:
     assert isinstance(response.data, dict)
     assert "postal_code" in response.data
     assert "country" in response.data
+
+
+def test_async_weather_view_success(mock_http_aget: AsyncMock) -> None:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"weather": "sunny"}
+    mock_response.raise_for_status.return_value = None
+    mock_http_aget.return_value = mock_response
+
+    request = APIRequestFactory().get(
+        "/get-weather/", {"postal_code": "90766", "country": "DE"}
+    )
+    response = async_to_sync(AsyncWeatherView.as_view())(request)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {"weather": "sunny"}
+
+
+def test_async_weather_view_missing_query_params() -> None:
+    request = APIRequestFactory().get("/get-weather/")
+    response = async_to_sync(AsyncWeatherView.as_view())(request)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "postal_code" in response.data
@@ -0,0 +1,106 @@
+from collections.abc import Awaitable, Callable
+from typing import Any, cast
+from unittest.mock import MagicMock
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+
+from backend.middleware.profiler import ProfilerMiddleware
+from utils.cache_utils import cache
+from utils.metrics import track_queries
+
+
+UserModel = get_user_model()
+
+
+def get_response(request: HttpRequest) -> HttpResponse:
+    UserModel.objects.count()
+    cache.get("profiled")
+    return HttpResponse()
+
+
+def get_middleware(
+    get_response: Callable[[HttpRequest], Any]
+) -> ProfilerMiddleware:
+    middleware = ProfilerMiddleware(get_response)
+    middleware.sample_rate = 0.0
+    middleware.token = "secret"
+    middleware.slow_request_threshold = 60.0
+    return middleware
+
+
+def test_profiler_skips_requests_by_default(
+    request_factory: RequestFactory,
+) -> None:
+    middleware = get_middleware(MagicMock(return_value=HttpResponse()))
+
+    response = middleware(request_factory.get("/api/"))
+
+    assert isinstance(response, HttpResponse)
+    assert "Server-Timing" not in response
+
+
+def test_profiler_ignores_wrong_token(request_factory: RequestFactory) -> None:
+    middleware = get_middleware(MagicMock(return_value=HttpResponse()))
+
+    response = middleware(request_factory.get("/api/", HTTP_X_PROFILE="wrong"))
+
+    assert isinstance(response, HttpResponse)
+    assert "Server-Timing" not in response
+
+
+@pytest.mark.django_db
+def test_profiler_server_timing(request_factory: RequestFactory) -> None:
+    middleware = get_middleware(get_response)
+
+    # the queries are still recorded for outer trackers
+    with track_queries() as queries:
+        response = middleware(
+            request_factory.get("/api/", HTTP_X_PROFILE="secret")
+        )
+
+    assert isinstance(response, HttpResponse)
+    server_timing = response["Server-Timing"]
+    assert "cache;dur=" in server_timing
+    assert 'desc="1 cache calls"' in server_timing
+    assert 'desc="1 SQL queries"' in server_timing
+    assert "total;dur=" in server_timing
+    assert queries.count == 1
+
+
+@pytest.mark.django_db
+def test_profiler_logs_sampled_slow_requests(
+    request_factory: RequestFactory,
+) -> None:
+    middleware = get_middleware(get_response)
+    middleware.sample_rate = 1.0
+    middleware.slow_request_threshold = 0.0
+    middleware.logger = MagicMock()
+
+    middleware(request_factory.get("/api/"))
+
+    middleware.logger.warning.assert_called_once()
+    log_data = middleware.logger.warning.call_args.kwargs["msg"]
+    assert log_data["request_path"] == "/api/"
+    assert log_data["timings"]["db"]["count"] == 1
+    assert log_data["timings"]["cache"]["count"] == 1
+
+
+@pytest.mark.django_db
+def test_profiler_async_request(request_factory: RequestFactory) -> None:
+    async def aget_response(request: HttpRequest) -> HttpResponse:
+        return await sync_to_async(get_response)(request)
+
+    middleware = get_middleware(aget_response)
+    handler = cast(
+        Callable[[HttpRequest], Awaitable[HttpResponse]], middleware
+    )
+
+    response = async_to_sync(handler)(
+        request_factory.get("/api/", HTTP_X_PROFILE="secret")
+    )
+
+    assert 'desc="1 SQL queries"' in response["Server-Timing"]
@@ -1,8 +1,12 @@
 import json
 import logging
+from collections.abc import Awaitable, Callable
+from typing import cast
 from unittest.mock import MagicMock
 
 import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpRequest, HttpResponse
 from django.test import RequestFactory
 
 from backend.middleware.request_log import RequestLogMiddleware
@@ -26,6 +30,7 @@ def test_middleware_logging_successful_request(
 
     with caplog.at_level(logging.INFO):
         response = request_log_middleware(request)
+        assert isinstance(response, HttpResponse)
         assert response.status_code == 200
 
     assert len(caplog.records) == 1
@@ -55,3 +60,64 @@ def test_middleware_process_exception_logs_error(
     log_record = caplog.records[0]
     assert log_record.levelname == "ERROR"
     assert "Unhandled Exception: Test exception" in log_record.message
+
+
+def test_middleware_computes_hostname_once(
+    request_log_middleware: RequestLogMiddleware,
+    request_factory: RequestFactory,
+    mocker: MagicMock,
+) -> None:
+    gethostname = mocker.patch("socket.gethostname", return_value="server")
+
+    request_log_middleware(request_factory.get("/api/test/"))
+    request_log_middleware(request_factory.get("/api/test/"))
+
+    gethostname.assert_called_once_with()
+
+
+def test_middleware_samples_successful_requests(
+    caplog: pytest.LogCaptureFixture,
+    request_log_middleware: RequestLogMiddleware,
+    request_factory: RequestFactory,
+) -> None:
+    request_log_middleware.sample_rate = 0
+
+    with caplog.at_level(logging.INFO):
+        request_log_middleware(request_factory.get("/api/test/"))
+
+    assert not caplog.records
+
+
+def test_middleware_logs_failed_requests_when_sampling(
+    caplog: pytest.LogCaptureFixture,
+    request_factory: RequestFactory,
+) -> None:
+    middleware = RequestLogMiddleware(
+        MagicMock(return_value=HttpResponse(status=500))
+    )
+    middleware.sample_rate = 0
+
+    with caplog.at_level(logging.INFO):
+        middleware(request_factory.get("/api/test/"))
+
+    assert len(caplog.records) == 1
+    assert "'status_code': 500" in caplog.records[0].message
+
+
+def test_middleware_async_request(
+    caplog: pytest.LogCaptureFixture,
+    request_factory: RequestFactory,
+) -> None:
+    async def get_response(request: HttpRequest) -> HttpResponse:
+        return HttpResponse()
+
+    middleware = RequestLogMiddleware(get_response)
+    handler = cast(
+        Callable[[HttpRequest], Awaitable[HttpResponse]], middleware
+    )
+
+    with caplog.at_level(logging.INFO):
+        response = async_to_sync(handler)(request_factory.get("/api/"))
+
+    assert response.status_code == 200
+    assert len(caplog.records) == 1
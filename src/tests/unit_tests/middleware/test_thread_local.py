@@ -45,6 +45,7 @@ def test_thread_local_middleware(http_request: HttpRequest) -> None:
     middleware = ThreadLocalMiddleware(get_response)
     response = middleware(http_request)
 
+    assert isinstance(response, HttpResponse)
     assert response.status_code == 200
     assert get_current_request() == http_request
 
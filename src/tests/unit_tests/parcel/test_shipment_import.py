@@ -0,0 +1,76 @@
+from pathlib import Path
+
+from parcel.services.shipment_import import (
+    ByteRange,
+    ImportCheckpoint,
+    read_byte_range,
+    split_byte_ranges,
+)
+
+
+CSV_CONTENT = (
+    "tracking_number,carrier,status\n"
+    'TN1,DHL,"in-transit"\n'
+    "TN2,UPS,scanned\n"
+    "TN3,DPD,delivery\n"
+    "TN4,DHL,transit\n"
+)
+
+
+def write_csv(tmp_path: Path) -> str:
+    path = tmp_path / "shipments.csv"
+    path.write_text(CSV_CONTENT, encoding="utf-8")
+    return str(path)
+
+
+def test_split_byte_ranges_covers_every_row(tmp_path: Path) -> None:
+    filepath = write_csv(tmp_path)
+
+    fieldnames, ranges = split_byte_ranges(filepath, range_size=20)
+
+    assert fieldnames == ["tracking_number", "carrier", "status"]
+    assert len(ranges) > 1
+    assert ranges[-1].end == len(CSV_CONTENT)
+    for previous, current in zip(ranges, ranges[1:]):
+        assert previous.end == current.start
+
+    rows = [
+        row
+        for byte_range in ranges
+        for row in read_byte_range(filepath, fieldnames, byte_range)
+    ]
+    assert [row["tracking_number"] for row in rows] == [
+        "TN1",
+        "TN2",
+        "TN3",
+        "TN4",
+    ]
+    assert rows[0]["status"] == "in-transit"
+
+
+def test_checkpoint_resumes_done_ranges(tmp_path: Path) -> None:
+    filepath = write_csv(tmp_path)
+    checkpoint_path = str(tmp_path / "import.checkpoint")
+
+    checkpoint = ImportCheckpoint(checkpoint_path, filepath, range_size=20)
+    checkpoint.mark_done(ByteRange(31, 50))
+
+    resumed = ImportCheckpoint(checkpoint_path, filepath, range_size=20)
+    assert resumed.load() == {31}
+
+    resumed.remove()
+    assert not Path(checkpoint_path).exists()
+
+
+def test_checkpoint_ignored_when_source_changes(tmp_path: Path) -> None:
+    filepath = write_csv(tmp_path)
+    checkpoint_path = str(tmp_path / "import.checkpoint")
+    ImportCheckpoint(checkpoint_path, filepath, range_size=20).mark_done(
+        ByteRange(31, 50)
+    )
+
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write("TN5,UPS,scanned\n")
+
+    assert not ImportCheckpoint(checkpoint_path, filepath, 20).load()
+    assert not ImportCheckpoint(checkpoint_path, filepath, 40).load()
@@ -1,3 +1,6 @@
+from collections.abc import Generator
+from unittest.mock import patch
+
 import pytest
 
 from utils.base_models import Base
@@ -11,6 +14,8 @@ class ConcreteBase(Base):
 
 
 @pytest.fixture
-def base_instance() -> ConcreteBase:
+def base_instance() -> Generator[ConcreteBase, None, None]:
     """Fixture to create a ConcreteBase instance."""
-    return ConcreteBase()
+    # the generation is bumped after the commit, there is no database here
+    with patch.object(ConcreteBase, "bump_generation"):
+        yield ConcreteBase()
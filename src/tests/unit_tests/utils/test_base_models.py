@@ -1,3 +1,4 @@
+from typing import Any
 from unittest.mock import patch
 
 from django.utils import timezone
@@ -15,21 +16,29 @@ def test_save_sets_timestamp(base_instance: ConcreteBase) -> None:
     assert base_instance.timestamp is not None
 
 
-def test_save_update_timestamp(base_instance: ConcreteBase) -> None:
+def test_save_refreshes_timestamp(base_instance: ConcreteBase) -> None:
     """
-    Test that the save method updates the timestamp
-    if update_timestamp is True.
+    Test that the save method updates the timestamp on every save.
     """
     # Initial state
     old_timestamp = timezone.now()
     base_instance.timestamp = old_timestamp
 
     with patch("django.db.models.Model.save", return_value=None):
-        base_instance.save(update_timestamp=True)
+        base_instance.save()
 
     assert base_instance.timestamp > old_timestamp
 
 
+def test_save_update_fields_include_timestamp(
+    base_instance: ConcreteBase,
+) -> None:
+    with patch("django.db.models.Model.save", return_value=None) as save:
+        base_instance.save(update_fields=["trashed"])
+
+    save.assert_called_once_with(update_fields=["trashed", "timestamp"])
+
+
 def test_delete_soft(base_instance: ConcreteBase) -> None:
     """
     Test that the delete method sets the
@@ -63,3 +72,21 @@ def test_delete_forced(base_instance: ConcreteBase) -> None:
 
     assert count == 1
     assert details == {"utils.ConcreteBase": 1}
+
+
+def test_save_bumps_generation(base_instance: ConcreteBase) -> None:
+    with patch("django.db.models.Model.save", return_value=None):
+        base_instance.save()
+
+    bump_generation: Any = base_instance.bump_generation
+    bump_generation.assert_called_once_with()
+
+
+def test_bump_generation_only_for_cached_models() -> None:
+    with patch("django.db.transaction.on_commit") as on_commit:
+        ConcreteBase.bump_generation()
+        on_commit.assert_not_called()
+
+        with patch.object(ConcreteBase, "cache_generation", True):
+            ConcreteBase.bump_generation()
+        on_commit.assert_called_once()
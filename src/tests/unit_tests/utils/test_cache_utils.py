@@ -0,0 +1,255 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+
+from utils import cache_utils
+from utils.cache_utils import (
+    AsyncSingleFlight,
+    CacheNamespace,
+    LocalCache,
+    SingleFlight,
+    acquire_cache_lock,
+    aget_two_tier,
+    aset_two_tier,
+    bump_generation,
+    get_cached_response,
+    get_cached_weather,
+    get_generation,
+    get_generation_cache_key,
+    get_many_cached_weather,
+    get_two_tier,
+    handle_invalidation_message,
+    invalidate_cached_weather,
+    is_cache_locked,
+    is_weather_error_cached,
+    local_cache,
+    local_cache_hits,
+    local_cache_misses,
+    release_cache_lock,
+    set_cached_response,
+    set_cached_weather,
+    set_cached_weather_error,
+    set_two_tier,
+    weather_cache_hits,
+    weather_cache_misses,
+)
+
+
+def test_single_flight_coalesces_concurrent_calls() -> None:
+    """
+    Test that concurrent calls with the same key run the function once.
+    """
+    single_flight: SingleFlight[int] = SingleFlight()
+    calls: list[int] = []
+    started = threading.Event()
+
+    def func() -> int:
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(single_flight.do, "key", func)
+        started.wait()
+        followers = [
+            executor.submit(single_flight.do, "key", func) for _ in range(4)
+        ]
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == [42] * 5
+    assert len(calls) == 1
+
+
+def test_single_flight_propagates_exception() -> None:
+    single_flight: SingleFlight[int] = SingleFlight()
+
+    def func() -> int:
+        raise ValueError("upstream error")
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", func)
+
+    # the failed call is not remembered
+    assert single_flight.do("key", lambda: 1) == 1
+
+
+def test_async_single_flight_coalesces_concurrent_calls() -> None:
+    single_flight: AsyncSingleFlight[int] = AsyncSingleFlight()
+    calls: list[int] = []
+
+    async def func() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def run() -> list[int]:
+        return await asyncio.gather(
+            *(single_flight.do("key", func) for _ in range(5))
+        )
+
+    assert asyncio.run(run()) == [42] * 5
+    assert len(calls) == 1
+
+
+def test_async_two_tier_skips_thread_once_listening(
+    mocker: MagicMock,
+) -> None:
+    asyncio.run(aset_two_tier("async-key", 1, 60))
+    sync_to_async = mocker.patch(
+        "utils.cache_utils.sync_to_async", wraps=cache_utils.sync_to_async
+    )
+
+    assert asyncio.run(aget_two_tier("async-key")) == 1
+    assert not sync_to_async.called
+
+    asyncio.run(aset_two_tier("async-key", 2, 60))
+    # only publishing the invalidation runs in a thread
+    sync_to_async.assert_called_once_with(
+        cache_utils.publish_invalidation, thread_sensitive=False
+    )
+
+
+def test_cache_lock() -> None:
+    token = acquire_cache_lock("test-lock", 10)
+    assert token is not None
+    assert is_cache_locked("test-lock")
+    assert acquire_cache_lock("test-lock", 10) is None
+
+    # only the owner can release the lock
+    release_cache_lock("test-lock", "other-token")
+    assert is_cache_locked("test-lock")
+
+    release_cache_lock("test-lock", token)
+    assert not is_cache_locked("test-lock")
+
+
+def test_local_cache_evicts_least_recently_used() -> None:
+    lru = LocalCache(max_size=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+
+    assert len(lru) == 2
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.get("c") == 3
+
+
+def test_local_cache_ttl() -> None:
+    lru = LocalCache(max_size=2, ttl=60)
+    lru.set("a", 1, ttl=0)
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+
+def test_local_cache_counters() -> None:
+    lru = LocalCache(max_size=2, ttl=60)
+    hits, misses = local_cache_hits.value, local_cache_misses.value
+    lru.set("a", 1)
+    lru.get("a")
+    lru.get("b")
+
+    assert local_cache_hits.value == hits + 1
+    assert local_cache_misses.value == misses + 1
+
+
+def test_get_two_tier_uses_local_cache() -> None:
+    set_two_tier("two-tier-key", "value", 60)
+
+    with patch.object(cache, "get") as mock_cache_get:
+        assert get_two_tier("two-tier-key") == "value"
+    mock_cache_get.assert_not_called()
+
+    # falls back to the shared cache and fills the local one
+    local_cache.delete("two-tier-key")
+    assert get_two_tier("two-tier-key") == "value"
+    assert local_cache.get("two-tier-key") == "value"
+
+
+def test_handle_invalidation_message() -> None:
+    local_cache.set("invalidated-key", "value")
+    local_cache.set("other-key", "value")
+    handle_invalidation_message(
+        json.dumps({"sender": "other-process", "keys": ["invalidated-key"]})
+    )
+
+    assert local_cache.get("invalidated-key") is None
+    assert local_cache.get("other-key") == "value"
+
+
+def test_bump_generation() -> None:
+    generation = get_generation("tests.Model")
+    assert get_generation("tests.Model") == generation
+
+    bump_generation("tests.Model")
+    assert get_generation("tests.Model") == generation + 1
+
+
+def test_bump_generation_after_eviction() -> None:
+    generation = get_generation("tests.Model")
+    cache.delete(get_generation_cache_key("tests.Model"))
+
+    bump_generation("tests.Model")
+    assert get_generation("tests.Model") > generation
+
+
+def test_cached_response_is_versioned() -> None:
+    key, cached = get_cached_response("tests.Model", "/url/")
+    assert cached is None
+    set_cached_response(key, {"data": []})
+    assert get_cached_response("tests.Model", "/url/") == (key, {"data": []})
+
+    bump_generation("tests.Model")
+    assert get_cached_response("tests.Model", "/url/")[1] is None
+
+
+def test_cache_namespace_invalidate() -> None:
+    namespace = CacheNamespace("tests")
+    key = namespace.get_key("key")
+    set_two_tier(key, "value", 60)
+    assert namespace.get_keys(["key"]) == [key]
+
+    namespace.invalidate()
+
+    # the generation is dropped from the local caches of every process
+    assert local_cache.get(get_generation_cache_key("tests")) is None
+    assert namespace.get_key("key") != key
+    assert get_two_tier(namespace.get_key("key")) is None
+
+
+def test_cache_namespace_async_keys() -> None:
+    namespace = CacheNamespace("tests")
+    key = namespace.get_key("key")
+
+    assert asyncio.run(namespace.aget_key("key")) == key
+    assert asyncio.run(namespace.aget_keys(["key"])) == [key]
+
+
+def test_invalidate_cached_weather() -> None:
+    set_cached_weather("80331", "DE", {"temp": 21})
+    set_cached_weather_error("10115", "DE")
+
+    invalidate_cached_weather()
+
+    assert get_cached_weather("80331", "DE") is None
+    assert not get_many_cached_weather([("80331", "DE")])
+    assert not is_weather_error_cached("10115", "DE")
+
+
+def test_weather_cache_counters() -> None:
+    hits, misses = weather_cache_hits.value, weather_cache_misses.value
+    get_cached_weather("12345", "DE")
+    set_cached_weather("12345", "DE", {"weather": "sunny"})
+    get_cached_weather("12345", "DE")
+    get_many_cached_weather([("12345", "DE"), ("54321", "DE")])
+
+    assert weather_cache_hits.value == hits + 2
+    assert weather_cache_misses.value == misses + 2
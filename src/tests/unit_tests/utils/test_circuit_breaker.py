@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from utils.circuit_breaker import CircuitBreaker
+
+
+def test_circuit_opens_after_threshold() -> None:
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+
+def test_circuit_success_resets_failures() -> None:
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_half_open_probe() -> None:
+    """
+    Test that a single probe is let through after the recovery timeout
+    and that its result decides the state of the circuit.
+    """
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30)
+    with patch("utils.circuit_breaker.time.monotonic", return_value=100):
+        breaker.record_failure()
+
+    with patch("utils.circuit_breaker.time.monotonic", return_value=131):
+        assert not breaker.is_open
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # the probe is in flight
+        assert not breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    with patch("utils.circuit_breaker.time.monotonic", return_value=162):
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
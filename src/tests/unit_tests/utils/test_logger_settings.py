@@ -0,0 +1,39 @@
+import logging
+
+from utils.logger_settings import QueueListenerHandler
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def test_queue_listener_handler_ships_records() -> None:
+    target = CollectingHandler()
+    handler = QueueListenerHandler([target])
+    logger = logging.getLogger("tests.queue_listener")
+    logger.addHandler(handler)
+    try:
+        logger.warning({"key": "value"})
+    finally:
+        logger.removeHandler(handler)
+
+    # stopping the listener processes the queued records
+    handler.stop()
+    assert len(target.records) == 1
+    # records are handed over as they are
+    assert target.records[0].msg == {"key": "value"}
+
+
+def test_queue_listener_handler_respects_handler_level() -> None:
+    target = CollectingHandler()
+    target.setLevel(logging.ERROR)
+    handler = QueueListenerHandler([target])
+    handler.handle(logging.makeLogRecord({"levelno": logging.INFO}))
+
+    handler.stop()
+    assert not target.records
@@ -0,0 +1,69 @@
+import io
+import uuid
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from utils.parsers import ORJSONParser
+from utils.renderers import ORJSONRenderer
+
+
+DATA = {
+    "id": uuid.UUID("6b1f5b7e-34c1-4c4a-9d0a-53d57ad1a5c9"),
+    "price": Decimal("10.50"),
+    "timestamp": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=UTC),
+    "detail": gettext_lazy("Not found."),
+    "text": "Grüße \u2028 \u2029",
+    "items": [1, 2.5, None, True],
+    1: "non string key",
+}
+
+
+def test_orjson_renderer_matches_json_renderer() -> None:
+    assert ORJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_orjson_renderer_indent() -> None:
+    rendered = ORJSONRenderer().render(
+        {"a": 1}, accepted_media_type="application/json; indent=4"
+    )
+
+    assert rendered == b'{\n    "a": 1\n}'
+
+
+def test_orjson_renderer_none() -> None:
+    assert ORJSONRenderer().render(None) == b""
+
+
+def test_orjson_renderer_large_integer() -> None:
+    data = {"a": 2**70}
+
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_orjson_parser() -> None:
+    stream = io.BytesIO('{"name": "Grüße", "items": [1, 2]}'.encode())
+
+    assert ORJSONParser().parse(stream) == {
+        "name": "Grüße",
+        "items": [1, 2],
+    }
+
+
+def test_orjson_parser_other_encoding() -> None:
+    stream = io.BytesIO('{"name": "Grüße"}'.encode("latin-1"))
+
+    parsed = ORJSONParser().parse(
+        stream, parser_context={"encoding": "latin-1"}
+    )
+
+    assert parsed == {"name": "Grüße"}
+
+
+def test_orjson_parser_error() -> None:
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(b"{invalid"))
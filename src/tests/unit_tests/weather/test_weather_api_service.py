@@ -1,19 +1,44 @@
-from unittest.mock import MagicMock
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
 
+import httpx
 import pytest
-from requests.exceptions import RequestException
 from rest_framework.exceptions import ValidationError
 
-from weather.services.weather_api import WeatherConnector, get_weather
+from utils.cache_utils import (
+    acquire_cache_lock,
+    get_cached_weather,
+    get_weather_cache_key,
+    release_cache_lock,
+    set_cached_weather,
+)
+from utils.profiler import profile_request
+from weather.services.weather_api import (
+    WeatherConnector,
+    aget_weather,
+    aget_weather_bulk,
+    get_weather,
+    get_weather_bulk,
+    serve_stale_weather,
+    stale_weather_served,
+    weather_api_errors,
+    weather_circuit_breaker,
+    weather_refresh_failures,
+    weather_refreshes,
+)
 
 
 def test_fetch_weather_by_postal_code_success(
-    mock_requests_get: MagicMock,
+    mock_http_get: MagicMock,
 ) -> None:
     mock_response = MagicMock()
     mock_response.json.return_value = {"weather": "sunny"}
     mock_response.raise_for_status.return_value = None
-    mock_requests_get.return_value = mock_response
+    mock_http_get.return_value = mock_response
 
     weather_connector = WeatherConnector()
     result = weather_connector.fetch_weather_by_postal_code("12345", "US")
@@ -21,20 +46,57 @@ def test_fetch_weather_by_postal_code_success(
 
 
 def test_fetch_weather_by_postal_code_failure(
-    mock_requests_get: MagicMock,
+    mock_http_get: MagicMock,
 ) -> None:
-    mock_requests_get.side_effect = RequestException("Error")
+    mock_http_get.side_effect = httpx.ConnectError("Error")
+
+    errors = weather_api_errors.value
 
     weather_connector = WeatherConnector()
     with pytest.raises(ValidationError):
         weather_connector.fetch_weather_by_postal_code("invalid", "US")
+    assert weather_api_errors.value == errors + 1
+
+
+def invalid_body_response(status_code: int, text: str) -> httpx.Response:
+    return httpx.Response(
+        status_code, text=text, request=httpx.Request("GET", "https://api")
+    )
+
+
+@pytest.mark.parametrize(
+    "status_code, text", [(204, ""), (200, "<html>Bad gateway</html>")]
+)
+def test_fetch_weather_by_postal_code_invalid_body(
+    mock_http_get: MagicMock, status_code: int, text: str
+) -> None:
+    mock_http_get.return_value = invalid_body_response(status_code, text)
+    errors = weather_api_errors.value
+
+    with pytest.raises(ValidationError):
+        WeatherConnector().fetch_weather_by_postal_code("12345", "US")
+    assert weather_api_errors.value == errors + 1
+
+
+@pytest.mark.parametrize(
+    "status_code, text", [(204, ""), (200, "<html>Bad gateway</html>")]
+)
+def test_afetch_weather_by_postal_code_invalid_body(
+    mock_http_aget: AsyncMock, status_code: int, text: str
+) -> None:
+    mock_http_aget.return_value = invalid_body_response(status_code, text)
+
+    with pytest.raises(ValidationError):
+        asyncio.run(
+            WeatherConnector().afetch_weather_by_postal_code("12345", "US")
+        )
 
 
-def test_get_weather_fetch_and_cache(mock_requests_get: MagicMock) -> None:
+def test_get_weather_fetch_and_cache(mock_http_get: MagicMock) -> None:
     mock_response = MagicMock()
     mock_response.json.return_value = {"weather": "sunny"}
     mock_response.raise_for_status.return_value = None
-    mock_requests_get.return_value = mock_response
+    mock_http_get.return_value = mock_response
 
     result = get_weather("12345", "US")
     assert result == {"weather": "sunny"}
@@ -42,6 +104,248 @@ def test_get_weather_fetch_and_cache(mock_requests_get: MagicMock) -> None:
     # Ensure the data is cached
     mock_response.json.return_value = {"weather": "rainy"}
     mock_response.raise_for_status.return_value = None
-    mock_requests_get.return_value = mock_response
+    mock_http_get.return_value = mock_response
     result = get_weather("12345", "US")
     assert result == {"weather": "sunny"}
+
+
+def test_get_weather_bulk_fetches_each_location_once(
+    mock_http_get: MagicMock,
+) -> None:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"weather": "cloudy"}
+    mock_response.raise_for_status.return_value = None
+    mock_http_get.return_value = mock_response
+
+    locations = [("10115", "DE"), ("75001", "FR"), ("10115", "DE")]
+    result = get_weather_bulk(locations)
+
+    assert result == {
+        ("10115", "DE"): {"weather": "cloudy"},
+        ("75001", "FR"): {"weather": "cloudy"},
+    }
+    assert mock_http_get.call_count == 2
+
+    # Second call is served from the cache only
+    get_weather_bulk(locations)
+    assert mock_http_get.call_count == 2
+
+
+def test_get_weather_bulk_profiles_fetch_threads(
+    mock_http_get: MagicMock,
+) -> None:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"weather": "cloudy"}
+    mock_response.raise_for_status.return_value = None
+    mock_http_get.return_value = mock_response
+
+    with profile_request() as profile:
+        get_weather_bulk([("10115", "DE"), ("75001", "FR")])
+
+    assert profile.timings["http"].count == 2
+
+
+def test_get_weather_bulk_failure(mock_http_get: MagicMock) -> None:
+    mock_http_get.side_effect = httpx.ConnectError("Error")
+
+    result = get_weather_bulk([("00000", "XX")])
+    assert result == {("00000", "XX"): None}
+
+
+def test_weather_connector_reuses_client() -> None:
+    assert WeatherConnector().client is WeatherConnector().client
+
+
+def test_afetch_weather_by_postal_code_failure(
+    mock_http_aget: AsyncMock,
+) -> None:
+    mock_http_aget.side_effect = httpx.ConnectError("Error")
+
+    weather_connector = WeatherConnector()
+    with pytest.raises(ValidationError):
+        asyncio.run(
+            weather_connector.afetch_weather_by_postal_code("invalid", "US")
+        )
+
+
+def test_aget_weather_fetch_and_cache(mock_http_aget: AsyncMock) -> None:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"weather": "windy"}
+    mock_response.raise_for_status.return_value = None
+    mock_http_aget.return_value = mock_response
+
+    assert asyncio.run(aget_weather("54321", "US")) == {"weather": "windy"}
+    assert asyncio.run(aget_weather("54321", "US")) == {"weather": "windy"}
+    assert mock_http_aget.call_count == 1
+
+
+def test_aget_weather_bulk_fetches_each_location_once(
+    mock_http_aget: AsyncMock,
+) -> None:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"weather": "foggy"}
+    mock_response.raise_for_status.return_value = None
+    mock_http_aget.return_value = mock_response
+
+    locations = [("20144", "DE"), ("28013", "ES"), ("20144", "DE")]
+    result = asyncio.run(aget_weather_bulk(locations))
+
+    assert result == {
+        ("20144", "DE"): {"weather": "foggy"},
+        ("28013", "ES"): {"weather": "foggy"},
+    }
+    assert mock_http_aget.call_count == 2
+
+
+def test_get_weather_coalesces_concurrent_misses(
+    mock_http_get: MagicMock,
+) -> None:
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"weather": "stormy"}
+    mock_response.raise_for_status.return_value = None
+
+    def slow_get(*args: Any, **kwargs: Any) -> MagicMock:
+        time.sleep(0.1)
+        return mock_response
+
+    mock_http_get.side_effect = slow_get
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(
+            executor.map(lambda _: get_weather("01067", "DE"), range(5))
+        )
+
+    assert results == [{"weather": "stormy"}] * 5
+    assert mock_http_get.call_count == 1
+
+
+def test_get_weather_waits_for_other_process(mock_http_get: MagicMock) -> None:
+    """
+    Test that a miss waits for the lock holder to fill the cache
+    instead of calling the API again.
+    """
+    cache_key = get_weather_cache_key("04109", "DE")
+    token = acquire_cache_lock(cache_key, 10)
+    assert token is not None
+
+    def other_process() -> None:
+        time.sleep(0.1)
+        set_cached_weather("04109", "DE", {"weather": "hail"})
+        release_cache_lock(cache_key, token)
+
+    thread = threading.Thread(target=other_process)
+    thread.start()
+    result = get_weather("04109", "DE")
+    thread.join()
+
+    assert result == {"weather": "hail"}
+    mock_http_get.assert_not_called()
+
+
+def test_get_weather_serves_stale_and_refreshes(
+    mock_http_get: MagicMock,
+) -> None:
+    set_cached_weather("50667", "DE", {"weather": "old"}, soft_ttl=0)
+    stale_served = stale_weather_served.value
+    refreshes = weather_refreshes.value
+
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"weather": "new"}
+    mock_response.raise_for_status.return_value = None
+    mock_http_get.return_value = mock_response
+
+    future = serve_stale_weather("50667", "DE")
+    assert future is not None
+    future.result()
+
+    cached = get_cached_weather("50667", "DE")
+    assert cached is not None
+    assert cached.data == {"weather": "new"}
+    assert not cached.is_stale
+    assert stale_weather_served.value == stale_served + 1
+    assert weather_refreshes.value == refreshes + 1
+
+
+def test_get_weather_returns_stale_value_immediately(
+    mock_http_get: MagicMock,
+) -> None:
+    set_cached_weather("60311", "DE", {"weather": "old"}, soft_ttl=0)
+    # another process is already refreshing the location
+    cache_key = get_weather_cache_key("60311", "DE")
+    token = acquire_cache_lock(cache_key, 10)
+    assert token is not None
+
+    assert get_weather("60311", "DE") == {"weather": "old"}
+    mock_http_get.assert_not_called()
+    release_cache_lock(cache_key, token)
+
+
+def test_serve_stale_weather_refresh_failure(
+    mock_http_get: MagicMock,
+) -> None:
+    set_cached_weather("70173", "DE", {"weather": "old"}, soft_ttl=0)
+    failures = weather_refresh_failures.value
+    mock_http_get.side_effect = httpx.ConnectError("Error")
+
+    future = serve_stale_weather("70173", "DE")
+    assert future is not None
+    future.result()
+
+    cached = get_cached_weather("70173", "DE")
+    assert cached is not None
+    assert cached.data == {"weather": "old"}
+    assert weather_refresh_failures.value == failures + 1
+
+
+def test_serve_stale_weather_skips_refresh_in_progress() -> None:
+    cache_key = get_weather_cache_key("30159", "DE")
+    token = acquire_cache_lock(cache_key, 10)
+    assert token is not None
+
+    assert serve_stale_weather("30159", "DE") is None
+    release_cache_lock(cache_key, token)
+
+
+def test_get_weather_failure_is_cached(mock_http_get: MagicMock) -> None:
+    mock_http_get.side_effect = httpx.ConnectError("Error")
+
+    with pytest.raises(ValidationError):
+        get_weather("99999", "DE")
+    with pytest.raises(ValidationError):
+        get_weather("99999", "DE")
+    assert get_weather_bulk([("99999", "DE")]) == {("99999", "DE"): None}
+
+    assert mock_http_get.call_count == 1
+
+
+def test_client_error_does_not_open_circuit(mock_http_get: MagicMock) -> None:
+    mock_response = MagicMock()
+    mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
+        "Bad Request", request=MagicMock(), response=MagicMock(status_code=400)
+    )
+    mock_http_get.return_value = mock_response
+
+    weather_connector = WeatherConnector()
+    for _ in range(weather_circuit_breaker.failure_threshold):
+        with pytest.raises(ValidationError):
+            weather_connector.fetch_weather_by_postal_code("invalid", "US")
+
+    assert not weather_circuit_breaker.is_open
+
+
+def test_open_circuit_fails_fast(mock_http_get: MagicMock) -> None:
+    mock_http_get.side_effect = httpx.ConnectError("Error")
+
+    weather_connector = WeatherConnector()
+    for _ in range(weather_circuit_breaker.failure_threshold):
+        with pytest.raises(ValidationError):
+            weather_connector.fetch_weather_by_postal_code("11111", "US")
+    assert weather_circuit_breaker.is_open
+    mock_http_get.reset_mock()
+
+    with pytest.raises(ValidationError):
+        get_weather("22222", "US")
+    result = get_weather_bulk([("33333", "US"), ("44444", "US")])
+
+    assert result == {("33333", "US"): None, ("44444", "US"): None}
+    mock_http_get.assert_not_called()
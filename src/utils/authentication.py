@@ -0,0 +1,45 @@
+import copy
+from typing import Any
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from utils.cache_utils import get_cached_auth_token, set_cached_auth_token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication keeping the token with its user in the two-tier
+    cache for a short time, instead of querying both on every request.
+
+    Cached tokens are dropped once deleted, e.g. by the djoser logout
+    endpoint, and when their user is saved. The password hash of the
+    user is never cached, it is loaded on access like a deferred field.
+    """
+
+    def authenticate_credentials(self, key: str) -> tuple[Any, Any]:
+        token = get_cached_auth_token(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = (
+                    model.objects.select_related("user")
+                    .defer("user__password")
+                    .get(key=key)
+                )
+            except model.DoesNotExist as e:
+                raise exceptions.AuthenticationFailed(
+                    _("Invalid token.")
+                ) from e
+            set_cached_auth_token(key, token)
+        # the cached token is shared within the process,
+        # every request gets its own copy like one loaded from the database
+        token = copy.deepcopy(token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+
+        return (token.user, token)
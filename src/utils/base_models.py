@@ -1,10 +1,12 @@
 import uuid
 from typing import Any
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from simple_history.models import HistoricalRecords
 
+from utils import cache_utils
+
 
 class BaseManager(models.Manager["Base"]):
     """
@@ -37,6 +39,9 @@ class Base(models.Model):
 
     # Purely for mypy type checking
     Serializer: Any = None
+    # Models with cached responses, every change of them bumps
+    # the generation their cache keys are versioned with
+    cache_generation = False
 
     class Meta:
         abstract = True
@@ -51,25 +56,46 @@ class Base(models.Model):
             self.save()
 
     def save(self, *args: Any, **kwargs: Any) -> None:
-        if not self.timestamp:
-            self.timestamp = timezone.now()
-
-        update_timestamp = kwargs.pop("update_timestamp", False)
-        if update_timestamp:
-            self.timestamp = timezone.now()
+        # timestamp marks the last change, conditional requests rely on it
+        self.timestamp = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "timestamp" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "timestamp"]
 
         super().save(*args, **kwargs)
+        self.bump_generation()
 
     def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
         self._forced_delete = kwargs.pop(  # pylint: disable=attribute-defined-outside-init,line-too-long   # noqa
             "forced", False
         )
         if self._forced_delete:
-            return super().delete(*args, **kwargs)
+            deleted = super().delete(*args, **kwargs)
+            self.bump_generation()
+            return deleted
         self.trashed = True
-        self.save(update_timestamp=True)
+        self.save()
         return 1, {"backend.Base": 1}
 
+    @classmethod
+    def get_generation(cls) -> int:
+        """
+        Returns the generation of the model's data,
+        cached responses are versioned with it
+        """
+        return cache_utils.get_generation(cls._meta.label)
+
+    @classmethod
+    def bump_generation(cls) -> None:
+        """
+        Outdates the cached responses of the model once the transaction
+        commits, must be called after bulk queries which skip save()
+        """
+        if not cls.cache_generation:
+            return
+        label = cls._meta.label
+        transaction.on_commit(lambda: cache_utils.bump_generation(label))
+
 
 class BaseHistory(Base):
     """
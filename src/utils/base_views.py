@@ -1,34 +1,461 @@
-from typing import Any
+import hashlib
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import UTC, datetime
+from functools import partial
+from typing import Any, Optional
 
-from django.db.models import QuerySet
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.db.models import Count, Max, QuerySet
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
 from rest_framework.viewsets import ModelViewSet
 
-from utils.permissions import AllowObjOwner, CustomDjangoModelPermissions
+from utils.cache_utils import (
+    CACHE_TTL,
+    get_cached_response,
+    set_cached_response,
+)
+from utils.helpers import KeysetPagination
+from utils.permissions import (
+    AllowObjOwner,
+    CustomDjangoModelPermissions,
+    has_perms,
+)
 
 
-class BaseUserOwnedViewSet(ModelViewSet):
-    permission_classes = [AllowObjOwner]
+class ConditionalGetMixin:
+    """
+    Adds ETag headers to list and detail responses, Last-Modified to
+    detail responses, and answers matching conditional requests with
+    304 Not Modified before anything is serialized.
+
+    Validators are derived from the timestamp of the objects
+    (max timestamp and count for lists) and of their expanded
+    relations, combined with the requested URL and user.
+    Rows leaving a list, e.g. deleted ones, don't move its max
+    timestamp, so lists are only validated with the ETag.
+    """
 
     def get_list_queryset(self) -> QuerySet[Any]:
-        queryset: QuerySet[Any] = super().get_queryset()  # type: ignore[misc]
-        user = self.request.user
-        if user.has_perms(  # type: ignore[union-attr]
-            CustomDjangoModelPermissions.view_permissions
+        return self.get_queryset()  # type: ignore[attr-defined]
+
+    def get_conditional_relations(self) -> list[str]:
+        """
+        Relations rendered in the response, their timestamps are
+        part of the validators
+        """
+        return []
+
+    # Seconds for which data not covered by the timestamps,
+    # e.g. values from external APIs, is considered unchanged
+    freshness_window: Optional[int] = None
+
+    def get_freshness_window(self) -> Optional[int]:
+        return self.freshness_window
+
+    def get_timestamps(self, instance: Any) -> list[Optional[datetime]]:
+        timestamps = [instance.timestamp]
+        for relation in self.get_conditional_relations():
+            related = getattr(instance, relation, None)
+            timestamps.append(getattr(related, "timestamp", None))
+        return timestamps
+
+    def get_filtered_list_queryset(self) -> QuerySet[Any]:
+        queryset: QuerySet[Any] = (
+            self.filter_queryset(  # type: ignore[attr-defined]
+                self.get_list_queryset()
+            )
+        )
+        return queryset
+
+    def get_list_aggregates(self) -> dict[str, Any]:
+        return {
+            "count": Count("pk"),
+            "last_modified": Max("timestamp"),
+            **{
+                f"{relation}_last_modified": Max(f"{relation}__timestamp")
+                for relation in self.get_conditional_relations()
+            },
+        }
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Any:
+        queryset = self.get_filtered_list_queryset()
+        paginator = self.paginator  # type: ignore[attr-defined]
+        if isinstance(paginator, KeysetPagination) and paginator.is_keyset(
+            request
         ):
-            return queryset
-        return queryset.filter(user=user)
+            return self.keyset_list(request, queryset)
+
+        aggregates = queryset.aggregate(**self.get_list_aggregates())
+        count = aggregates.pop("count")
+        if isinstance(paginator, KeysetPagination):
+            paginator.known_count = count
+        return self.conditional_response(
+            request,
+            timestamps=aggregates.values(),
+            version=count,
+            get_response=lambda: self.list_response(queryset),
+            modified_since=False,
+        )
 
-    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        queryset: QuerySet[Any] = self.filter_queryset(
-            self.get_list_queryset()
+    def keyset_list(self, request: Request, queryset: QuerySet[Any]) -> Any:
+        """
+        Keyset pages skip the COUNT(*), so the validators
+        are derived from the page itself
+        """
+        page = self.paginate_queryset(queryset)  # type: ignore[attr-defined]
+        return self.conditional_response(
+            request,
+            timestamps=[
+                timestamp
+                for instance in page
+                for timestamp in self.get_timestamps(instance)
+            ],
+            version=",".join(str(instance.pk) for instance in page),
+            get_response=lambda: self.page_response(page),
+            modified_since=False,
         )
 
-        page = self.paginate_queryset(queryset)
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Any:
+        instance: Any = self.get_object()  # type: ignore[attr-defined]
+        return self.conditional_response(
+            request,
+            timestamps=self.get_timestamps(instance),
+            version=instance.pk,
+            get_response=lambda: Response(
+                self.get_serializer(  # type: ignore[attr-defined]
+                    instance
+                ).data
+            ),
+        )
+
+    def list_response(self, queryset: QuerySet[Any]) -> Response:
+        page = self.paginate_queryset(queryset)  # type: ignore[attr-defined]
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.page_response(page)
 
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(  # type: ignore[attr-defined]
+            queryset, many=True
+        )
         return Response(serializer.data)
+
+    def page_response(self, page: Any) -> Response:
+        serializer = self.get_serializer(  # type: ignore[attr-defined]
+            page, many=True
+        )
+        return self.get_paginated_response(  # type: ignore[attr-defined]
+            serializer.data
+        )
+
+    def conditional_response(
+        self,
+        request: Request,
+        timestamps: Iterable[Optional[datetime]],
+        version: Any,
+        get_response: Callable[[], HttpResponseBase],
+        modified_since: bool = True,
+    ) -> HttpResponseBase:
+        """
+        Validates the request, with Last-Modified unless
+        modified_since is disabled
+        """
+        etag, last_modified = self.get_validators(request, timestamps, version)
+        return self.validated_response(
+            request,
+            etag,
+            last_modified if modified_since else None,
+            get_response,
+        )
+
+    def get_validators(
+        self,
+        request: Request,
+        timestamps: Iterable[Optional[datetime]],
+        version: Any,
+    ) -> tuple[str, Optional[int]]:
+        timestamps = list(timestamps)
+        window = self.get_freshness_window()
+        if window:
+            window_start = int(time.time()) // window * window
+            timestamps.append(datetime.fromtimestamp(window_start, tz=UTC))
+        known = [timestamp for timestamp in timestamps if timestamp]
+        last_modified = int(max(known).timestamp()) if known else None
+
+        validator = "|".join(
+            [
+                request.get_full_path(),
+                str(request.user.pk),
+                str(version),
+                *(t.isoformat() if t else "" for t in timestamps),
+            ]
+        )
+        etag = f'"{hashlib.sha256(validator.encode()).hexdigest()[:32]}"'
+        return etag, last_modified
+
+    def validated_response(
+        self,
+        request: Request,
+        etag: str,
+        last_modified: Optional[int],
+        get_response: Callable[[], HttpResponseBase],
+    ) -> HttpResponseBase:
+        response: Optional[HttpResponseBase] = get_conditional_response(
+            request,  # type: ignore[arg-type]
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = get_response()
+            if not self.has_validators(response):
+                return response
+        return self.set_validators(response, etag, last_modified)
+
+    def has_validators(
+        self, response: HttpResponseBase  # pylint: disable=unused-argument
+    ) -> bool:
+        """
+        Responses holding data the validators don't cover, like failed
+        lookups, are sent without them so clients don't keep them
+        """
+        return True
+
+    @staticmethod
+    def set_validators(
+        response: HttpResponseBase, etag: str, last_modified: Optional[int]
+    ) -> HttpResponseBase:
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        # representations differ per authenticated user
+        patch_vary_headers(response, ("Authorization",))
+        return response
+
+
+class AsyncConditionalGetMixin(ConditionalGetMixin):
+    """
+    ConditionalGetMixin with an async list handler, for views
+    dispatched by AsyncDispatchMixin.
+
+    The aggregate is queried with the async ORM and the page is
+    serialized through aserialize, which views override to await
+    the I/O their representation depends on.
+    Filtering and pagination go through the sync APIs in a thread.
+    """
+
+    @markcoroutinefunction
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Any:
+        # sync signature like the list it overrides, returns the coroutine
+        # which AsyncDispatchMixin awaits
+        return self.alist(request, *args, **kwargs)
+
+    async def alist(
+        self, request: Request, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        queryset = await sync_to_async(self.get_filtered_list_queryset)()
+        paginator = self.paginator  # type: ignore[attr-defined]
+        if isinstance(paginator, KeysetPagination) and paginator.is_keyset(
+            request
+        ):
+            page = await sync_to_async(
+                self.paginate_queryset  # type: ignore[attr-defined]
+            )(queryset)
+            etag, _ = self.get_validators(
+                request,
+                [
+                    timestamp
+                    for instance in page
+                    for timestamp in self.get_timestamps(instance)
+                ],
+                ",".join(str(instance.pk) for instance in page),
+            )
+            return await self.avalidated_response(
+                request, etag, None, partial(self.apage_response, page)
+            )
+
+        aggregates = await queryset.aaggregate(**self.get_list_aggregates())
+        count = aggregates.pop("count")
+        if isinstance(paginator, KeysetPagination):
+            paginator.known_count = count
+        etag, _ = self.get_validators(request, aggregates.values(), count)
+        return await self.avalidated_response(
+            request, etag, None, partial(self.alist_response, queryset)
+        )
+
+    async def alist_response(self, queryset: QuerySet[Any]) -> Response:
+        page = await sync_to_async(
+            self.paginate_queryset  # type: ignore[attr-defined]
+        )(queryset)
+        if page is not None:
+            return await self.apage_response(page)
+
+        serializer = self.get_serializer(  # type: ignore[attr-defined]
+            [instance async for instance in queryset], many=True
+        )
+        return Response(await self.aserialize(serializer))
+
+    async def apage_response(self, page: Any) -> Response:
+        serializer = self.get_serializer(  # type: ignore[attr-defined]
+            page, many=True
+        )
+        return self.get_paginated_response(  # type: ignore[attr-defined]
+            await self.aserialize(serializer)
+        )
+
+    async def aserialize(self, serializer: BaseSerializer) -> Any:
+        """
+        Returns the data of the serializer, rendered in a thread
+        in case the representation reads something lazily
+        """
+        return await sync_to_async(lambda: serializer.data)()
+
+    async def avalidated_response(
+        self,
+        request: Request,
+        etag: str,
+        last_modified: Optional[int],
+        get_response: Callable[[], Awaitable[HttpResponseBase]],
+    ) -> HttpResponseBase:
+        response: Optional[HttpResponseBase] = get_conditional_response(
+            request,  # type: ignore[arg-type]
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = await get_response()
+            if not self.has_validators(response):
+                return response
+        return self.set_validators(response, etag, last_modified)
+
+
+class AsyncDispatchMixin:
+    """
+    Dispatches DRF views asynchronously, for the ASGI deployment mode.
+
+    Authentication, permission checks and sync handlers run in a thread
+    like any sync view under ASGI, async handlers run on the event loop,
+    so waiting for I/O doesn't hold a worker thread.
+    """
+
+    @classmethod
+    def as_view(cls, *args: Any, **kwargs: Any) -> Callable[..., Any]:
+        view: Callable[..., Any] = super().as_view(  # type: ignore[misc]
+            *args, **kwargs
+        )
+        # viewsets bind their handlers to the instance,
+        # Django can't tell from the class that the view is async
+        return markcoroutinefunction(view)
+
+    def dispatch(self, request: Any, *args: Any, **kwargs: Any) -> Any:
+        # sync signature like View.dispatch, returns the coroutine
+        # which Django awaits for views marked as async by as_view
+        return self.adispatch(request, *args, **kwargs)
+
+    async def adispatch(
+        self, request: Any, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        # same as APIView.dispatch, awaiting the handler
+        # pylint: disable=attribute-defined-outside-init
+        view: Any = self
+        view.args = args
+        view.kwargs = kwargs
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+
+        try:
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+
+            method = request.method.lower()
+            if method in view.http_method_names:
+                handler = getattr(view, method, view.http_method_not_allowed)
+            else:
+                handler = view.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(
+                    request, *args, **kwargs
+                )
+        except Exception as exc:  # pylint: disable=broad-except
+            response = view.handle_exception(exc)
+
+        view.response = view.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return view.response
+
+
+class CachedResponseMixin(ConditionalGetMixin):
+    """
+    Caches list and detail responses per URL, for data which is
+    the same for every user.
+
+    Keys are versioned with the generation of the model, bumped on every
+    change of it, so outdated responses are never read again and simply
+    expire instead of being deleted.
+    """
+
+    response_cache_ttl = CACHE_TTL
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Any:
+        return self.cached_response(
+            request, partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Any:
+        return self.cached_response(
+            request, partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    def cached_response(
+        self, request: Request, get_response: Callable[[], Any]
+    ) -> Any:
+        model = self.get_queryset().model  # type: ignore[attr-defined]
+        key, cached = get_cached_response(
+            model._meta.label, request.build_absolute_uri()
+        )
+        if cached is not None:
+            return self.validated_response(
+                request,
+                cached["etag"],
+                cached["last_modified"],
+                lambda: Response(cached["data"]),
+            )
+
+        response = get_response()
+        if response.status_code == 200:
+            set_cached_response(
+                key,
+                {
+                    "data": response.data,
+                    "etag": response["ETag"],
+                    "last_modified": parse_http_date_safe(
+                        response.get("Last-Modified")
+                    ),
+                },
+                self.response_cache_ttl,
+            )
+        return response
+
+
+class BaseUserOwnedViewSet(ConditionalGetMixin, ModelViewSet):
+    permission_classes = [AllowObjOwner]
+
+    def get_list_queryset(self) -> QuerySet[Any]:
+        queryset: QuerySet[Any] = (
+            self.get_queryset()  # type: ignore[attr-defined]
+        )
+        user = self.request.user
+        if has_perms(user, CustomDjangoModelPermissions.view_permissions):
+            return queryset
+        return queryset.filter(user=user)
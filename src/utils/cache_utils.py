@@ -1,33 +1,770 @@
+# mypy: disable-error-code="import-untyped"
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Any, Optional
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import Future
+from typing import Any, Generic, NamedTuple, Optional, TypeVar
 
-from django.core.cache import cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.core.cache.backends.base import BaseCache
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+from utils.metrics import Counter
+from utils.profiler import profiled_proxy
 
 
 logger = logging.getLogger("main")
+# shared cache, its calls are timed for profiled requests
+cache: BaseCache = profiled_proxy(django_cache, "cache")
 CACHE_TTL = 60 * 60 * 2  # 2 hours
+# Weather older than the soft TTL is still served while it is refreshed
+# in the background, it is dropped from the cache after the hard TTL
+WEATHER_SOFT_TTL = CACHE_TTL
+WEATHER_HARD_TTL = 60 * 60 * 6  # 6 hours
+# Failed weather fetches are not retried for a location during this time
+WEATHER_ERROR_TTL = 60  # 1 minute
+# Resolved auth tokens, kept short as user changes may be missed
+AUTH_TOKEN_TTL = 60  # 1 minute
+
+T = TypeVar("T")
+
+local_cache_hits = Counter(
+    "local_cache_hits_total", "Hits of the in-process cache"
+)
+local_cache_misses = Counter(
+    "local_cache_misses_total", "Misses of the in-process cache"
+)
+local_cache_evictions = Counter(
+    "local_cache_evictions_total",
+    "Entries evicted from the in-process cache to respect its size limit",
+)
+weather_cache_hits = Counter(
+    "weather_cache_hits_total", "Weather lookups answered by the cache"
+)
+weather_cache_misses = Counter(
+    "weather_cache_misses_total", "Weather lookups missing in the cache"
+)
+
+
+class LocalCache:
+    """
+    Bounded, thread-safe in-process LRU cache with per-entry TTL.
+    Kept in front of the shared cache to save a network round trip
+    and a decode for hot keys.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the cached value, None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    local_cache_hits.inc()
+                    return value
+                del self._entries[key]
+        local_cache_misses.inc()
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                local_cache_evictions.inc()
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
 
 
-def delete_cache(key_prefix: str) -> None:
+local_cache = LocalCache(
+    max_size=settings.LOCAL_CACHE_MAX_SIZE, ttl=settings.LOCAL_CACHE_TTL
+)
+
+_listener_lock = threading.Lock()
+_listener_pid: Optional[int] = None
+# identifies the process in published invalidations
+_instance_id: str = uuid.uuid4().hex
+
+
+def _get_redis_connection() -> Any:
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        # the cache backend is not Redis, there is no other process to notify
+        return None
+
+
+def publish_invalidation(keys: Iterable[str]) -> None:
+    """
+    Drops keys from the local cache of this and every other process.
+    Other processes are notified via Redis pub/sub.
+    """
+    keys = list(keys)
+    local_cache.delete(*keys)
+    connection = _get_redis_connection()
+    if connection is None:
+        return
+    message = {"sender": _instance_id, "keys": keys}
     try:
-        cache.delete_pattern(f"*{key_prefix}*")  # type: ignore[attr-defined]
-        logger.debug("Cache with key prefix %s deleted", key_prefix)
-    except AttributeError:
-        logger.warning(
-            "Skipping cache deletion for key prefix %s in test environment",
-            key_prefix,
+        connection.publish(
+            settings.CACHE_INVALIDATION_CHANNEL, json.dumps(message)
         )
+    except RedisError as e:
+        logger.warning("Error in publishing cache invalidation: %s", e)
+
+
+def start_invalidation_listener() -> None:
+    """
+    Subscribes the process to invalidations published by other processes.
+    Started lazily and once per process, so every forked worker gets its
+    own listener thread.
+    """
+    global _listener_pid, _instance_id  # pylint: disable=global-statement
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _listener_lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+        _instance_id = uuid.uuid4().hex
+        if _get_redis_connection() is None:
+            return
+        threading.Thread(
+            target=_listen_for_invalidations,
+            name="cache-invalidation",
+            daemon=True,
+        ).start()
+
+
+def _listen_for_invalidations() -> None:
+    while True:
+        try:
+            pubsub = _get_redis_connection().pubsub(
+                ignore_subscribe_messages=True
+            )
+            pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+            # invalidations may have been missed while not subscribed
+            local_cache.clear()
+            for message in pubsub.listen():
+                handle_invalidation_message(message["data"])
+        except RedisError as e:
+            logger.warning("Cache invalidation listener disconnected: %s", e)
+            time.sleep(1)
+
+
+def handle_invalidation_message(data: bytes | str) -> None:
+    try:
+        message = json.loads(data)
+    except ValueError:
+        logger.warning("Invalid cache invalidation message: %s", data)
+        return
+    if message.get("sender") == _instance_id:
+        return
+    local_cache.delete(*message.get("keys", []))
+
+
+def get_two_tier(key: str) -> Any:
+    """
+    Gets the value from the in-process cache, falls back to the shared one
+    """
+    start_invalidation_listener()
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value)
+    return value
+
+
+def get_many_two_tier(keys: list[str]) -> dict[str, Any]:
+    start_invalidation_listener()
+    values: dict[str, Any] = {}
+    for key in keys:
+        value = local_cache.get(key)
+        if value is not None:
+            values[key] = value
+    missing = [key for key in keys if key not in values]
+    if missing:
+        shared_values: dict[str, Any] = cache.get_many(missing)
+        for key, value in shared_values.items():
+            local_cache.set(key, value)
+        values.update(shared_values)
+    return values
+
+
+def set_two_tier(key: str, value: Any, ttl: int) -> None:
+    """
+    Sets the value in both tiers and drops the outdated copies
+    from the in-process caches of the other processes
+    """
+    start_invalidation_listener()
+    cache.set(key, value, ttl)
+    publish_invalidation([key])
+    local_cache.set(key, value, ttl)
+
+
+def delete_two_tier(*keys: str) -> None:
+    start_invalidation_listener()
+    cache.delete_many(keys)
+    publish_invalidation(keys)
+
+
+async def astart_invalidation_listener() -> None:
+    # already started on all but the first call of the process,
+    # switching to a thread just to find that out is skipped
+    if _listener_pid != os.getpid():
+        await sync_to_async(
+            start_invalidation_listener, thread_sensitive=False
+        )()
+
+
+async def aget_two_tier(key: str) -> Any:
+    await astart_invalidation_listener()
+    value = local_cache.get(key)
+    if value is None:
+        value = await cache.aget(key)
+        if value is not None:
+            local_cache.set(key, value)
+    return value
+
+
+async def aget_many_two_tier(keys: list[str]) -> dict[str, Any]:
+    await astart_invalidation_listener()
+    values: dict[str, Any] = {}
+    for key in keys:
+        value = local_cache.get(key)
+        if value is not None:
+            values[key] = value
+    missing = [key for key in keys if key not in values]
+    if missing:
+        aget_many = cache.aget_many  # type: ignore[attr-defined]
+        shared_values: dict[str, Any] = await aget_many(missing)
+        for key, value in shared_values.items():
+            local_cache.set(key, value)
+        values.update(shared_values)
+    return values
+
+
+async def aset_two_tier(key: str, value: Any, ttl: int) -> None:
+    await astart_invalidation_listener()
+    await cache.aset(key, value, ttl)
+    # needs no database connection, kept off the shared sync thread
+    await sync_to_async(publish_invalidation, thread_sensitive=False)([key])
+    local_cache.set(key, value, ttl)
+
+
+def get_generation_cache_key(name: str) -> str:
+    return f"generation_{name}"
+
+
+def _init_generation(key: str) -> int:
+    # Starts from the clock rather than 1, so a counter lost to an
+    # eviction can't come back with a generation already used
+    cache.add(key, time.time_ns(), None)
+    generation = int(cache.get(key, time.time_ns()))
+    local_cache.set(key, generation)
+    return generation
+
+
+def get_generation(name: str) -> int:
+    """
+    Returns the current generation of the named data set,
+    cache keys containing it are outdated once it is bumped
+    """
+    key = get_generation_cache_key(name)
+    generation: Optional[int] = get_two_tier(key)
+    if generation is None:
+        return _init_generation(key)
+    return int(generation)
+
+
+async def aget_generation(name: str) -> int:
+    key = get_generation_cache_key(name)
+    generation: Optional[int] = await aget_two_tier(key)
+    if generation is None:
+        return await sync_to_async(_init_generation)(key)
+    return int(generation)
+
+
+def bump_generation(name: str) -> None:
+    key = get_generation_cache_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+    publish_invalidation([key])
+
+
+class CacheNamespace:
+    """
+    Group of cache keys which are invalidated together in O(1).
+
+    Keys are prefixed with the generation of the namespace and
+    invalidating it bumps the generation, so the old keys are
+    never read again and expire on their own.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def make_key(self, key: str, generation: int) -> str:
+        return f"{self.name}_{generation}_{key}"
+
+    def get_key(self, key: str) -> str:
+        return self.make_key(key, get_generation(self.name))
+
+    def get_keys(self, keys: Iterable[str]) -> list[str]:
+        generation = get_generation(self.name)
+        return [self.make_key(key, generation) for key in keys]
+
+    async def aget_key(self, key: str) -> str:
+        return self.make_key(key, await aget_generation(self.name))
+
+    async def aget_keys(self, keys: Iterable[str]) -> list[str]:
+        generation = await aget_generation(self.name)
+        return [self.make_key(key, generation) for key in keys]
+
+    def invalidate(self) -> None:
+        bump_generation(self.name)
+
+
+def get_cached_response(name: str, url: str) -> tuple[str, Any]:
+    """
+    Returns the cache key of the response for the current generation
+    of the data set, with the cached value if there is one
+    """
+    digest = hashlib.sha256(url.encode()).hexdigest()
+    key = CacheNamespace(name).get_key(f"response_{digest}")
+    return key, get_two_tier(key)
+
+
+def set_versioned_two_tier(key: str, value: Any, ttl: int) -> None:
+    # versioned keys are never outdated, other processes aren't notified
+    start_invalidation_listener()
+    cache.set(key, value, ttl)
+    local_cache.set(key, value, ttl)
+
+
+def set_cached_response(key: str, value: Any, ttl: int = CACHE_TTL) -> None:
+    set_versioned_two_tier(key, value, ttl)
+
+
+permissions_cache = CacheNamespace("permissions")
+
+
+def get_cached_permissions(user_id: Any) -> tuple[str, Any]:
+    """
+    Returns the cache key of the permission set of the user for the
+    current generation of permissions, with the cached value if any
+    """
+    key = permissions_cache.get_key(f"user_{user_id}")
+    return key, get_two_tier(key)
+
+
+def set_cached_permissions(
+    key: str, permissions: frozenset[str], ttl: int = CACHE_TTL
+) -> None:
+    set_versioned_two_tier(key, permissions, ttl)
+
+
+def invalidate_cached_permissions() -> None:
+    permissions_cache.invalidate()
+
+
+weather_cache = CacheNamespace("weather")
+weather_error_cache = CacheNamespace("weather_error")
+
+
+def get_weather_cache_key(postal_code: str, country: str) -> str:
+    """
+    Identifies the location in locks and coalesced fetches,
+    the weather itself is stored under a key of weather_cache
+    """
+    return f"weather_{postal_code}_{country}"
+
+
+def get_location_key(postal_code: str, country: str) -> str:
+    return f"{postal_code}_{country}"
+
+
+def _get_location_keys(
+    namespace: CacheNamespace, locations: list[tuple[str, str]]
+) -> dict[str, tuple[str, str]]:
+    keys = namespace.get_keys(
+        get_location_key(*location) for location in locations
+    )
+    return dict(zip(keys, locations))
+
+
+async def _aget_location_keys(
+    namespace: CacheNamespace, locations: list[tuple[str, str]]
+) -> dict[str, tuple[str, str]]:
+    keys = await namespace.aget_keys(
+        get_location_key(*location) for location in locations
+    )
+    return dict(zip(keys, locations))
+
+
+def invalidate_cached_weather() -> None:
+    """
+    Drops the cached weather and fetch errors of every location
+    """
+    weather_cache.invalidate()
+    weather_error_cache.invalidate()
+
+
+class CachedWeather(NamedTuple):
+    data: dict[str, Any]
+    is_stale: bool
+
+
+def _load_cached_weather(value: Any) -> Optional[CachedWeather]:
+    if not value:
+        return None
+    if "stale_at" not in value:
+        # stored before soft TTLs were introduced, refresh it
+        return CachedWeather(data=value, is_stale=True)
+    return CachedWeather(
+        data=value["data"], is_stale=value["stale_at"] <= time.time()
+    )
+
+
+def _dump_cached_weather(
+    data: dict[str, Any], soft_ttl: int
+) -> dict[str, Any]:
+    return {"data": data, "stale_at": time.time() + soft_ttl}
 
 
 def get_cached_weather(
     postal_code: str, country: str
-) -> Optional[dict[str, Any]]:
-    cache_key: str = f"weather_{postal_code}_{country}"
-    return cache.get(cache_key)
+) -> Optional[CachedWeather]:
+    cache_key = weather_cache.get_key(get_location_key(postal_code, country))
+    cached = _load_cached_weather(get_two_tier(cache_key))
+    _count_weather_lookups(int(cached is not None), 1)
+    return cached
 
 
 def set_cached_weather(
-    postal_code: str, country: str, data: dict[str, Any], ttl: int = CACHE_TTL
+    postal_code: str,
+    country: str,
+    data: dict[str, Any],
+    soft_ttl: int = WEATHER_SOFT_TTL,
+    hard_ttl: int = WEATHER_HARD_TTL,
+) -> None:
+    cache_key = weather_cache.get_key(get_location_key(postal_code, country))
+    set_two_tier(cache_key, _dump_cached_weather(data, soft_ttl), hard_ttl)
+
+
+def get_many_cached_weather(
+    locations: Iterable[tuple[str, str]]
+) -> dict[tuple[str, str], CachedWeather]:
+    """
+    Fetches cached weather for several (postal_code, country) pairs
+    in a single cache round trip.
+    Locations without a cached value are left out of the result.
+    """
+    locations = list(locations)
+    if not locations:
+        return {}
+    keys = _get_location_keys(weather_cache, locations)
+    cached: dict[str, Any] = get_many_two_tier(list(keys))
+    return _load_many_cached_weather(keys, cached)
+
+
+def _load_many_cached_weather(
+    keys: dict[str, tuple[str, str]], cached: dict[str, Any]
+) -> dict[tuple[str, str], CachedWeather]:
+    result: dict[tuple[str, str], CachedWeather] = {}
+    for key, value in cached.items():
+        entry = _load_cached_weather(value)
+        if entry is not None:
+            result[keys[key]] = entry
+    _count_weather_lookups(len(result), len(keys))
+    return result
+
+
+def _count_weather_lookups(hits: int, total: int) -> None:
+    if hits:
+        weather_cache_hits.inc(hits)
+    if total > hits:
+        weather_cache_misses.inc(total - hits)
+
+
+async def aget_cached_weather(
+    postal_code: str, country: str
+) -> Optional[CachedWeather]:
+    cache_key = await weather_cache.aget_key(
+        get_location_key(postal_code, country)
+    )
+    cached = _load_cached_weather(await aget_two_tier(cache_key))
+    _count_weather_lookups(int(cached is not None), 1)
+    return cached
+
+
+async def aset_cached_weather(
+    postal_code: str,
+    country: str,
+    data: dict[str, Any],
+    soft_ttl: int = WEATHER_SOFT_TTL,
+    hard_ttl: int = WEATHER_HARD_TTL,
+) -> None:
+    cache_key = await weather_cache.aget_key(
+        get_location_key(postal_code, country)
+    )
+    await aset_two_tier(
+        cache_key, _dump_cached_weather(data, soft_ttl), hard_ttl
+    )
+
+
+async def aget_many_cached_weather(
+    locations: Iterable[tuple[str, str]]
+) -> dict[tuple[str, str], CachedWeather]:
+    locations = list(locations)
+    if not locations:
+        return {}
+    keys = await _aget_location_keys(weather_cache, locations)
+    cached: dict[str, Any] = await aget_many_two_tier(list(keys))
+    return _load_many_cached_weather(keys, cached)
+
+
+def is_weather_error_cached(postal_code: str, country: str) -> bool:
+    cache_key = weather_error_cache.get_key(
+        get_location_key(postal_code, country)
+    )
+    return get_two_tier(cache_key) is not None
+
+
+def set_cached_weather_error(
+    postal_code: str, country: str, ttl: int = WEATHER_ERROR_TTL
+) -> None:
+    cache_key = weather_error_cache.get_key(
+        get_location_key(postal_code, country)
+    )
+    set_two_tier(cache_key, True, ttl)
+
+
+def get_many_cached_weather_errors(
+    locations: Iterable[tuple[str, str]]
+) -> set[tuple[str, str]]:
+    """
+    Returns locations whose last fetch failed within WEATHER_ERROR_TTL
+    """
+    locations = list(locations)
+    if not locations:
+        return set()
+    keys = _get_location_keys(weather_error_cache, locations)
+    return {keys[key] for key in get_many_two_tier(list(keys))}
+
+
+async def ais_weather_error_cached(postal_code: str, country: str) -> bool:
+    cache_key = await weather_error_cache.aget_key(
+        get_location_key(postal_code, country)
+    )
+    return await aget_two_tier(cache_key) is not None
+
+
+async def aset_cached_weather_error(
+    postal_code: str, country: str, ttl: int = WEATHER_ERROR_TTL
+) -> None:
+    cache_key = await weather_error_cache.aget_key(
+        get_location_key(postal_code, country)
+    )
+    await aset_two_tier(cache_key, True, ttl)
+
+
+async def aget_many_cached_weather_errors(
+    locations: Iterable[tuple[str, str]]
+) -> set[tuple[str, str]]:
+    locations = list(locations)
+    if not locations:
+        return set()
+    keys = await _aget_location_keys(weather_error_cache, locations)
+    return {keys[key] for key in await aget_many_two_tier(list(keys))}
+
+
+# Models expanded in the cached tracking rows, keys are versioned
+# with their generations so a change of any of them outdates the rows
+TRACKING_EXPANDED_MODELS = ("parcel.Address", "parcel.Article")
+
+
+def get_tracking_cache_key(tracking_number: str) -> str:
+    generations = "_".join(
+        str(get_generation(name)) for name in TRACKING_EXPANDED_MODELS
+    )
+    return f"tracking_{generations}_{tracking_number}"
+
+
+def get_cached_tracking(tracking_number: str) -> Optional[list[Any]]:
+    return get_two_tier(get_tracking_cache_key(tracking_number))
+
+
+def set_cached_tracking(
+    tracking_number: str, data: list[Any], ttl: int = CACHE_TTL
 ) -> None:
-    cache_key: str = f"weather_{postal_code}_{country}"
-    cache.set(cache_key, data, ttl)
+    set_two_tier(get_tracking_cache_key(tracking_number), data, ttl)
+
+
+def delete_cached_tracking(*tracking_numbers: str) -> None:
+    if tracking_numbers:
+        delete_two_tier(*map(get_tracking_cache_key, tracking_numbers))
+
+
+def get_auth_token_cache_key(token_key: str) -> str:
+    # the token is a credential, only its digest ends up in the cache
+    return f"auth_token_{hashlib.sha256(token_key.encode()).hexdigest()}"
+
+
+def get_cached_auth_token(token_key: str) -> Any:
+    return get_two_tier(get_auth_token_cache_key(token_key))
+
+
+def set_cached_auth_token(
+    token_key: str, token: Any, ttl: int = AUTH_TOKEN_TTL
+) -> None:
+    set_two_tier(get_auth_token_cache_key(token_key), token, ttl)
+
+
+def delete_cached_auth_tokens(*token_keys: str) -> None:
+    if token_keys:
+        delete_two_tier(*map(get_auth_token_cache_key, token_keys))
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls sharing the same key within the process.
+    The first caller runs the function, the others wait for its result
+    (or its exception) instead of running it again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future[T]] = {}
+
+    def do(self, key: str, func: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        future.set_result(result)
+        return result
+
+
+class AsyncSingleFlight(Generic[T]):
+    """
+    Async version of SingleFlight, coalesces calls within the event loop
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[
+            tuple[asyncio.AbstractEventLoop, str], asyncio.Future[T]
+        ] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        future = self._calls.get((loop, key))
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._calls[(loop, key)] = loop.create_future()
+        try:
+            result = await func()
+        except BaseException as e:
+            future.set_exception(e)
+            # mark the exception as retrieved when there are no waiters
+            future.exception()
+            raise
+        finally:
+            del self._calls[(loop, key)]
+
+        future.set_result(result)
+        return result
+
+
+def get_lock_cache_key(key: str) -> str:
+    return f"lock_{key}"
+
+
+def acquire_cache_lock(key: str, ttl: int) -> Optional[str]:
+    """
+    Acquires a short lived lock shared by all processes using the cache.
+    Returns the lock token if acquired, None if somebody else holds it.
+    The lock expires after ttl seconds even if it is never released.
+    """
+    token = uuid.uuid4().hex
+    if cache.add(get_lock_cache_key(key), token, ttl):
+        return token
+    return None
+
+
+def release_cache_lock(key: str, token: str) -> None:
+    lock_key = get_lock_cache_key(key)
+    # only the owner releases the lock, it might have expired meanwhile
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def is_cache_locked(key: str) -> bool:
+    return cache.get(get_lock_cache_key(key)) is not None
+
+
+async def aacquire_cache_lock(key: str, ttl: int) -> Optional[str]:
+    token = uuid.uuid4().hex
+    if await cache.aadd(get_lock_cache_key(key), token, ttl):
+        return token
+    return None
+
+
+async def arelease_cache_lock(key: str, token: str) -> None:
+    lock_key = get_lock_cache_key(key)
+    if await cache.aget(lock_key) == token:
+        await cache.adelete(lock_key)  # type: ignore[attr-defined]
+
+
+async def ais_cache_locked(key: str) -> bool:
+    return await cache.aget(get_lock_cache_key(key)) is not None
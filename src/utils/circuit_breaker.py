@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+
+from utils.metrics import Counter
+
+
+logger = logging.getLogger("main")
+
+circuit_opened = Counter(
+    "circuit_breaker_opened_total", "Circuit breaker transitions to open"
+)
+circuit_rejected = Counter(
+    "circuit_breaker_rejected_total", "Calls rejected by an open circuit"
+)
+
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker for calls to an external service.
+
+    Opens after failure_threshold consecutive failures and rejects calls
+    for recovery_timeout seconds. Then a single probe call is let through
+    (half-open): its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self, name: str, failure_threshold: int, recovery_timeout: float
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._changed_at = 0.0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """
+        True while calls are rejected without waiting for a probe
+        """
+        with self._lock:
+            return self._state != self.CLOSED and not self._is_probe_due()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # let one probe through once the recovery timeout passed,
+            # also when a previous probe never reported back
+            if self._is_probe_due():
+                self._state = self.HALF_OPEN
+                self._changed_at = time.monotonic()
+                return True
+        circuit_rejected.inc()
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED
+                and self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._changed_at = time.monotonic()
+                circuit_opened.inc()
+                logger.warning(
+                    "Circuit %s opened after %s failures",
+                    self.name,
+                    self._failures,
+                )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def _is_probe_due(self) -> bool:
+        return time.monotonic() - self._changed_at >= self.recovery_timeout
@@ -1,7 +1,211 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+from uuid import UUID
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
 
 
 class CustomPagination(pagination.PageNumberPagination):
     page_size = 100
     page_size_query_param = "page_size"
     max_page_size = 500
+
+
+class Cursor(NamedTuple):
+    timestamp: datetime
+    id: UUID
+    reverse: bool = False
+
+
+def estimate_count(queryset: QuerySet[Any]) -> Optional[int]:
+    """
+    Returns the planner's row estimate for the queryset,
+    only available on PostgreSQL
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    plan = row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPagination(pagination.PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset mode.
+
+    Passing the cursor query param (empty for the first page) switches
+    to pages ordered by (timestamp, id), which are fetched with a range
+    condition on the timestamp index instead of COUNT(*) and OFFSET.
+    The count is skipped unless requested with count=exact, or
+    count=estimate for the query planner's estimate.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    request: Request
+    # count of the queryset when the view already knows it
+    known_count: Optional[int] = None
+    keyset = False
+    count: Optional[int] = None
+    has_next = False
+    has_previous = False
+    results: list[Any] = []
+
+    def is_keyset(self, request: Request) -> bool:
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet[Any],
+        request: Request,
+        view: Optional[APIView] = None,
+    ) -> Optional[list[Any]]:
+        self.keyset = self.is_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.count = self.get_keyset_count(queryset, request)
+        position = self.decode_cursor(request)
+        reverse = position.reverse if position else False
+        if position is not None:
+            lookup = "gt" if reverse else "lt"
+            queryset = queryset.filter(
+                Q(**{f"timestamp__{lookup}": position.timestamp})
+                | Q(
+                    timestamp=position.timestamp,
+                    **{f"id__{lookup}": position.id},
+                )
+            )
+        ordering = ("timestamp", "id") if reverse else ("-timestamp", "-id")
+
+        results = list(queryset.order_by(*ordering)[: page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.results = results
+        return results
+
+    def django_paginator_class(  # type: ignore[override]
+        self, object_list: QuerySet[Any], per_page: int
+    ) -> Paginator:
+        paginator = Paginator(object_list, per_page)
+        if self.known_count is not None:
+            # skips the COUNT(*) query of the paginator
+            paginator.__dict__["count"] = self.known_count
+        return paginator
+
+    def get_paginated_response(self, data: Any) -> Response:
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "count": self.count,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(self.results[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.results:
+            return None
+        return self.encode_cursor(self.results[0], reverse=True)
+
+    def get_keyset_count(
+        self, queryset: QuerySet[Any], request: Request
+    ) -> Optional[int]:
+        mode = request.query_params.get(self.count_query_param)
+        if mode == "exact":
+            if self.known_count is not None:
+                return self.known_count
+            return queryset.count()
+        if mode == "estimate":
+            return estimate_count(queryset)
+        return None
+
+    def decode_cursor(self, request: Request) -> Optional[Cursor]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            return Cursor(
+                timestamp=datetime.fromisoformat(data["t"]),
+                id=UUID(data["i"]),
+                reverse=bool(data.get("r")),
+            )
+        except (TypeError, ValueError, KeyError) as error:
+            raise NotFound(self.invalid_cursor_message) from error
+
+    def encode_cursor(self, instance: Model, reverse: bool) -> str:
+        data = {
+            "t": instance.timestamp.isoformat(),  # type: ignore[attr-defined]
+            "i": str(instance.pk),
+        }
+        if reverse:
+            data["r"] = "1"
+        encoded = urlsafe_b64encode(json.dumps(data).encode()).decode("ascii")
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[Any]:
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Keyset pagination cursor, pass it empty for the first "
+                    "page instead of the page number"
+                ),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Count mode for keyset pages",
+                "schema": {"type": "string", "enum": ["exact", "estimate"]},
+            },
+        ]
@@ -1,6 +1,65 @@
+import atexit
 import logging
+import os
+import threading
+from collections.abc import Sequence
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any
+from queue import SimpleQueue
+from typing import Any, Optional
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Only enqueues records, a QueueListener thread passes them on to the
+    given handlers, so the file and console I/O happens off the thread
+    logging them.
+
+    The listener is started lazily once per process, like forked workers.
+    Records are handed over as they are, they stay in the process and
+    don't need to be made picklable, formatting happens in the listener.
+    """
+
+    def __init__(self, handlers: Sequence[logging.Handler]) -> None:
+        super().__init__(SimpleQueue())
+        # indexing resolves the cfg:// references of dictConfig
+        self.handlers = [handlers[i] for i in range(len(handlers))]
+        self.listener: Optional[QueueListener] = None
+        self._listener_pid: Optional[int] = None
+        self._listener_lock = threading.Lock()
+
+    def start(self) -> None:
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._listener_lock:
+            if self._listener_pid == pid:
+                return
+            # the queue of the parent process may have been forked mid-put
+            self.queue = SimpleQueue()
+            self.listener = QueueListener(
+                self.queue, *self.handlers, respect_handler_level=True
+            )
+            self.listener.start()
+            atexit.register(self.stop)
+            self._listener_pid = pid
+
+    def stop(self) -> None:
+        """
+        Stops the listener once the queued records are processed
+        """
+        with self._listener_lock:
+            if self.listener is not None and self._listener_pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._listener_pid = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.start()
+        super().enqueue(record)
 
 
 def get_logger_settings(LOGS_DIR: Path, DEBUG: bool) -> dict[str, Any]:
@@ -94,21 +153,44 @@ def get_logger_settings(LOGS_DIR: Path, DEBUG: bool) -> dict[str, Any]:
                 "maxBytes": 1024 * 1024 * 10,  # 10MB
                 "backupCount": 10,
             },
+            "slow_requests_file": {
+                "level": "INFO",
+                "class": "logging.handlers.RotatingFileHandler",
+                "formatter": "main_format",
+                "filename": f"{LOGS_DIR}/slow_requests.log",
+                "maxBytes": 1024 * 1024 * 10,  # 10MB
+                "backupCount": 10,
+            },
+            "slow_requests_queue": {
+                "()": "utils.logger_settings.QueueListenerHandler",
+                "handlers": ["cfg://handlers.slow_requests_file"],
+            },
+            # configured after the handlers it references,
+            # dictConfig sets handlers up in the order of their names
+            "queue": {
+                "()": "utils.logger_settings.QueueListenerHandler",
+                "handlers": [
+                    "cfg://handlers.file",
+                    "cfg://handlers.console_debug",
+                    "cfg://handlers.console_info",
+                    "cfg://handlers.console_warn",
+                    "cfg://handlers.console_error",
+                ],
+            },
         },
         "loggers": {
             "main": {
-                "handlers": [
-                    "file",
-                    "console_debug",
-                    "console_info",
-                    "console_warn",
-                    "console_error",
-                ],
+                "handlers": ["queue"],
                 "level": "DEBUG" if DEBUG else "INFO",
             },
             "error": {
                 "handlers": ["error_file", "console_error"],
                 "level": "ERROR",
             },
+            "slow_requests": {
+                "handlers": ["slow_requests_queue"],
+                "level": "INFO",
+                "propagate": False,
+            },
         },
     }
@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import prometheus_client
+from django.db import connections
+from django.db.backends.signals import connection_created
+from prometheus_client import multiprocess
+
+
+class Counter:
+    """
+    Thread-safe, monotonically increasing in-process counter,
+    exported as a Prometheus counter as well
+    """
+
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._value = 0
+        self._lock = threading.Lock()
+        self._metric = prometheus_client.Counter(name, documentation)
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+        self._metric.inc(amount)
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Histogram:
+    """
+    Distribution of observed values like durations,
+    exported as a Prometheus histogram
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = prometheus_client.Histogram.DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._metric = prometheus_client.Histogram(
+            name, documentation, labelnames, buckets=buckets
+        )
+
+    def observe(self, amount: float, **labels: str) -> None:
+        metric = self._metric.labels(**labels) if labels else self._metric
+        metric.observe(amount)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+def is_multiprocess() -> bool:
+    """
+    Metrics are written to files of a directory shared by the processes,
+    like gunicorn workers, when PROMETHEUS_MULTIPROC_DIR is set
+    """
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """
+    Renders the metrics in the Prometheus text format,
+    aggregated over all the processes in multiprocess mode.
+    Returns the body and its content type.
+    """
+    registry: prometheus_client.CollectorRegistry = prometheus_client.REGISTRY
+    if is_multiprocess():
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(  # type: ignore[no-untyped-call]
+            registry
+        )
+    return (
+        prometheus_client.generate_latest(registry),
+        prometheus_client.CONTENT_TYPE_LATEST,
+    )
+
+
+class QueryStats:
+    """
+    Number and total duration in seconds of the DB queries of a request
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+
+# copied into threads running sync_to_async code, so the queries of
+# async views run in the executor thread are recorded too
+_query_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar(
+    "query_stats", default=()
+)
+
+
+def record_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    """
+    Execute wrapper adding the queries to the tracked QueryStats
+    """
+    tracked = _query_stats.get()
+    if not tracked:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for stats in tracked:
+            stats.duration += duration
+            stats.count += 1
+
+
+def install_query_recorder(connection: Any, **kwargs: Any) -> None:
+    """
+    Adds record_query to the execute wrappers of the connection,
+    once, it is kept over reconnects
+    """
+    if record_query not in connection.execute_wrappers:
+        # first, execute_wrapper() blocks being exited pop the last one
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def install_query_recorders() -> None:
+    """
+    Installs the query recorder on the connections opened by the thread
+    and on every connection opened later by any thread
+    """
+    connection_created.connect(
+        install_query_recorder, dispatch_uid="install_query_recorder"
+    )
+    initialized = connections.all(
+        initialized_only=True  # type: ignore[call-arg]
+    )
+    for connection in initialized:
+        install_query_recorder(connection)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Records the queries run in the block on connections
+    with the query recorder installed, blocks can be nested
+    """
+    stats = QueryStats()
+    token = _query_stats.set((*_query_stats.get(), stats))
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
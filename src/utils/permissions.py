@@ -1,11 +1,16 @@
 # mypy: disable-error-code=union-attr
 import logging
+from collections.abc import Iterable
+from functools import cache
+from typing import Any, Optional
 
 from django.db import models
 from rest_framework.permissions import BasePermission, DjangoModelPermissions
 from rest_framework.request import Request
 from rest_framework.views import APIView
 
+from utils.cache_utils import get_cached_permissions, set_cached_permissions
+
 
 logger = logging.getLogger("main")
 
@@ -45,7 +50,7 @@ class AllowObjOwner(BasePermission):  # type: ignore[misc]
                 return True
             model = view.queryset.model  # type: ignore[attr-defined]
             required_perms = get_required_permissions(request.method, model)
-            if not request.user.has_perms(required_perms):
+            if not has_perms(request.user, required_perms):
                 return False
         return request.user.is_authenticated
 
@@ -53,13 +58,13 @@ class AllowObjOwner(BasePermission):  # type: ignore[misc]
         self, request: Request, view: APIView, obj: type[models.Model]
     ) -> bool:
         required_permissions = get_required_permissions(
-            request.method, obj  # type: ignore[arg-type]
+            request.method, obj._meta.model
         )
-        has_perms = request.user.has_perms(required_permissions)
+        user_has_perms = has_perms(request.user, required_permissions)
         if (
             hasattr(obj, self.owner_field)
             and hasattr(request, "user")
-            and not has_perms
+            and not user_has_perms
         ):
             try:
                 owner = getattr(obj, self.owner_field)
@@ -70,7 +75,7 @@ class AllowObjOwner(BasePermission):  # type: ignore[misc]
                     obj,
                     self.owner_field,
                 )
-        return has_perms
+        return user_has_perms
 
 
 class AllowObjOwnerReadOnly(AllowObjOwner):  # type: ignore[misc]
@@ -78,13 +83,13 @@ class AllowObjOwnerReadOnly(AllowObjOwner):  # type: ignore[misc]
         self, request: Request, view: APIView, obj: type[models.Model]
     ) -> bool:
         required_permissions = get_required_permissions(
-            request.method, obj  # type: ignore[arg-type]
+            request.method, obj._meta.model
         )
-        has_perms = request.user.has_perms(required_permissions)
+        user_has_perms = has_perms(request.user, required_permissions)
         if (
             hasattr(obj, self.owner_field)
             and hasattr(request, "user")
-            and not has_perms
+            and not user_has_perms
             and request.method in ["GET", "OPTIONS", "HEAD"]
         ):
             try:
@@ -96,7 +101,7 @@ class AllowObjOwnerReadOnly(AllowObjOwner):  # type: ignore[misc]
                     obj,
                     self.owner_field,
                 )
-        return has_perms
+        return user_has_perms
 
 
 class IsSuperuserOrReadOnly(BasePermission):  # type: ignore[misc]
@@ -109,15 +114,50 @@ class IsSuperuserOrReadOnly(BasePermission):  # type: ignore[misc]
         )
 
 
+@cache
 def get_required_permissions(
     method: str, model: type[models.Model]
-) -> list[str]:
+) -> tuple[str, ...]:
+    """
+    Returns the permissions required for the method on the model,
+    computed once per method and model
+    """
     if method == "GET":
-        return [f"{model._meta.app_label}.view_{model._meta.model_name}"]
+        return (f"{model._meta.app_label}.view_{model._meta.model_name}",)
     if method == "POST":
-        return [f"{model._meta.app_label}.add_{model._meta.model_name}"]
+        return (f"{model._meta.app_label}.add_{model._meta.model_name}",)
     if method in ["PUT", "PATCH"]:
-        return [f"{model._meta.app_label}.change_{model._meta.model_name}"]
+        return (f"{model._meta.app_label}.change_{model._meta.model_name}",)
     if method == "DELETE":
-        return [f"{model._meta.app_label}.delete_{model._meta.model_name}"]
-    return []
+        return (f"{model._meta.app_label}.delete_{model._meta.model_name}",)
+    return ()
+
+
+def get_user_permissions(user: Any) -> frozenset[str]:
+    """
+    Returns all the permissions of the user, resolved once per user
+    object and kept in the shared cache, so later requests of the user
+    don't query them again until permissions or groups change
+    """
+    if not user.is_active or user.is_anonymous:
+        return frozenset()
+    permissions: Optional[frozenset[str]] = getattr(
+        user, "_shared_perm_cache", None
+    )
+    if permissions is None:
+        key, permissions = get_cached_permissions(user.pk)
+        if permissions is None:
+            permissions = frozenset(user.get_all_permissions())
+            set_cached_permissions(key, permissions)
+        # kept on the user like the permission caches of ModelBackend
+        user._shared_perm_cache = permissions  # pylint: disable=W0212
+    return permissions
+
+
+def has_perms(user: Any, perm_list: Iterable[str]) -> bool:
+    """
+    Same as User.has_perms, checked against get_user_permissions
+    """
+    if user.is_active and user.is_superuser:
+        return True
+    return get_user_permissions(user).issuperset(perm_list)
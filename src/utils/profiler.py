@@ -0,0 +1,120 @@
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Optional, TypeVar, cast
+
+from asgiref.sync import iscoroutinefunction
+
+
+T = TypeVar("T")
+
+
+class Timing:
+    """
+    Number and total duration in seconds of calls of a kind
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+
+class Profile:
+    """
+    Calls made while handling a profiled request, per kind like
+    "db", "cache" or "http"
+    """
+
+    def __init__(self) -> None:
+        self.timings: dict[str, Timing] = {}
+        # async views may record from the sync_to_async thread
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, count: int, duration: float) -> None:
+        with self._lock:
+            timing = self.timings.setdefault(kind, Timing())
+            timing.count += count
+            timing.duration += duration
+
+
+# copied into threads running sync_to_async code,
+# calls made by async views are recorded too
+_profile: ContextVar[Optional[Profile]] = ContextVar("profile", default=None)
+
+
+def get_profile() -> Optional[Profile]:
+    return _profile.get()
+
+
+@contextmanager
+def profile_request() -> Iterator[Profile]:
+    """
+    Records the calls made in the block into a new profile
+    """
+    profile = Profile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+@contextmanager
+def profile_calls(kind: str) -> Iterator[None]:
+    """
+    Times the block as a call of the kind, when a request is profiled
+    """
+    profile = _profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(kind, 1, time.perf_counter() - start)
+
+
+def profiled(func: Callable[..., Any], kind: str) -> Callable[..., Any]:
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            with profile_calls(kind):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with profile_calls(kind):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ProfiledProxy:
+    """
+    Proxy of an object like the shared cache, its method calls are timed
+    as calls of the kind when a request is profiled
+    """
+
+    def __init__(self, target: Any, kind: str) -> None:
+        self._target = target
+        self._kind = kind
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if _profile.get() is None or not callable(attr):
+            return attr
+        return profiled(attr, self._kind)
+
+
+def profiled_proxy(target: T, kind: str) -> T:
+    """
+    Wraps the target in a ProfiledProxy, typed as the target
+    """
+    return cast(T, ProfiledProxy(target, kind))
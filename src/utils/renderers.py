@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+from collections.abc import Mapping
+from typing import Any, Optional
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, its output matches the default one.
+
+    UUIDs are encoded natively, other types the serializers leave behind
+    like Decimals, datetimes or lazy strings go through the DRF encoder.
+    Indented, ASCII-only or non-compact output is left to JSONRenderer.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    encoder = JSONEncoder()
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        indent = self.get_indent(
+            accepted_media_type or "", renderer_context or {}
+        )
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder.default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers out of the 64-bit range
+            return super().render(data, accepted_media_type, renderer_context)
+        # line and paragraph separators are escaped like JSONRenderer does
+        return ret.replace("\u2028".encode(), b"\\u2028").replace(
+            "\u2029".encode(), b"\\u2029"
+        )
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON, one line per object.
+    Streamed responses are written by the view, the renderer
+    only handles regular ones like errors.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return "".join(
+            f"{json.dumps(row, cls=JSONEncoder)}\n" for row in rows
+        ).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with a header row taken from the keys of the first object.
+    Streamed responses are written by the view, the renderer
+    only handles regular ones like errors.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b""
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue().encode()
@@ -0,0 +1,191 @@
+# mypy: disable-error-code="import-untyped"
+from collections.abc import Callable
+from datetime import datetime, tzinfo
+from functools import partial
+from operator import attrgetter
+from typing import Any, NamedTuple, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_flex_fields.serializers import FlexFieldsSerializerMixin
+from rest_framework import ISO_8601, fields, serializers
+from rest_framework.relations import PKOnlyObject, PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+
+class FieldPlan(NamedTuple):
+    name: str
+    # instance -> attribute, may raise SkipField like Field.get_attribute
+    get: Callable[[Any], Any]
+    # attribute other than None -> primitive value
+    represent: Callable[[Any], Any]
+
+
+def identity(value: Any) -> Any:
+    return value
+
+
+def get_readable_fields(serializer: serializers.Serializer) -> list[Any]:
+    """
+    Returns the fields rendered by the serializer,
+    with the expand/fields/omit options of flex fields applied
+    """
+    # pylint: disable=protected-access
+    if (
+        isinstance(serializer, FlexFieldsSerializerMixin)
+        and not serializer._flex_fields_rep_applied
+    ):
+        serializer.apply_flex_fields(
+            serializer.fields, serializer._flex_options_rep_only
+        )
+        serializer._flex_fields_rep_applied = True
+    return list(serializer._readable_fields)
+
+
+def get_model_field(
+    model: Optional[type[models.Model]], source_attrs: list[str]
+) -> Optional["models.Field[Any, Any]"]:
+    """
+    Returns the concrete model field the serializer field is read from,
+    None when the source is anything else, e.g. a method or a lookup
+    """
+    if model is None or len(source_attrs) != 1:
+        return None
+    try:
+        model_field = model._meta.get_field(source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    if (
+        not isinstance(model_field, models.Field)
+        or model_field.many_to_many
+        # not concrete, e.g. a ForeignObject without its own column
+        or model_field.column is None
+    ):
+        return None
+    return model_field
+
+
+def represent_datetime(
+    field: fields.DateTimeField, field_timezone: tzinfo, value: Any
+) -> Any:
+    """
+    DateTimeField.to_representation for ISO 8601, with the timezone
+    resolved upfront rather than looked up for every value
+    """
+    if not isinstance(value, datetime) or value.utcoffset() is None:
+        return field.to_representation(value)
+    representation = value.astimezone(field_timezone).isoformat()
+    if representation.endswith("+00:00"):
+        return representation[:-6] + "Z"
+    return representation
+
+
+def get_fast_representation(field: Any) -> Callable[[Any], Any]:
+    # exact types only, subclasses may represent values differently
+    field_type = type(field)
+    if field_type is fields.CharField:
+        return str
+    if field_type is fields.IntegerField:
+        return int
+    if field_type is fields.UUIDField and field.uuid_format == "hex_verbose":
+        return str
+    if (
+        field_type is fields.DateTimeField
+        and not hasattr(field, "timezone")
+        and str(getattr(field, "format", api_settings.DATETIME_FORMAT)).lower()
+        == ISO_8601
+    ):
+        field_timezone = field.default_timezone()
+        if field_timezone is not None:
+            return partial(represent_datetime, field, field_timezone)
+    return field.to_representation
+
+
+def compile_field(
+    field: Any, model: Optional[type[models.Model]]
+) -> FieldPlan:
+    name: str = field.field_name
+    model_field = get_model_field(model, field.source_attrs)
+    if model_field is None:
+        return FieldPlan(name, field.get_attribute, field.to_representation)
+
+    if (
+        type(field) is PrimaryKeyRelatedField  # pylint: disable=C0123
+        and field.pk_field is None
+        and model_field.is_relation
+    ):
+        # the pk is rendered as is, read it without loading the relation
+        return FieldPlan(name, attrgetter(model_field.attname), identity)
+    if isinstance(field, serializers.Serializer):
+        # expanded relation
+        return FieldPlan(
+            name,
+            attrgetter(model_field.name),
+            partial(represent, compile_plan(field)),
+        )
+    if model_field.is_relation:
+        return FieldPlan(name, field.get_attribute, field.to_representation)
+    return FieldPlan(
+        name, attrgetter(model_field.attname), get_fast_representation(field)
+    )
+
+
+def compile_plan(serializer: serializers.Serializer) -> list[FieldPlan]:
+    """
+    Resolves once how every field of the serializer is read and rendered,
+    so rows are rendered without going through the field machinery
+    """
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    return [
+        compile_field(field, model)
+        for field in get_readable_fields(serializer)
+    ]
+
+
+def represent(plan: list[FieldPlan], instance: Any) -> dict[str, Any]:
+    """
+    Same as Serializer.to_representation, following the compiled plan
+    """
+    ret = {}
+    for name, get, to_representation in plan:
+        try:
+            attribute = get(instance)
+        except fields.SkipField:
+            continue
+        check_for_none = (
+            attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+        )
+        ret[name] = (
+            None if check_for_none is None else to_representation(attribute)
+        )
+    return ret
+
+
+PLANNABLE_REPRESENTATIONS = (
+    serializers.Serializer.to_representation,
+    FlexFieldsSerializerMixin.to_representation,
+)
+
+
+class PlannedListSerializer(  # pylint: disable=abstract-method
+    serializers.ListSerializer
+):
+    """
+    Read-only fast path for lists of model serializers.
+    The fields are compiled into a plan once per list instead of
+    being resolved again for every row, the output stays the same.
+    """
+
+    def to_representation(self, data: Any) -> list[Any]:
+        child: Any = self.child
+        if type(child).to_representation not in PLANNABLE_REPRESENTATIONS:
+            # custom representation, can't be planned
+            return super().to_representation(data)
+
+        iterable = (
+            data.all()
+            if isinstance(data, models.manager.BaseManager)
+            else data
+        )
+        plan = compile_plan(child)
+        return [represent(plan, item) for item in iterable]
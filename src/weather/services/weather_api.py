@@ -1,21 +1,89 @@
+import asyncio
+import contextvars
 import logging
-from typing import Any, Optional
+import time
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, NoReturn, Optional, Union
+from weakref import WeakKeyDictionary
 
-import requests
+import httpx
 from django.conf import settings
-from requests.exceptions import HTTPError, RequestException, Timeout
 from rest_framework.exceptions import ValidationError
 
-from utils.cache_utils import get_cached_weather, set_cached_weather
+from utils.cache_utils import (
+    AsyncSingleFlight,
+    CachedWeather,
+    SingleFlight,
+    aacquire_cache_lock,
+    acquire_cache_lock,
+    aget_cached_weather,
+    aget_many_cached_weather,
+    aget_many_cached_weather_errors,
+    ais_cache_locked,
+    ais_weather_error_cached,
+    arelease_cache_lock,
+    aset_cached_weather,
+    aset_cached_weather_error,
+    get_cached_weather,
+    get_many_cached_weather,
+    get_many_cached_weather_errors,
+    get_weather_cache_key,
+    is_cache_locked,
+    is_weather_error_cached,
+    release_cache_lock,
+    set_cached_weather,
+    set_cached_weather_error,
+)
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import Counter, Histogram
+from utils.profiler import profile_calls
 
 
 logger = logging.getLogger("main")
 
+# (postal_code, country)
+WeatherLocation = tuple[str, str]
+
+# Cross-process fetch lock, expires even if its holder dies
+WEATHER_LOCK_TTL = 10  # seconds
+WEATHER_LOCK_POLL_INTERVAL = 0.05  # seconds
+
+_weather_flight: SingleFlight[dict[str, Any]] = SingleFlight()
+_async_weather_flight: AsyncSingleFlight[dict[str, Any]] = AsyncSingleFlight()
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+
+weather_circuit_breaker = CircuitBreaker(
+    "weather_api",
+    failure_threshold=settings.WEATHER_CIRCUIT_FAILURE_THRESHOLD,
+    recovery_timeout=settings.WEATHER_CIRCUIT_RECOVERY_TIMEOUT,
+)
+
+stale_weather_served = Counter(
+    "weather_cache_stale_served_total",
+    "Stale weather served while being refreshed",
+)
+weather_refreshes = Counter(
+    "weather_cache_refreshes_total",
+    "Background refreshes of stale weather",
+)
+weather_refresh_failures = Counter(
+    "weather_cache_refresh_failures_total",
+    "Failed background refreshes of stale weather",
+)
+weather_api_duration = Histogram(
+    "weather_api_request_duration_seconds", "Duration of weather API calls"
+)
+weather_api_errors = Counter(
+    "weather_api_errors_total", "Failed weather API calls"
+)
+
 
 class WeatherConnector:
     """
     Connector class to get weather data from the weather API
     Uses Singleton pattern to avoid multiple instances
+    Keeps pooled HTTP clients, so connections to the API are reused
     """
 
     _instance = None
@@ -29,39 +97,388 @@ class WeatherConnector:
         if not hasattr(self, "_initialized"):
             self.api_key: str = settings.WEATHER_API_KEY
             self.url: str = settings.WEATHER_API_URL
+            self.timeout = httpx.Timeout(settings.WEATHER_API_TIMEOUT)
+            self.limits = httpx.Limits(
+                max_connections=settings.WEATHER_API_MAX_CONNECTIONS,
+                max_keepalive_connections=(
+                    settings.WEATHER_API_MAX_CONNECTIONS
+                ),
+                keepalive_expiry=settings.WEATHER_API_KEEPALIVE_EXPIRY,
+            )
+            self.client = httpx.Client(
+                timeout=self.timeout, limits=self.limits
+            )
+            # async connection pools are bound to the event loop
+            # they were created in, so keep one client per loop
+            self._async_clients: WeakKeyDictionary[
+                asyncio.AbstractEventLoop, httpx.AsyncClient
+            ] = WeakKeyDictionary()
             self._initialized = True
 
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def get_request_params(
+        self, postal_code: str, country: str
+    ) -> dict[str, str]:
+        return {
+            "postal_code": postal_code,
+            "country": country,
+            "key": self.api_key,
+        }
+
     def fetch_weather_by_postal_code(
         self, postal_code: str, country: str
     ) -> dict[str, Any]:
         logger.debug("Getting weather data for %s, %s", postal_code, country)
+        self._check_circuit()
         try:
-            response = requests.get(
-                self.url,
-                params={
-                    "postal_code": postal_code,
-                    "country": country,
-                    "key": self.api_key,
-                },
-                timeout=5,
-            )
+            with weather_api_duration.time(), profile_calls("http"):
+                response = self.client.get(
+                    self.url,
+                    params=self.get_request_params(postal_code, country),
+                )
             response.raise_for_status()
-            return response.json()
-        except (RequestException, Timeout, HTTPError) as e:
-            logger.error("Error in getting weather data: %s", e)
-            raise ValidationError("Error in getting weather data") from e
+            # e.g. an empty 204 or an HTML error page
+            data: dict[str, Any] = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self._handle_error(e)
+        weather_circuit_breaker.record_success()
+        return data
+
+    async def afetch_weather_by_postal_code(
+        self, postal_code: str, country: str
+    ) -> dict[str, Any]:
+        logger.debug("Getting weather data for %s, %s", postal_code, country)
+        self._check_circuit()
+        try:
+            with weather_api_duration.time(), profile_calls("http"):
+                response = await self.async_client.get(
+                    self.url,
+                    params=self.get_request_params(postal_code, country),
+                )
+            response.raise_for_status()
+            # e.g. an empty 204 or an HTML error page
+            data: dict[str, Any] = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self._handle_error(e)
+        weather_circuit_breaker.record_success()
+        return data
+
+    @staticmethod
+    def _check_circuit() -> None:
+        if not weather_circuit_breaker.allow_request():
+            raise ValidationError("Error in getting weather data")
+
+    @staticmethod
+    def _handle_error(error: Union[httpx.HTTPError, ValueError]) -> NoReturn:
+        weather_api_errors.inc()
+        # client errors mean the API is up, only the request was refused
+        if (
+            isinstance(error, httpx.HTTPStatusError)
+            and error.response.status_code < 500
+            and error.response.status_code != 429
+        ):
+            weather_circuit_breaker.record_success()
+        else:
+            weather_circuit_breaker.record_failure()
+        logger.error("Error in getting weather data: %s", error)
+        raise ValidationError("Error in getting weather data") from error
 
 
 def get_weather(postal_code: str, country: str) -> dict[str, Any]:
-    weather_data: Optional[dict[str, Any]] = get_cached_weather(
+    cached: Optional[CachedWeather] = get_cached_weather(postal_code, country)
+
+    if cached is None:
+        return fetch_weather(postal_code, country)
+
+    if cached.is_stale:
+        serve_stale_weather(postal_code, country)
+    return cached.data
+
+
+async def aget_weather(postal_code: str, country: str) -> dict[str, Any]:
+    cached: Optional[CachedWeather] = await aget_cached_weather(
         postal_code, country
     )
 
-    if not weather_data:
+    if cached is None:
+        return await afetch_weather(postal_code, country)
+
+    if cached.is_stale:
+        await aserve_stale_weather(postal_code, country)
+    return cached.data
+
+
+def serve_stale_weather(
+    postal_code: str, country: str
+) -> Optional[Future[None]]:
+    """
+    Records a stale weather serve and schedules a background refresh,
+    unless the location is already being fetched by any process.
+    """
+    stale_weather_served.inc()
+    cache_key = get_weather_cache_key(postal_code, country)
+    token = acquire_cache_lock(cache_key, WEATHER_LOCK_TTL)
+    if token is None:
+        return None
+    return _get_refresh_executor().submit(
+        _refresh_weather, postal_code, country, token
+    )
+
+
+async def aserve_stale_weather(
+    postal_code: str, country: str
+) -> Optional[Future[None]]:
+    stale_weather_served.inc()
+    cache_key = get_weather_cache_key(postal_code, country)
+    token = await aacquire_cache_lock(cache_key, WEATHER_LOCK_TTL)
+    if token is None:
+        return None
+    return _get_refresh_executor().submit(
+        _refresh_weather, postal_code, country, token
+    )
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    global _refresh_executor  # pylint: disable=global-statement
+    if _refresh_executor is None:
+        _refresh_executor = ThreadPoolExecutor(
+            max_workers=settings.WEATHER_REFRESH_MAX_WORKERS,
+            thread_name_prefix="weather-refresh",
+        )
+    return _refresh_executor
+
+
+def _refresh_weather(postal_code: str, country: str, token: str) -> None:
+    try:
         weather_connector = WeatherConnector()
         weather_data = weather_connector.fetch_weather_by_postal_code(
             postal_code, country
         )
         set_cached_weather(postal_code, country, weather_data)
+        weather_refreshes.inc()
+    except ValidationError:
+        weather_refresh_failures.inc()
+        logger.warning(
+            "Serving stale weather for %s, %s, refresh failed",
+            postal_code,
+            country,
+        )
+    finally:
+        release_cache_lock(get_weather_cache_key(postal_code, country), token)
+
+
+def fetch_weather(postal_code: str, country: str) -> dict[str, Any]:
+    """
+    Fetches weather from the API and caches it.
+    Concurrent misses for the same location go upstream only once:
+    threads of the process wait for the in-flight call, other processes
+    wait for the holder of the cache lock to fill the cache.
+    Failures are cached for a short time and fail fast meanwhile.
+    """
+    if is_weather_error_cached(postal_code, country):
+        raise ValidationError("Error in getting weather data")
+    return _fetch_weather_coalesced(postal_code, country)
+
 
-    return weather_data
+async def afetch_weather(postal_code: str, country: str) -> dict[str, Any]:
+    if await ais_weather_error_cached(postal_code, country):
+        raise ValidationError("Error in getting weather data")
+    return await _afetch_weather_coalesced(postal_code, country)
+
+
+def _fetch_weather_coalesced(postal_code: str, country: str) -> dict[str, Any]:
+    return _weather_flight.do(
+        get_weather_cache_key(postal_code, country),
+        lambda: _fetch_weather_locked(postal_code, country),
+    )
+
+
+async def _afetch_weather_coalesced(
+    postal_code: str, country: str
+) -> dict[str, Any]:
+    return await _async_weather_flight.do(
+        get_weather_cache_key(postal_code, country),
+        lambda: _afetch_weather_locked(postal_code, country),
+    )
+
+
+def _fetch_weather_locked(postal_code: str, country: str) -> dict[str, Any]:
+    cache_key = get_weather_cache_key(postal_code, country)
+    token = acquire_cache_lock(cache_key, WEATHER_LOCK_TTL)
+    if token is None:
+        deadline = time.monotonic() + WEATHER_LOCK_TTL
+        while is_cache_locked(cache_key) and time.monotonic() < deadline:
+            time.sleep(WEATHER_LOCK_POLL_INTERVAL)
+    try:
+        # the cache may have been filled while waiting for the lock
+        cached = get_cached_weather(postal_code, country)
+        if cached is not None and not cached.is_stale:
+            return cached.data
+        weather_connector = WeatherConnector()
+        try:
+            weather_data = weather_connector.fetch_weather_by_postal_code(
+                postal_code, country
+            )
+        except ValidationError:
+            set_cached_weather_error(postal_code, country)
+            raise
+        set_cached_weather(postal_code, country, weather_data)
+        return weather_data
+    finally:
+        if token is not None:
+            release_cache_lock(cache_key, token)
+
+
+async def _afetch_weather_locked(
+    postal_code: str, country: str
+) -> dict[str, Any]:
+    cache_key = get_weather_cache_key(postal_code, country)
+    token = await aacquire_cache_lock(cache_key, WEATHER_LOCK_TTL)
+    if token is None:
+        deadline = time.monotonic() + WEATHER_LOCK_TTL
+        while (
+            await ais_cache_locked(cache_key) and time.monotonic() < deadline
+        ):
+            await asyncio.sleep(WEATHER_LOCK_POLL_INTERVAL)
+    try:
+        cached = await aget_cached_weather(postal_code, country)
+        if cached is not None and not cached.is_stale:
+            return cached.data
+        weather_connector = WeatherConnector()
+        try:
+            weather_data = (
+                await weather_connector.afetch_weather_by_postal_code(
+                    postal_code, country
+                )
+            )
+        except ValidationError:
+            await aset_cached_weather_error(postal_code, country)
+            raise
+        await aset_cached_weather(postal_code, country, weather_data)
+        return weather_data
+    finally:
+        if token is not None:
+            await arelease_cache_lock(cache_key, token)
+
+
+def get_weather_bulk(
+    locations: Iterable[WeatherLocation],
+) -> dict[WeatherLocation, Optional[dict[str, Any]]]:
+    """
+    Resolves weather for many locations at once.
+    Every distinct location is looked up only once: cached values are read
+    with a single multi-get and only the misses are fetched from the API,
+    concurrently and coalesced with other in-flight fetches.
+    Stale values are served and refreshed in the background.
+    Locations that could not be fetched are mapped to None.
+    """
+    unique_locations: list[WeatherLocation] = list(dict.fromkeys(locations))
+    cached = get_many_cached_weather(unique_locations)
+    weather: dict[WeatherLocation, Optional[dict[str, Any]]] = {}
+    for location, entry in cached.items():
+        if entry.is_stale:
+            serve_stale_weather(*location)
+        weather[location] = entry.data
+
+    misses = [
+        location for location in unique_locations if location not in weather
+    ]
+    if misses:
+        weather.update(_fetch_many(misses))
+
+    return weather
+
+
+async def aget_weather_bulk(
+    locations: Iterable[WeatherLocation],
+) -> dict[WeatherLocation, Optional[dict[str, Any]]]:
+    """
+    Async version of get_weather_bulk, misses are fetched concurrently
+    with the async client of the running event loop
+    """
+    unique_locations: list[WeatherLocation] = list(dict.fromkeys(locations))
+    cached = await aget_many_cached_weather(unique_locations)
+    weather: dict[WeatherLocation, Optional[dict[str, Any]]] = {}
+    for location, entry in cached.items():
+        if entry.is_stale:
+            await aserve_stale_weather(*location)
+        weather[location] = entry.data
+
+    misses = [
+        location for location in unique_locations if location not in weather
+    ]
+    if misses:
+        weather.update(await _afetch_many(misses))
+
+    return weather
+
+
+def _fetch_many(
+    locations: list[WeatherLocation],
+) -> dict[WeatherLocation, Optional[dict[str, Any]]]:
+    weather: dict[WeatherLocation, Optional[dict[str, Any]]] = dict.fromkeys(
+        locations
+    )
+    # fail fast while the API is known to be unavailable
+    if weather_circuit_breaker.is_open:
+        return weather
+    failed = get_many_cached_weather_errors(locations)
+    locations = [location for location in locations if location not in failed]
+
+    def fetch(location: WeatherLocation) -> Optional[dict[str, Any]]:
+        try:
+            return _fetch_weather_coalesced(*location)
+        except ValidationError:
+            return None
+
+    if len(locations) == 1:
+        weather[locations[0]] = fetch(locations[0])
+    elif locations:
+        max_workers = min(len(locations), settings.WEATHER_API_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # every task runs in a copy of the caller's context,
+            # so the request profile records the calls of the threads
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, fetch, location
+                )
+                for location in locations
+            ]
+            weather.update(
+                zip(locations, (future.result() for future in futures))
+            )
+    return weather
+
+
+async def _afetch_many(
+    locations: list[WeatherLocation],
+) -> dict[WeatherLocation, Optional[dict[str, Any]]]:
+    weather: dict[WeatherLocation, Optional[dict[str, Any]]] = dict.fromkeys(
+        locations
+    )
+    if weather_circuit_breaker.is_open:
+        return weather
+    failed = await aget_many_cached_weather_errors(locations)
+    locations = [location for location in locations if location not in failed]
+
+    async def fetch(location: WeatherLocation) -> Optional[dict[str, Any]]:
+        try:
+            return await _afetch_weather_coalesced(*location)
+        except ValidationError:
+            return None
+
+    results = await asyncio.gather(
+        *(fetch(location) for location in locations)
+    )
+    weather.update(zip(locations, results))
+    return weather
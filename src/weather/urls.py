@@ -1,12 +1,13 @@
+from django.conf import settings
 from django.urls import path
 
-from weather.views import WeatherView
+from weather.views import AsyncWeatherView, WeatherView
 
 
 urlpatterns = [
     path(
         "get-weather/",
-        WeatherView.as_view(),
+        (AsyncWeatherView if settings.ASYNC_VIEWS else WeatherView).as_view(),
         name="get-weather",
     ),
 ]
@@ -6,20 +6,46 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from utils.base_views import AsyncDispatchMixin
 from weather.serializers import WeatherRequestSerializer
-from weather.services.weather_api import get_weather
+from weather.services.weather_api import (
+    WeatherLocation,
+    aget_weather,
+    get_weather,
+)
+
+
+def get_requested_location(request: Request) -> WeatherLocation:
+    serializer = WeatherRequestSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return (
+        serializer.validated_data["postal_code"],
+        serializer.validated_data["country"],
+    )
 
 
 class WeatherView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request: Request) -> Response:
-        serializer = WeatherRequestSerializer(data=request.query_params)
-        serializer.is_valid(raise_exception=True)
-
-        postal_code: str = serializer.validated_data["postal_code"]
-        country: str = serializer.validated_data["country"]
+        postal_code, country = get_requested_location(request)
 
         weather_data: dict[str, Any] = get_weather(postal_code, country)
 
         return Response(weather_data, status=status.HTTP_200_OK)
+
+
+class AsyncWeatherView(AsyncDispatchMixin, APIView):
+    """
+    WeatherView for the ASGI deployment mode,
+    fetches with the async weather client
+    """
+
+    permission_classes = [AllowAny]
+
+    async def get(self, request: Request) -> Response:
+        postal_code, country = get_requested_location(request)
+
+        weather_data: dict[str, Any] = await aget_weather(postal_code, country)
+
+        return Response(weather_data, status=status.HTTP_200_OK)